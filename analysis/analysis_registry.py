@@ -0,0 +1,307 @@
+from collections import Counter
+from typing import Callable, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from analysis.capture_sessions import SESSION_GAP_MINUTES, bin_counts, detect_sessions
+from analysis.sketches import top_with_others
+from photo.exif_table import (
+    COLUMN_CAPTURED_AT, COLUMN_F_NUMBER, COLUMN_IMAGE_HEIGHT, COLUMN_IMAGE_WIDTH, COLUMN_LENS, COLUMN_MAKE,
+    COLUMN_MODEL, COLUMN_ROTATED, COLUMN_UTC_OFFSET, UTC_OFFSET_MISSING,
+)
+
+
+class Analysis:
+    """
+    レポートの分析項目の定義
+    使用する列と、EXIF情報テーブルのチャンクから値ごとの件数を求める関数を宣言する
+    件数は加算で合成できるため、チャンク単位・フォルダ単位で求めた結果を合算できる
+    グラフは件数を棒グラフ（GenerateCountBarChart）で描画する
+    """
+
+    def __init__(self, name: str, title: str, columns: Iterable[str],
+                 compute: Callable[[pd.DataFrame], dict],
+                 order: Optional[Iterable] = None, sort_by_value: bool = False,
+                 top_count: Optional[int] = None, label_format: str = "{}",
+                 transform: Optional[Callable[[Counter], dict]] = None,
+                 describe: Optional[Callable[[Counter], dict]] = None):
+        """
+        コンストラクタ
+        Args:
+            name: 分析項目名（--analysesで指定する名前）
+            title: レポートの見出し
+            columns: 使用する列（EXIF読込で保持するタグの絞り込みに使用）
+            compute: チャンクから値と件数のdictを求める関数（列単位で処理すること）
+            order: グラフに表示する値の順序（指定時は件数0の値も表示する）
+            sort_by_value: グラフを値の昇順に並べるか
+            top_count: グラフに表示する上位の件数（残りは「その他」にまとめる）
+            label_format: グラフのラベルの書式
+            transform: 集計した件数をグラフに表示する件数へ変換する関数（分布を表示する場合など）
+            describe: 集計した件数を統計情報へ変換する関数（未指定時は件数の多い順のdict）
+        """
+        self.name = name
+        self.title = title
+        self.columns = tuple(columns)
+        self.compute = compute
+        self.order = None if order is None else tuple(order)
+        self.sort_by_value = sort_by_value
+        self.top_count = top_count
+        self.label_format = label_format
+        self.transform = transform
+        self.describe = describe
+
+    def chart_counts(self, counts: Counter) -> dict:
+        """
+        集計した件数からグラフに表示するラベルと件数を取得するメソッド
+        Args:
+            counts: 値と件数のCounter
+        Returns:
+            dict: ラベルと件数dict（表示順）
+        """
+        if self.transform is not None:
+            counts = Counter(self.transform(counts))
+        if self.order is not None:
+            items = [(value, counts.get(value, 0)) for value in self.order]
+        elif self.sort_by_value:
+            items = sorted(counts.items())
+        elif self.top_count is not None:
+            items = list(top_with_others(counts, self.top_count).items())
+        else:
+            items = counts.most_common()
+        return {self.label_format.format(value): count for value, count in items}
+
+    def to_stats(self, counts: Counter) -> dict:
+        """
+        集計した件数を統計情報としてJSON出力するためのdictにするメソッド
+        Args:
+            counts: 値と件数のCounter
+        Returns:
+            dict: 統計情報
+        """
+        if self.describe is not None:
+            return self.describe(counts)
+        # 表示順が決まっている項目はその順に出力する
+        if self.order is not None and self.transform is None:
+            return {value: counts.get(value, 0) for value in self.order}
+        return dict(counts.most_common())
+
+
+# 登録済みの分析項目（登録順にレポートへ掲載する）
+ANALYSES: dict[str, Analysis] = {}
+
+
+def register_analysis(analysis: Analysis) -> Analysis:
+    """
+    分析項目を登録する関数
+    Args:
+        analysis: 分析項目
+    Returns:
+        Analysis: 登録した分析項目
+    """
+    if analysis.name in ANALYSES:
+        raise ValueError(f"分析項目 '{analysis.name}' は登録済みです。")
+    ANALYSES[analysis.name] = analysis
+    return analysis
+
+
+def get_analyses(names: Optional[Iterable[str]] = None) -> list[Analysis]:
+    """
+    名前を指定して分析項目を取得する関数
+    Args:
+        names: 分析項目名（未指定時は登録済みの全項目）
+    Returns:
+        list: 分析項目
+    """
+    if names is None:
+        return list(ANALYSES.values())
+    unknown_names = [name for name in names if name not in ANALYSES]
+    if unknown_names:
+        raise KeyError(f"分析項目 {', '.join(unknown_names)} は登録されていません。"
+                       f"（登録済み：{', '.join(ANALYSES)}）")
+    return [ANALYSES[name] for name in names]
+
+
+def required_columns(analyses: Iterable[Analysis]) -> tuple[str, ...]:
+    """
+    分析項目で使用する列の和集合を取得する関数
+    Args:
+        analyses: 分析項目
+    Returns:
+        tuple: 列名
+    """
+    columns = {}
+    for analysis in analyses:
+        columns.update(dict.fromkeys(analysis.columns))
+    return tuple(columns)
+
+
+def count_camera_lenses(photo_exifs: pd.DataFrame) -> dict:
+    """
+    カメラとレンズの組み合わせごとの件数を求める関数（いずれかが未記録の画像は除外）
+    """
+    counts = photo_exifs.groupby(
+        [COLUMN_MAKE, COLUMN_MODEL, COLUMN_LENS], observed=True, sort=False).size()
+    return {
+        f"{make}_{model} / {lens}": int(count)
+        for (make, model, lens), count in counts.items() if count > 0}
+
+
+def count_f_numbers(photo_exifs: pd.DataFrame) -> dict:
+    """
+    F値（小数第1位に丸める）ごとの件数を求める関数
+    """
+    f_numbers = photo_exifs[COLUMN_F_NUMBER].to_numpy()
+    f_numbers = np.round(f_numbers[~np.isnan(f_numbers)].astype(np.float64), 1)
+    values, counts = np.unique(f_numbers, return_counts=True)
+    return dict(zip(values.tolist(), counts.tolist()))
+
+
+def count_orientations(photo_exifs: pd.DataFrame) -> dict:
+    """
+    縦構図・横構図・正方形の件数を求める関数
+    画像サイズが未記録の画像は除外し、Orientationが90度回転の場合は縦横を入れ替える
+    """
+    widths = photo_exifs[COLUMN_IMAGE_WIDTH].to_numpy()
+    heights = photo_exifs[COLUMN_IMAGE_HEIGHT].to_numpy()
+    rotated = photo_exifs[COLUMN_ROTATED].to_numpy()
+    known = (widths > 0) & (heights > 0)
+    square = known & (widths == heights)
+    portrait = known & ~square & ((heights > widths) != rotated)
+    return {
+        "横構図": int(np.count_nonzero(known & ~square & ~portrait)),
+        "縦構図": int(np.count_nonzero(portrait)),
+        "正方形": int(np.count_nonzero(square)),
+    }
+
+
+# 月ごとの季節（3～5月：春、6～8月：夏、9～11月：秋、12～2月：冬）
+SEASONS = ("春", "夏", "秋", "冬")
+MONTH_SEASON_INDEXES = np.array([-1, 3, 3, 0, 0, 0, 1, 1, 1, 2, 2, 2, 3])
+
+
+def count_seasons(photo_exifs: pd.DataFrame) -> dict:
+    """
+    撮影日時の季節ごとの件数を求める関数（撮影日時が未記録の画像は除外）
+    """
+    months = photo_exifs[COLUMN_CAPTURED_AT].dt.month.dropna().to_numpy(dtype=np.int64)
+    counts = np.bincount(MONTH_SEASON_INDEXES[months], minlength=len(SEASONS))
+    return dict(zip(SEASONS, counts.tolist()))
+
+
+# 時間帯・曜日
+HOURS = tuple(range(24))
+WEEKDAYS = ("月", "火", "水", "木", "金", "土", "日")
+
+
+def count_hours(photo_exifs: pd.DataFrame) -> dict:
+    """
+    撮影日時（現地時刻）の時間帯ごとの件数を求める関数
+    """
+    hours = photo_exifs[COLUMN_CAPTURED_AT].dt.hour.dropna().to_numpy(dtype=np.int64)
+    return dict(zip(HOURS, np.bincount(hours, minlength=len(HOURS)).tolist()))
+
+
+def count_weekdays(photo_exifs: pd.DataFrame) -> dict:
+    """
+    撮影日時（現地時刻）の曜日ごとの件数を求める関数
+    """
+    weekdays = photo_exifs[COLUMN_CAPTURED_AT].dt.weekday.dropna().to_numpy(dtype=np.int64)
+    return dict(zip(WEEKDAYS, np.bincount(weekdays, minlength=len(WEEKDAYS)).tolist()))
+
+
+# 1日・1セッションあたりの撮影枚数の階級（下限）とラベル
+SHOT_COUNT_BINS = [1, 10, 30, 100, 300]
+SHOT_COUNT_LABELS = ["1～9枚", "10～29枚", "30～99枚", "100～299枚", "300枚以上"]
+
+
+def count_days(photo_exifs: pd.DataFrame) -> dict:
+    """
+    撮影日（現地時刻）ごとの件数を求める関数
+    """
+    days = photo_exifs[COLUMN_CAPTURED_AT].to_numpy().astype("datetime64[D]")
+    values, counts = np.unique(days[~np.isnat(days)], return_counts=True)
+    return dict(zip(np.datetime_as_string(values).tolist(), counts.tolist()))
+
+
+def distribute_days(day_counts: Counter) -> dict:
+    """
+    撮影日ごとの件数から、1日あたりの撮影枚数の分布（日数）を求める関数
+    """
+    return bin_counts(np.fromiter(day_counts.values(), dtype=np.int64), SHOT_COUNT_BINS, SHOT_COUNT_LABELS)
+
+
+def describe_days(day_counts: Counter) -> dict:
+    """
+    撮影日ごとの件数を統計情報にする関数（日付順）
+    """
+    return dict(sorted(day_counts.items()))
+
+
+def count_capture_minutes(photo_exifs: pd.DataFrame) -> dict:
+    """
+    撮影時刻（分単位）ごとの件数を求める関数（撮影セッションの検出に使用）
+    UTCとの時差が記録されている画像はUTCに揃え、旅行先で時計を合わせた場合も同じ時間軸で並べる
+    時差が記録されていない画像は現地時刻のまま使用する
+    """
+    captured_ats = photo_exifs[COLUMN_CAPTURED_AT].to_numpy()
+    offsets = photo_exifs[COLUMN_UTC_OFFSET].to_numpy()
+    known = ~np.isnat(captured_ats)
+    minutes = captured_ats[known].astype("datetime64[m]").astype(np.int64)
+    offsets = offsets[known].astype(np.int64)
+    minutes -= np.where(offsets != UTC_OFFSET_MISSING, offsets, 0)
+    values, counts = np.unique(minutes, return_counts=True)
+    return dict(zip(values.tolist(), counts.tolist()))
+
+
+def distribute_sessions(minute_counts: Counter) -> dict:
+    """
+    撮影時刻ごとの件数から、1セッションあたりの撮影枚数の分布（セッション数）を求める関数
+    """
+    _, _, session_counts = detect_sessions(minute_counts)
+    return bin_counts(session_counts, SHOT_COUNT_BINS, SHOT_COUNT_LABELS)
+
+
+def describe_sessions(minute_counts: Counter, top_count: int = 10) -> dict:
+    """
+    撮影セッションの件数と、撮影枚数の多いセッションを統計情報にする関数
+    """
+    starts, ends, session_counts = detect_sessions(minute_counts)
+    top_indexes = np.argsort(-session_counts, kind="stable")[:top_count]
+    return {
+        "gap_minutes": SESSION_GAP_MINUTES,
+        "session_count": len(session_counts),
+        "median_photos": float(np.median(session_counts)) if len(session_counts) else None,
+        "largest_sessions": [
+            {"start": str(np.datetime_as_string(starts[index].astype("datetime64[m]"))),
+             "end": str(np.datetime_as_string(ends[index].astype("datetime64[m]"))),
+             "count": int(session_counts[index])}
+            for index in top_indexes],
+    }
+
+
+register_analysis(Analysis(
+    "camera_lens", "カメラとレンズの組み合わせ", [COLUMN_MAKE, COLUMN_MODEL, COLUMN_LENS],
+    count_camera_lenses, top_count=5))
+register_analysis(Analysis(
+    "f_number", "F値の割合", [COLUMN_F_NUMBER],
+    count_f_numbers, sort_by_value=True, label_format="F{:g}"))
+register_analysis(Analysis(
+    "orientation", "縦横構図の比率", [COLUMN_IMAGE_WIDTH, COLUMN_IMAGE_HEIGHT, COLUMN_ROTATED],
+    count_orientations, order=["横構図", "縦構図", "正方形"]))
+register_analysis(Analysis(
+    "season", "四季ごとの撮影枚数", [COLUMN_CAPTURED_AT],
+    count_seasons, order=SEASONS))
+register_analysis(Analysis(
+    "hour", "時間帯ごとの撮影枚数", [COLUMN_CAPTURED_AT],
+    count_hours, order=HOURS, label_format="{}時"))
+register_analysis(Analysis(
+    "weekday", "曜日ごとの撮影枚数", [COLUMN_CAPTURED_AT],
+    count_weekdays, order=WEEKDAYS))
+register_analysis(Analysis(
+    "day", "1日あたりの撮影枚数（日数）", [COLUMN_CAPTURED_AT],
+    count_days, order=SHOT_COUNT_LABELS, transform=distribute_days, describe=describe_days))
+register_analysis(Analysis(
+    "session", "撮影セッションごとの撮影枚数（セッション数）",
+    [COLUMN_CAPTURED_AT, COLUMN_UTC_OFFSET],
+    count_capture_minutes, order=SHOT_COUNT_LABELS, transform=distribute_sessions, describe=describe_sessions))
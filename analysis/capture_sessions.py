@@ -0,0 +1,49 @@
+from typing import Mapping, Tuple
+
+import numpy as np
+
+
+# 撮影セッションを区切る撮影間隔（分）
+SESSION_GAP_MINUTES = 120
+
+
+def detect_sessions(minute_counts: Mapping[int, int],
+                    gap_minutes: int = SESSION_GAP_MINUTES) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    分単位の撮影枚数から撮影セッションを検出する関数
+    撮影時刻を並べ、前の撮影からgap_minutes分を超えて空いた位置で区切る
+    分単位の件数は加算で合成できるため、分割して集計した結果からも同じセッションが求まる
+    Args:
+        minute_counts: 撮影時刻（1970/01/01からの経過分）と撮影枚数
+        gap_minutes: セッションを区切る撮影間隔（分）
+    Returns:
+        tuple: (セッション開始時刻配列, セッション終了時刻配列, セッションの撮影枚数配列)
+    """
+    if not minute_counts:
+        empty = np.array([], dtype=np.int64)
+        return empty, empty, empty
+    minutes = np.fromiter(minute_counts.keys(), dtype=np.int64, count=len(minute_counts))
+    counts = np.fromiter(minute_counts.values(), dtype=np.int64, count=len(minute_counts))
+    order = np.argsort(minutes, kind="stable")
+    minutes = minutes[order]
+    counts = counts[order]
+
+    breaks = np.flatnonzero(np.diff(minutes) > gap_minutes) + 1
+    first_indexes = np.concatenate(([0], breaks))
+    last_indexes = np.concatenate((breaks - 1, [len(minutes) - 1]))
+    return minutes[first_indexes], minutes[last_indexes], np.add.reduceat(counts, first_indexes)
+
+
+def bin_counts(values: np.ndarray, bins: list[int], labels: list[str]) -> dict:
+    """
+    件数を階級ごとに数える関数（1日あたり・1セッションあたりの撮影枚数の分布に使用）
+    Args:
+        values: 件数配列
+        bins: 各階級の下限（昇順）
+        labels: 各階級のラベル
+    Returns:
+        dict: 階級のラベルと該当数dict
+    """
+    indexes = np.searchsorted(bins, values, side="right") - 1
+    counts = np.bincount(indexes[indexes >= 0], minlength=len(bins))
+    return dict(zip(labels, counts.tolist()))
@@ -0,0 +1,188 @@
+from collections import Counter
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+from analysis.sketches import BottomKSample
+from photo.exif_table import COLUMN_FILE_PATH, COLUMN_FOCAL_LENGTH, COLUMN_LENS, COLUMN_MAKE, COLUMN_MODEL
+
+
+# 代表写真の分類
+GROUP_CAMERA = "camera"
+GROUP_LENS = "lens"
+GROUP_FOCAL_RANGE = "focal_range"
+CONTACT_SHEET_GROUPS = (GROUP_CAMERA, GROUP_LENS, GROUP_FOCAL_RANGE)
+# 分類の表示名
+GROUP_TITLES = {
+    GROUP_CAMERA: "カメラ別",
+    GROUP_LENS: "レンズ別",
+    GROUP_FOCAL_RANGE: "焦点距離別",
+}
+# 焦点距離（35mm換算）の区分の下限とラベル
+FOCAL_RANGE_BINS = [1, 35, 71]
+FOCAL_RANGE_LABELS = ["広角（35mm未満）", "標準（35〜70mm）", "望遠（70mm超）"]
+
+
+class ContactSheetSampler:
+    """
+    コンタクトシート（代表写真の一覧）に掲載する画像を分類ごとに抽出するクラス
+    分類ごとにファイルパスのハッシュが小さい順にsample_size件を保持する（ボトムkサンプリング）
+    抽出結果は読込順によらず、分割して集計した結果を合算しても一括で集計した結果と一致する
+    EXIF情報テーブルにはファイルパスの列（COLUMN_FILE_PATH）が必要
+    """
+    # 1分類あたりの掲載枚数の既定値
+    DEFAULT_SAMPLE_SIZE = 6
+
+    def __init__(self, group: str = GROUP_CAMERA, sample_size: int = DEFAULT_SAMPLE_SIZE):
+        """
+        コンストラクタ
+        Args:
+            group: 分類（CONTACT_SHEET_GROUPS）
+            sample_size: 1分類あたりの抽出件数
+        """
+        if group not in CONTACT_SHEET_GROUPS:
+            raise ValueError(f"代表写真の分類 '{group}' は指定できません。")
+        self.group = group
+        self.sample_size = max(1, sample_size)
+        # 分類ごとの画像数（初出順）
+        self.bucket_counts: Counter = Counter()
+        # 分類ごとの抽出結果（ファイルパス）
+        self.samples: dict[str, BottomKSample] = {}
+
+    def create_empty(self) -> "ContactSheetSampler":
+        """
+        同じ分類・抽出件数の空の抽出クラスを作成するメソッド
+        """
+        return ContactSheetSampler(self.group, self.sample_size)
+
+    def bucket_labels(self, photo_exifs: pd.DataFrame) -> pd.Series:
+        """
+        各画像の分類名を取得するメソッド
+        Args:
+            photo_exifs: EXIF情報テーブル（チャンク）
+        Returns:
+            Series: 分類名（分類に必要なタグが未記録の画像はNA）
+        """
+        if self.group == GROUP_CAMERA:
+            # カメラ名はReportAggregatorと同じく「メーカー_機種」とする
+            return (photo_exifs[COLUMN_MAKE].astype("string") + "_"
+                    + photo_exifs[COLUMN_MODEL].astype("string"))
+        if self.group == GROUP_LENS:
+            return photo_exifs[COLUMN_LENS].astype("string")
+        indexes = np.searchsorted(FOCAL_RANGE_BINS, photo_exifs[COLUMN_FOCAL_LENGTH].to_numpy(), side="right") - 1
+        return pd.Series(pd.Categorical.from_codes(indexes, categories=FOCAL_RANGE_LABELS)).astype("string")
+
+    def update(self, photo_exifs: pd.DataFrame):
+        """
+        EXIF情報テーブルのチャンクから代表写真の候補を抽出するメソッド
+        Args:
+            photo_exifs: EXIF情報テーブル（チャンク）
+        """
+        labels = self.bucket_labels(photo_exifs)
+        valid = labels.notna().to_numpy()
+        if not valid.any():
+            return
+        labels = labels.to_numpy()[valid]
+        file_paths = photo_exifs[COLUMN_FILE_PATH].to_numpy()[valid]
+        candidates = pd.DataFrame({
+            "label": labels,
+            "priority": pd.util.hash_array(file_paths),
+            "file_path": file_paths,
+        })
+        self.bucket_counts.update(candidates["label"].value_counts(sort=False).to_dict())
+
+        # チャンク内で分類ごとに優先度の小さい候補のみ残してから追加する
+        candidates = candidates.sort_values("priority", kind="stable").groupby(
+            "label", sort=False).head(self.sample_size)
+        for label, priority, file_path in candidates.itertuples(index=False):
+            if label not in self.samples:
+                self.samples[label] = BottomKSample(self.sample_size)
+            self.samples[label].add(int(priority), file_path)
+
+    def remove(self, photo_exifs: pd.DataFrame) -> bool:
+        """
+        抽出済みの画像を画像数から取り除くメソッド
+        抽出結果は残りの画像がないと補充できないため、取り除いた画像が抽出結果に含まれるかを返す
+        Args:
+            photo_exifs: 取り除く画像のEXIF情報テーブル
+        Returns:
+            bool: 取り除いた画像が抽出結果に含まれていたか（Trueの場合は抽出をやり直す必要がある）
+        """
+        labels = self.bucket_labels(photo_exifs)
+        valid = labels.notna().to_numpy()
+        labels = labels.to_numpy()[valid]
+        file_paths = photo_exifs[COLUMN_FILE_PATH].to_numpy()[valid]
+        self.bucket_counts.subtract(Counter(labels.tolist()))
+        for label in [label for label, count in self.bucket_counts.items() if count <= 0]:
+            del self.bucket_counts[label]
+            self.samples.pop(label, None)
+        return any(
+            label in self.samples and file_path in self.samples[label]
+            for label, file_path in zip(labels.tolist(), file_paths.tolist()))
+
+    def merge(self, other: "ContactSheetSampler") -> "ContactSheetSampler":
+        """
+        別の抽出結果を合算するメソッド
+        Args:
+            other: 合算する抽出結果（同じ分類であること）
+        Returns:
+            ContactSheetSampler: 自身
+        """
+        self.bucket_counts.update(other.bucket_counts)
+        for label, sample in other.samples.items():
+            if label not in self.samples:
+                self.samples[label] = BottomKSample(self.sample_size)
+            self.samples[label].update(sample)
+        return self
+
+    def representative_files(self, top_count: int = 5) -> list[Tuple[str, int, list[str]]]:
+        """
+        コンタクトシートに掲載する分類と代表写真を取得するメソッド
+        カメラ・レンズは画像数の多い順に上位のみ、焦点距離は広角・標準・望遠の順とする
+        Args:
+            top_count: 掲載する分類数（カメラ・レンズのみ）
+        Returns:
+            list: (分類名, 画像数, 代表写真のファイルパスリスト)のリスト
+        """
+        if self.group == GROUP_FOCAL_RANGE:
+            labels = [label for label in FOCAL_RANGE_LABELS if label in self.bucket_counts]
+        else:
+            labels = [label for label, _ in self.bucket_counts.most_common(top_count)]
+        return [
+            (label, self.bucket_counts[label], [file_path for _, file_path in self.samples[label].items()])
+            for label in labels
+        ]
+
+    def to_dict(self) -> dict:
+        """
+        抽出結果をJSONへ変換可能なdictにするメソッド
+        Returns:
+            dict: 抽出結果
+        """
+        return {
+            "group": self.group,
+            "sample_size": self.sample_size,
+            "bucket_counts": [[label, count] for label, count in self.bucket_counts.items()],
+            "samples": {
+                label: [[priority, file_path] for priority, file_path in sample.items()]
+                for label, sample in self.samples.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, values: dict) -> "ContactSheetSampler":
+        """
+        to_dictで出力したdictから抽出結果を復元するメソッド
+        Args:
+            values: 抽出結果dict
+        Returns:
+            ContactSheetSampler: 抽出結果
+        """
+        sampler = cls(values["group"], values["sample_size"])
+        sampler.bucket_counts = Counter({label: count for label, count in values["bucket_counts"]})
+        for label, items in values["samples"].items():
+            sample = BottomKSample(sampler.sample_size)
+            for priority, file_path in items:
+                sample.add(priority, file_path)
+            sampler.samples[label] = sample
+        return sampler
@@ -0,0 +1,371 @@
+from collections import Counter
+from typing import Iterable, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from analysis.contact_sheet import ContactSheetSampler
+from analysis.sketches import SpaceSavingSketch, sampling_margin, top_with_others
+from photo.exif_table import (
+    COLUMN_CAPTURED_AT, COLUMN_F_NUMBER, COLUMN_FOCAL_LENGTH, COLUMN_LENS, COLUMN_MAKE, COLUMN_MODEL,
+    FOCAL_LENGTH_MISSING,
+)
+
+
+class ReportAggregator:
+    """
+    レポート集計クラス
+    EXIF情報テーブルをチャンク単位で1度だけ受け取り、各セクションの集計値を逐次更新する
+    保持するのは集計値のみのため、メモリ使用量は画像枚数ではなく値の種類数に比例する
+    sketch_capacityを指定した場合は、カメラ・レンズをSpace-Savingスケッチで近似集計し、
+    値の種類数によらずメモリ使用量を一定にする
+    analysesを指定した場合は、分析項目（analysis.analysis_registry.Analysis）ごとの件数も集計する
+    contact_sheet_groupを指定した場合は、コンタクトシートに掲載する代表写真も分類ごとに抽出する
+    """
+
+    def __init__(self, sketch_capacity: Optional[int] = None, analyses: Iterable = (),
+                 contact_sheet_group: Optional[str] = None):
+        """
+        コンストラクタ
+        Args:
+            sketch_capacity: カメラ・レンズの近似集計で保持する種類数の上限（未指定時は正確に集計）
+            analyses: 集計する分析項目
+            contact_sheet_group: 代表写真の分類（未指定時は抽出しない。テーブルにファイルパスの列が必要）
+        """
+        self.sketch_capacity = sketch_capacity
+        self.analyses = list(analyses)
+        # レポート対象画像数
+        self.photo_count = 0
+        # 撮影期間
+        self.period_start: Optional[pd.Timestamp] = None
+        self.period_end: Optional[pd.Timestamp] = None
+        # カメラ名（メーカー_機種）と出現回数（初出順）
+        self.camera_counts: Union[Counter, SpaceSavingSketch] = self.create_counter()
+        # レンズ名と出現回数（初出順）
+        self.lens_counts: Union[Counter, SpaceSavingSketch] = self.create_counter()
+        # (F値, 焦点距離)の組み合わせと出現回数
+        self.f_and_focal_length_counts: Counter = Counter()
+        # 分析項目名と値ごとの件数
+        self.analysis_counts: dict[str, Counter] = {analysis.name: Counter() for analysis in self.analyses}
+        # 除外した重複画像数（identical: 内容が同じファイル、derivative: 派生ファイル。重複除外時のみ）
+        self.duplicate_counts: Counter = Counter()
+        # コンタクトシートの代表写真（代表写真を抽出する場合のみ）
+        self.contact_sheet: Optional[ContactSheetSampler] = None
+        if contact_sheet_group is not None:
+            self.contact_sheet = ContactSheetSampler(contact_sheet_group)
+        # 抽出元のファイル数（ファイルを抽出して集計した場合のみ）
+        self.sample_population: Optional[int] = None
+        # 抽出したファイル数
+        self.sample_count: Optional[int] = None
+
+    def create_counter(self) -> Union[Counter, SpaceSavingSketch]:
+        """
+        カメラ・レンズの出現回数を数えるカウンターを作成するメソッド
+        Returns:
+            Counter: 正確に集計する場合はCounter、近似集計する場合はSpaceSavingSketch
+        """
+        if self.sketch_capacity is None:
+            return Counter()
+        return SpaceSavingSketch(self.sketch_capacity)
+
+    def set_sample(self, sample_count: int, population_count: int):
+        """
+        集計対象がファイルの無作為抽出であることを記録するメソッド
+        Args:
+            sample_count: 抽出したファイル数
+            population_count: 抽出元のファイル数
+        """
+        self.sample_count = sample_count
+        self.sample_population = population_count
+
+    def record_duplicates(self, identical_count: int, derivative_count: int):
+        """
+        重複画像として集計から除外したファイル数を記録するメソッド
+        Args:
+            identical_count: 内容が同じため除外したファイル数
+            derivative_count: 編集・現像などの派生ファイルとして除外したファイル数
+        """
+        self.duplicate_counts.update({"identical": identical_count, "derivative": derivative_count})
+
+    @property
+    def is_approximate(self) -> bool:
+        """
+        近似集計（ファイルの抽出またはスケッチ）かどうか
+        """
+        return self.sketch_capacity is not None or self.sample_population is not None
+
+    def update(self, photo_exifs: pd.DataFrame):
+        """
+        EXIF情報テーブルのチャンクを集計値へ反映するメソッド
+        Args:
+            photo_exifs: EXIF情報テーブル（チャンク）
+        """
+        self.photo_count += len(photo_exifs)
+        self.update_period(photo_exifs[COLUMN_CAPTURED_AT])
+
+        # メーカーと機種の組み合わせをキーに出現回数をカウント（どちらか未記録の画像は除外）
+        camera_counts = photo_exifs.groupby(
+            [COLUMN_MAKE, COLUMN_MODEL], observed=True, sort=False).size()
+        self.camera_counts.update({
+            f"{make}_{model}": int(count) for (make, model), count in camera_counts.items()})
+
+        lens_counts = photo_exifs[COLUMN_LENS].value_counts(sort=False)
+        self.lens_counts.update({
+            str(lens): int(count) for lens, count in lens_counts[lens_counts > 0].items()})
+
+        # F値と焦点距離が両方記録されている画像のみ組み合わせをカウント
+        f_numbers = photo_exifs[COLUMN_F_NUMBER].to_numpy()
+        focal_lengths = photo_exifs[COLUMN_FOCAL_LENGTH].to_numpy()
+        mask = ~np.isnan(f_numbers) & (focal_lengths != FOCAL_LENGTH_MISSING)
+        pairs, counts = np.unique(
+            np.column_stack((np.round(f_numbers[mask].astype(np.float64), 2), focal_lengths[mask])),
+            axis=0, return_counts=True)
+        for (f_number, focal_length), count in zip(pairs.tolist(), counts.tolist()):
+            self.f_and_focal_length_counts[(f_number, int(focal_length))] += count
+
+        for analysis in self.analyses:
+            self.analysis_counts[analysis.name].update(analysis.compute(photo_exifs))
+
+        if self.contact_sheet is not None:
+            self.contact_sheet.update(photo_exifs)
+
+    def remove(self, photo_exifs: pd.DataFrame) -> bool:
+        """
+        集計済みの画像を集計値から取り除くメソッド（常駐モードでファイルの更新・削除を反映する）
+        件数は減算で取り除けるが、撮影期間（最小/最大）は残りの画像がないと求め直せないため変更しない
+        （呼び出し側でset_periodにより設定する）。近似集計（スケッチ）の集計値には使用できない
+        Args:
+            photo_exifs: 取り除く画像のEXIF情報テーブル（集計時と同じ値であること）
+        Returns:
+            bool: 取り除いた画像が代表写真に含まれていたか（Trueの場合は代表写真の抽出をやり直す必要がある）
+        """
+        removed = ReportAggregator(analyses=self.analyses).consume([photo_exifs])
+        self.photo_count -= removed.photo_count
+        subtract_counts(self.camera_counts, removed.camera_counts)
+        subtract_counts(self.lens_counts, removed.lens_counts)
+        subtract_counts(self.f_and_focal_length_counts, removed.f_and_focal_length_counts)
+        for name, counts in self.analysis_counts.items():
+            subtract_counts(counts, removed.analysis_counts[name])
+        if self.contact_sheet is None:
+            return False
+        return self.contact_sheet.remove(photo_exifs)
+
+    def set_period(self, period_start: Optional[pd.Timestamp], period_end: Optional[pd.Timestamp]):
+        """
+        撮影期間を設定するメソッド（removeで画像を取り除いた後に使用する）
+        Args:
+            period_start: 撮影期間の開始（撮影日時が記録された画像がない場合はNone）
+            period_end: 撮影期間の終了
+        """
+        self.period_start = period_start
+        self.period_end = period_end
+
+    def update_period(self, captured_ats: pd.Series):
+        """
+        撮影期間を更新するメソッド
+        Args:
+            captured_ats: 撮影日時列
+        """
+        chunk_start = captured_ats.min()
+        chunk_end = captured_ats.max()
+        if pd.isna(chunk_start):
+            return
+        if self.period_start is None or chunk_start < self.period_start:
+            self.period_start = chunk_start
+        if self.period_end is None or chunk_end > self.period_end:
+            self.period_end = chunk_end
+
+    def consume(self, photo_exif_chunks: Iterable[pd.DataFrame]) -> "ReportAggregator":
+        """
+        EXIF情報テーブルのチャンク列を全て集計するメソッド
+        Args:
+            photo_exif_chunks: EXIF情報テーブルのチャンク
+        Returns:
+            ReportAggregator: 自身
+        """
+        for photo_exifs in photo_exif_chunks:
+            self.update(photo_exifs)
+        return self
+
+    def merge(self, other: "ReportAggregator") -> "ReportAggregator":
+        """
+        別の集計値を合算するメソッド
+        集計値は全て加算・最小/最大で合成できるため、分割して集計した結果を合算しても一括で集計した結果と一致する
+        Args:
+            other: 合算する集計値
+        Returns:
+            ReportAggregator: 自身
+        """
+        # 一方でしか集計していない分析項目は一部の画像の件数しか含まないため、両方で集計した項目のみ残す
+        if self.photo_count == 0:
+            self.analysis_counts = {name: Counter() for name in other.analysis_counts}
+        elif other.photo_count > 0:
+            self.analysis_counts = {
+                name: counts for name, counts in self.analysis_counts.items() if name in other.analysis_counts}
+        for name, counts in self.analysis_counts.items():
+            counts.update(other.analysis_counts.get(name, {}))
+        # 代表写真も同様に、両方で同じ分類の抽出をしている場合のみ残す
+        if self.photo_count == 0:
+            self.contact_sheet = None if other.contact_sheet is None else other.contact_sheet.create_empty()
+        elif other.photo_count > 0 and (
+                self.contact_sheet is None or other.contact_sheet is None
+                or self.contact_sheet.group != other.contact_sheet.group):
+            self.contact_sheet = None
+        if self.contact_sheet is not None and other.contact_sheet is not None:
+            self.contact_sheet.merge(other.contact_sheet)
+        self.photo_count += other.photo_count
+        if other.period_start is not None:
+            if self.period_start is None or other.period_start < self.period_start:
+                self.period_start = other.period_start
+        if other.period_end is not None:
+            if self.period_end is None or other.period_end > self.period_end:
+                self.period_end = other.period_end
+        self.camera_counts.update(other.camera_counts)
+        self.lens_counts.update(other.lens_counts)
+        self.f_and_focal_length_counts.update(other.f_and_focal_length_counts)
+        self.duplicate_counts.update(other.duplicate_counts)
+        return self
+
+    def to_dict(self) -> dict:
+        """
+        集計値をJSONへ変換可能なdictにするメソッド
+        カウンターは初出順を保持するため、dictではなくリストで出力する
+        Returns:
+            dict: 集計値
+        """
+        return {
+            "photo_count": self.photo_count,
+            "period_start": None if self.period_start is None else self.period_start.isoformat(),
+            "period_end": None if self.period_end is None else self.period_end.isoformat(),
+            "camera_counts": [[name, count] for name, count in self.camera_counts.items()],
+            "lens_counts": [[name, count] for name, count in self.lens_counts.items()],
+            "f_and_focal_length_counts": [
+                [f_number, focal_length, count]
+                for (f_number, focal_length), count in self.f_and_focal_length_counts.items()],
+            "analysis_counts": {
+                name: [[value, count] for value, count in counts.items()]
+                for name, counts in self.analysis_counts.items()},
+            "duplicate_counts": dict(self.duplicate_counts),
+            "contact_sheet": None if self.contact_sheet is None else self.contact_sheet.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, values: dict) -> "ReportAggregator":
+        """
+        to_dictで出力したdictから集計値を復元するメソッド
+        Args:
+            values: 集計値dict
+        Returns:
+            ReportAggregator: 集計値
+        """
+        report_aggregator = cls()
+        report_aggregator.photo_count = values["photo_count"]
+        if values["period_start"] is not None:
+            report_aggregator.period_start = pd.Timestamp(values["period_start"])
+        if values["period_end"] is not None:
+            report_aggregator.period_end = pd.Timestamp(values["period_end"])
+        report_aggregator.camera_counts = Counter(
+            {name: count for name, count in values["camera_counts"]})
+        report_aggregator.lens_counts = Counter(
+            {name: count for name, count in values["lens_counts"]})
+        report_aggregator.f_and_focal_length_counts = Counter({
+            (float(f_number), int(focal_length)): count
+            for f_number, focal_length, count in values["f_and_focal_length_counts"]})
+        # 重複除外・分析項目・代表写真の追加前に保存した集計値には含まれない
+        report_aggregator.duplicate_counts = Counter(values.get("duplicate_counts", {}))
+        if values.get("contact_sheet") is not None:
+            report_aggregator.contact_sheet = ContactSheetSampler.from_dict(values["contact_sheet"])
+        report_aggregator.analysis_counts = {
+            name: Counter({value: count for value, count in counts})
+            for name, counts in values.get("analysis_counts", {}).items()}
+        return report_aggregator
+
+    def to_stats(self) -> dict:
+        """
+        集計値を統計情報としてJSON出力するためのdictにするメソッド
+        カウンターは出現回数の多い順に並べる
+        Returns:
+            dict: 統計情報
+        """
+        stats = {
+            "photo_count": self.photo_count,
+            "period_start": None if self.period_start is None else self.period_start.isoformat(),
+            "period_end": None if self.period_end is None else self.period_end.isoformat(),
+            "cameras": dict(self.camera_counts.most_common()),
+            "lenses": dict(self.lens_counts.most_common()),
+            "f_and_focal_lengths": [
+                {"f_number": f_number, "focal_length": focal_length, "count": count}
+                for (f_number, focal_length), count in self.f_and_focal_length_counts.most_common()],
+        }
+        if self.duplicate_counts:
+            stats["duplicates"] = dict(self.duplicate_counts)
+        if self.analysis_counts:
+            # 分析項目の定義はグラフ側にあるため、統計情報を出力する場合のみ読み込む
+            from analysis.analysis_registry import ANALYSES
+
+            stats["analyses"] = {
+                name: ANALYSES[name].to_stats(counts) if name in ANALYSES else dict(counts.most_common())
+                for name, counts in self.analysis_counts.items()}
+        if self.is_approximate:
+            stats["approximation"] = self.error_bounds()
+        return stats
+
+    def error_bounds(self) -> dict:
+        """
+        近似集計の誤差の上限を取得するメソッド
+        Returns:
+            dict: 抽出元・抽出したファイル数、構成比の誤差（95%信頼区間の半幅）、
+                  カメラ・レンズの出現回数を多く数えた可能性のある件数
+        """
+        bounds = {
+            "sample_count": self.sample_count,
+            "sample_population": self.sample_population,
+            "share_margin": None,
+            "sketch_capacity": self.sketch_capacity,
+            "camera_count_error": 0,
+            "lens_count_error": 0,
+        }
+        if self.sample_population is not None:
+            bounds["share_margin"] = sampling_margin(self.sample_count, self.sample_population)
+        if isinstance(self.camera_counts, SpaceSavingSketch):
+            bounds["camera_count_error"] = self.camera_counts.max_error()
+        if isinstance(self.lens_counts, SpaceSavingSketch):
+            bounds["lens_count_error"] = self.lens_counts.max_error()
+        return bounds
+
+    def camera_chart_counts(self, top_count: int = 5) -> dict:
+        """
+        使用カメラの上位と「その他」の出現回数を取得するメソッド
+        """
+        return top_with_others(self.camera_counts, top_count)
+
+    def lens_chart_counts(self, top_count: int = 5) -> dict:
+        """
+        使用レンズの上位と「その他」の出現回数を取得するメソッド
+        """
+        return top_with_others(self.lens_counts, top_count)
+
+    def f_and_focal_length_arrays(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        F値と焦点距離の組み合わせを配列で取得するメソッド
+        Returns:
+            tuple: (F値配列, 焦点距離配列, 出現回数配列)
+        """
+        pairs = list(self.f_and_focal_length_counts.items())
+        f_numbers = np.array([pair[0][0] for pair in pairs], dtype=np.float64)
+        focal_lengths = np.array([pair[0][1] for pair in pairs], dtype=np.int64)
+        counts = np.array([pair[1] for pair in pairs], dtype=np.int64)
+        return f_numbers, focal_lengths, counts
+
+
+def subtract_counts(counts: Counter, removed: Counter):
+    """
+    出現回数から取り除いた分を減算する関数
+    0件になった値は削除し、取り除く前に一度も現れなかった場合と同じ状態にする
+    Args:
+        counts: 値と出現回数のCounter（更新される）
+        removed: 取り除く値と出現回数
+    """
+    counts.subtract(removed)
+    for value in [value for value, count in counts.items() if count <= 0]:
+        del counts[value]
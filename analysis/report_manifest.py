@@ -0,0 +1,141 @@
+import datetime
+import json
+import pathlib
+from typing import Optional
+
+import pandas as pd
+
+from photo.exif_table import COLUMN_CAPTURED_AT
+
+
+class ManifestError(Exception):
+    """
+    マニフェストの内容が不正であることを示す例外
+    """
+
+
+class ReportSpec:
+    """
+    バッチ出力する1レポート分の定義
+    """
+
+    def __init__(self, name: str, photo_dirs: list[str],
+                 start_date: Optional[datetime.date] = None, end_date: Optional[datetime.date] = None):
+        """
+        コンストラクタ
+        Args:
+            name: レポート名（PDFファイル名に使用）
+            photo_dirs: 分析対象フォルダ（絶対パス）
+            start_date: 撮影日の範囲の開始日（未指定の場合は制限なし）
+            end_date: 撮影日の範囲の終了日（当日を含む。未指定の場合は制限なし）
+        """
+        self.name = name
+        self.photo_dirs = photo_dirs
+        self.start_date = start_date
+        self.end_date = end_date
+        # レポートの集計に使用するフォルダ区画（partition_foldersで設定）
+        self.partitions: list[str] = []
+
+    def filter_period(self, photo_exifs: pd.DataFrame) -> pd.DataFrame:
+        """
+        撮影日の範囲外の行を除いたテーブルを返すメソッド
+        範囲が指定された場合、撮影日時が未記録の画像は除外する
+        Args:
+            photo_exifs: EXIF情報テーブル
+        Returns:
+            DataFrame: 範囲内のEXIF情報テーブル
+        """
+        if self.start_date is None and self.end_date is None:
+            return photo_exifs
+        captured_ats = photo_exifs[COLUMN_CAPTURED_AT]
+        mask = captured_ats.notna()
+        if self.start_date is not None:
+            mask &= captured_ats >= pd.Timestamp(self.start_date)
+        if self.end_date is not None:
+            mask &= captured_ats < pd.Timestamp(self.end_date) + pd.Timedelta(days=1)
+        return photo_exifs[mask.to_numpy()]
+
+
+def load_manifest(manifest_path: str) -> list[ReportSpec]:
+    """
+    バッチ出力のマニフェスト(JSON)を読み込む関数
+
+    形式:
+        {"reports": [
+            {"name": "2024_summer", "photo_dirs": ["C:\\\\photos\\\\2024"], "start": "2024-06-01", "end": "2024-08-31"},
+            {"name": "alice", "photo_dirs": ["C:\\\\photos\\\\alice"]}
+        ]}
+    Args:
+        manifest_path: マニフェストファイルパス
+    Returns:
+        list: レポート定義リスト
+    """
+    try:
+        with open(manifest_path, encoding="utf-8") as file:
+            manifest = json.load(file)
+    except (OSError, ValueError) as e:
+        raise ManifestError(f"マニフェストを読み込めません: {manifest_path} {e}") from e
+
+    base_dir = pathlib.Path(manifest_path).resolve().parent
+    report_specs = []
+    names = set()
+    for index, report in enumerate(manifest.get("reports", [])):
+        name = report.get("name") or f"report{index + 1}"
+        if name in names:
+            raise ManifestError(f"レポート名が重複しています: {name}")
+        names.add(name)
+        photo_dirs = report.get("photo_dirs", [])
+        if not photo_dirs:
+            raise ManifestError(f"分析対象フォルダが指定されていません: {name}")
+        report_specs.append(ReportSpec(
+            name=name,
+            # 相対パスはマニフェストのフォルダを基準にする
+            photo_dirs=[str((base_dir / photo_dir).resolve()) for photo_dir in photo_dirs],
+            start_date=parse_date(report.get("start"), name),
+            end_date=parse_date(report.get("end"), name),
+        ))
+    if not report_specs:
+        raise ManifestError(f"レポートが定義されていません: {manifest_path}")
+    return report_specs
+
+
+def parse_date(value: Optional[str], name: str) -> Optional[datetime.date]:
+    """
+    YYYY-MM-DD形式の日付を変換する関数
+    """
+    if value is None:
+        return None
+    try:
+        return datetime.date.fromisoformat(value)
+    except (TypeError, ValueError) as e:
+        raise ManifestError(f"日付の形式が不正です: {name} {value}") from e
+
+
+def partition_folders(report_specs: list[ReportSpec]) -> dict[str, list[str]]:
+    """
+    全レポートの分析対象フォルダを、重複なく走査できる区画に分割する関数
+    あるフォルダの中に別の対象フォルダがある場合、内側のフォルダは外側の区画から除外して
+    独立した区画とする。各画像はちょうど1つの区画に属するため、EXIF情報の読込は1回で済む
+    各レポート定義のpartitionsには、集計に使用する区画を設定する
+    Args:
+        report_specs: レポート定義リスト
+    Returns:
+        dict: 区画のフォルダパスと、走査から除外するサブフォルダパスリストのdict
+    """
+    folders = sorted({photo_dir for report_spec in report_specs for photo_dir in report_spec.photo_dirs})
+    nested = {folder: [other for other in folders if is_sub_folder(other, folder)] for folder in folders}
+
+    for report_spec in report_specs:
+        partitions = set()
+        for photo_dir in report_spec.photo_dirs:
+            partitions.add(photo_dir)
+            partitions.update(nested[photo_dir])
+        report_spec.partitions = sorted(partitions)
+    return nested
+
+
+def is_sub_folder(path: str, parent: str) -> bool:
+    """
+    pathがparentの配下のフォルダかを判定する関数
+    """
+    return path != parent and pathlib.Path(path).is_relative_to(parent)
@@ -0,0 +1,125 @@
+import datetime
+import json
+import os
+import pathlib
+import socket
+from typing import Optional, Tuple
+
+from analysis.report_aggregator import ReportAggregator
+from analysis.report_manifest import is_sub_folder
+
+
+# スナップショットの形式を変更した場合はインクリメントする
+SNAPSHOT_VERSION = 1
+
+
+class SnapshotError(Exception):
+    """
+    スナップショットを読み込めないことを示す例外
+    """
+
+
+def save_snapshot(snapshot_path: str, report_aggregator: ReportAggregator, sources: list[dict]):
+    """
+    集計値のスナップショットをJSONファイルへ保存する関数
+    一時ファイルへ書き込んでから置き換えるため、書込中に中断しても既存のスナップショットは壊れない
+    Args:
+        snapshot_path: スナップショットファイルパス
+        report_aggregator: レポート集計値
+        sources: 取り込み済みフォルダと取込日時のリスト
+    """
+    file_path = pathlib.Path(snapshot_path)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "sources": sources,
+        "aggregate": report_aggregator.to_dict(),
+    }
+    temp_path = file_path.with_name(file_path.name + ".tmp")
+    with open(temp_path, "w", encoding="utf-8") as file:
+        json.dump(snapshot, file, ensure_ascii=False)
+    os.replace(temp_path, file_path)
+
+
+def load_snapshot(snapshot_path: str) -> Tuple[ReportAggregator, list[dict]]:
+    """
+    スナップショットを読み込む関数
+    Args:
+        snapshot_path: スナップショットファイルパス
+    Returns:
+        tuple: (レポート集計値, 取り込み済みフォルダと取込日時のリスト)
+    """
+    try:
+        with open(snapshot_path, encoding="utf-8") as file:
+            snapshot = json.load(file)
+    except (OSError, ValueError) as e:
+        raise SnapshotError(f"スナップショットを読み込めません: {snapshot_path} {e}") from e
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        raise SnapshotError(
+            f"スナップショットの形式が異なります: {snapshot_path} (version={snapshot.get('version')})")
+    return ReportAggregator.from_dict(snapshot["aggregate"]), snapshot["sources"]
+
+
+def merge_snapshots(snapshot_paths: list[str]) -> Tuple[ReportAggregator, list[dict]]:
+    """
+    複数のスナップショット（シャード）を読み込み、集計値を合算する関数
+    集計値は加算・最小/最大で合成できるため、合算結果は全フォルダを一括で集計した結果と一致する
+    同じマシンの同じフォルダ、または一方が他方の配下にあるフォルダを含むスナップショットが複数ある場合は、
+    件数が重複するためエラーとする
+    Args:
+        snapshot_paths: スナップショットファイルパスリスト
+    Returns:
+        tuple: (合算後のレポート集計値, 全スナップショットの取り込み済みフォルダのリスト)
+    """
+    report_aggregator = ReportAggregator()
+    sources = []
+    # 各フォルダを含むスナップショットファイルパス（sourcesと同じ順）
+    source_snapshot_paths = []
+    for snapshot_path in snapshot_paths:
+        snapshot_aggregator, snapshot_sources = load_snapshot(snapshot_path)
+        for source in snapshot_sources:
+            ingested = find_overlapping_source(sources, source)
+            if ingested is not None:
+                raise SnapshotError(
+                    f"フォルダ '{source['path']}' と '{ingested['path']}' が重複しています: "
+                    f"{source_snapshot_paths[sources.index(ingested)]} {snapshot_path}")
+        report_aggregator.merge(snapshot_aggregator)
+        sources.extend(snapshot_sources)
+        source_snapshot_paths.extend([snapshot_path] * len(snapshot_sources))
+    return report_aggregator, sources
+
+
+def find_overlapping_source(sources: list[dict], source: dict) -> Optional[dict]:
+    """
+    取り込み済みフォルダのうち、指定フォルダと画像が重複するものを探す関数
+    同じマシンの同じフォルダに加え、一方が他方の配下にあるフォルダも重複とする
+    （別のマシンの同じパスは別のフォルダとして扱う）
+    Args:
+        sources: 取り込み済みフォルダのリスト
+        source: 確認するフォルダ（create_sourceの戻り値）
+    Returns:
+        dict: 重複する取り込み済みフォルダ（重複しない場合はNone）
+    """
+    for ingested in sources:
+        if ingested.get("host") != source.get("host"):
+            continue
+        if (ingested["path"] == source["path"] or is_sub_folder(ingested["path"], source["path"])
+                or is_sub_folder(source["path"], ingested["path"])):
+            return ingested
+    return None
+
+
+def create_source(source_path: str) -> dict:
+    """
+    取り込んだフォルダの記録を作成する関数
+    複数のマシンで作成したスナップショットを合算できるよう、マシン名も記録する
+    Args:
+        source_path: 取り込んだフォルダパス
+    Returns:
+        dict: マシン名・フォルダパス・取込日時
+    """
+    return {
+        "host": socket.gethostname(),
+        "path": str(pathlib.Path(source_path).resolve()),
+        "ingested_at": datetime.datetime.now().isoformat(timespec="seconds"),
+    }
@@ -0,0 +1,251 @@
+from collections import Counter
+from collections.abc import Mapping
+import heapq
+import itertools
+import math
+import random
+from typing import Iterable, Iterator, Optional, Tuple, TypeVar, Union
+
+
+T = TypeVar("T")
+
+# 95%信頼区間の係数
+CONFIDENCE_Z = 1.96
+# reservoir_sampleで抽出元の終端を示す値（抽出元のどの値とも一致しない）
+END_OF_VALUES = object()
+# 上位以外をまとめる項目名
+OTHERS_LABEL = "その他"
+
+
+class SpaceSavingSketch(Mapping):
+    """
+    Space-Savingアルゴリズムによる出現回数の近似カウンター
+    保持する値の種類をcapacity個までに制限するため、値の種類が多くてもメモリ使用量は一定になる
+    上限に達した後に新しい値が現れた場合は、最小件数の値を置き換えて件数を引き継ぐ
+    各値の件数は実際より多く数えることはあっても少なく数えることはなく、
+    多く数えた件数は最大でもtotal() / capacity件となる（errorで値ごとの上限を取得できる）
+    Counterと同じくupdate / items / most_common / totalで参照できる
+    """
+    # 保持する値の種類数の既定値
+    DEFAULT_CAPACITY = 100
+
+    def __init__(self, capacity: int):
+        """
+        コンストラクタ
+        Args:
+            capacity: 保持する値の種類数の上限
+        """
+        self.capacity = max(1, capacity)
+        # 値と件数（初出順）
+        self.counts: dict = {}
+        # 値と多く数えた可能性のある件数
+        self.errors: dict = {}
+        self.total_count = 0
+
+    def __getitem__(self, key) -> int:
+        return self.counts[key]
+
+    def __iter__(self) -> Iterator:
+        return iter(self.counts)
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def add(self, key, count: int = 1, error: int = 0):
+        """
+        値の件数を加算するメソッド
+        Args:
+            key: 値
+            count: 件数
+            error: 加算する件数に含まれる誤差（スケッチ同士を合算する場合に使用）
+        """
+        self.total_count += count
+        if key in self.counts:
+            self.counts[key] += count
+            self.errors[key] += error
+        elif len(self.counts) < self.capacity:
+            self.counts[key] = count
+            self.errors[key] = error
+        else:
+            # 最小件数の値を置き換え、その件数を誤差として引き継ぐ
+            min_key = min(self.counts, key=self.counts.__getitem__)
+            min_count = self.counts.pop(min_key)
+            self.errors.pop(min_key)
+            self.counts[key] = min_count + count
+            self.errors[key] = min_count + error
+
+    def update(self, values: Mapping):
+        """
+        値と件数のdict（またはスケッチ）の件数を加算するメソッド
+        Args:
+            values: 値と件数のdict、Counter、またはSpaceSavingSketch
+        """
+        if isinstance(values, SpaceSavingSketch):
+            for key, count in values.counts.items():
+                self.add(key, count, values.errors[key])
+            # 置き換えで失われた件数も総数には含める
+            self.total_count += values.total_count - sum(values.counts.values())
+            return
+        for key, count in values.items():
+            self.add(key, count)
+
+    def error(self, key) -> int:
+        """
+        値の件数に含まれる誤差の上限を取得するメソッド
+        """
+        return self.errors.get(key, 0)
+
+    def max_error(self) -> int:
+        """
+        全ての値のうち最大の誤差の上限を取得するメソッド
+        """
+        return max(self.errors.values(), default=0)
+
+    def total(self) -> int:
+        """
+        加算した件数の総数を取得するメソッド（置き換えられた値の件数を含む正確な値）
+        """
+        return self.total_count
+
+    def most_common(self, n: Optional[int] = None) -> list[Tuple]:
+        """
+        件数の多い順に値と件数を取得するメソッド（同数の場合は初出順）
+        Args:
+            n: 取得する件数（未指定時は全件）
+        Returns:
+            list: (値, 件数)のリスト
+        """
+        if n is None:
+            return sorted(self.counts.items(), key=lambda item: item[1], reverse=True)
+        return heapq.nlargest(n, self.counts.items(), key=lambda item: item[1])
+
+
+class BottomKSample:
+    """
+    優先度の小さい順にsample_size件の値を保持する無作為抽出（ボトムkサンプリング）
+    優先度に値のハッシュを使うと、抽出結果は値の集合のみで決まり、読込順や分割の仕方によらない
+    そのため、分割して抽出した結果を合算しても一括で抽出した結果と一致する
+    """
+
+    def __init__(self, sample_size: int):
+        """
+        コンストラクタ
+        Args:
+            sample_size: 保持する件数
+        """
+        self.sample_size = max(1, sample_size)
+        # (-優先度, 値)のヒープ（先頭は保持している中で最も優先度の大きい値）
+        self.heap: list[Tuple[int, object]] = []
+        # 保持している値（重複の確認をヒープの走査なしで行う）
+        self.values: set = set()
+
+    def add(self, priority: int, value):
+        """
+        値を追加するメソッド（保持している値より優先度が大きい場合は追加しない）
+        Args:
+            priority: 優先度
+            value: 値
+        """
+        if value in self.values:
+            return
+        item = (-priority, value)
+        if len(self.heap) < self.sample_size:
+            heapq.heappush(self.heap, item)
+        elif item > self.heap[0]:
+            _, evicted = heapq.heapreplace(self.heap, item)
+            self.values.discard(evicted)
+        else:
+            return
+        self.values.add(value)
+
+    def __contains__(self, value) -> bool:
+        return value in self.values
+
+    def update(self, other: "BottomKSample"):
+        """
+        別の抽出結果を合算するメソッド
+        Args:
+            other: 合算する抽出結果
+        """
+        for priority, value in other.items():
+            self.add(priority, value)
+
+    def items(self) -> list[Tuple[int, object]]:
+        """
+        保持している値を優先度の小さい順に取得するメソッド
+        Returns:
+            list: (優先度, 値)のリスト
+        """
+        return sorted((-negative_priority, value) for negative_priority, value in self.heap)
+
+
+def reservoir_sample(values: Iterable[T], sample_size: int,
+                     rng: Optional[random.Random] = None) -> Tuple[int, list[T]]:
+    """
+    件数が不明なイテラブルから、一様な無作為抽出を1回の走査で行う関数（リザーバーサンプリング）
+    保持するのは抽出件数分のみのため、全件のリストは作成しない
+    Args:
+        values: 抽出元のイテラブル（ジェネレータ可）
+        sample_size: 抽出件数
+        rng: 乱数生成器（未指定時は既定の乱数）
+    Returns:
+        tuple: (抽出元の件数, 抽出した値のリスト)
+    """
+    rng = rng or random.Random()
+    iterator = iter(values)
+    sample = list(itertools.islice(iterator, sample_size))
+    if len(sample) < sample_size:
+        return len(sample), sample
+
+    # Algorithm L: 次に置き換える位置までを幾何分布で読み飛ばす
+    population_count = sample_size
+    weight = math.exp(math.log(rng.random()) / sample_size)
+    while True:
+        skip = math.floor(math.log(rng.random()) / math.log(1 - weight))
+        skipped = sum(1 for _ in itertools.islice(iterator, skip))
+        population_count += skipped
+        if skipped < skip:
+            return population_count, sample
+        # 抽出元にNoneが含まれる場合があるため、終端は専用の値で判定する
+        value = next(iterator, END_OF_VALUES)
+        if value is END_OF_VALUES:
+            return population_count, sample
+        population_count += 1
+        sample[rng.randrange(sample_size)] = value
+        weight *= math.exp(math.log(rng.random()) / sample_size)
+
+
+def sampling_margin(sample_count: int, population_count: int) -> float:
+    """
+    無作為抽出した標本から求めた構成比の誤差（95%信頼区間の半幅）の最大値を求める関数
+    構成比が50%の場合に最大となり、有限母集団修正を適用する
+    Args:
+        sample_count: 標本の件数
+        population_count: 母集団の件数
+    Returns:
+        float: 構成比の誤差（0.01は±1ポイント）
+    """
+    if sample_count <= 0:
+        return 1.0
+    if population_count <= 1 or sample_count >= population_count:
+        return 0.0
+    correction = (population_count - sample_count) / (population_count - 1)
+    return CONFIDENCE_Z * math.sqrt(0.25 / sample_count * correction)
+
+
+def top_with_others(counts: Union[Counter, SpaceSavingSketch], top_count: int = 5) -> dict:
+    """
+    出現回数の上位のみ残し、残りを「その他」にまとめる関数
+    同数の場合は初出順を優先する
+    Args:
+        counts: 値と出現回数のCounter（またはSpaceSavingSketch）
+        top_count: 残す件数
+    Returns:
+        dict: 値と出現回数dict
+    """
+    # heapq.nlargestは同数の要素の順序を保つため、全件ソートせずに上位を取得できる
+    top_items = heapq.nlargest(top_count, counts.items(), key=lambda item: item[1])
+    chart_dict = dict(top_items)
+    # スケッチは保持していない値の出現回数も総数に含むため、total()から差し引く
+    chart_dict[OTHERS_LABEL] = max(0, counts.total() - sum(chart_dict.values()))
+    return chart_dict
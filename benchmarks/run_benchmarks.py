@@ -0,0 +1,210 @@
+import argparse
+import datetime
+import json
+import os
+import pathlib
+import platform
+import sys
+import tempfile
+import time
+from typing import Callable
+
+from benchmarks.synthetic_corpus import SyntheticCorpusGenerator
+
+
+class StageTimer:
+    """
+    処理段階ごとの所要時間を記録するクラス
+    """
+
+    def __init__(self):
+        """
+        コンストラクタ
+        """
+        self.stages: list[dict] = []
+
+    def measure(self, name: str, func: Callable, items: int | None = None, repeat: int = 1):
+        """
+        関数を実行して所要時間を記録するメソッド
+        repeatが2以上の場合は最短時間を記録する（短時間で終わる処理のばらつき対策）
+        Args:
+            name: 処理段階名
+            func: 計測する関数（引数なし）
+            items: 処理件数（件数/秒の算出に使用、未指定の場合は戻り値のlenを使用）
+            repeat: 実行回数
+        Returns:
+            object: 最後の実行での関数の戻り値
+        """
+        seconds = None
+        result = None
+        for _ in range(max(1, repeat)):
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+            seconds = elapsed if seconds is None else min(seconds, elapsed)
+        if items is None and hasattr(result, "__len__"):
+            items = len(result)
+        self.stages.append({
+            "name": name,
+            "seconds": seconds,
+            "items": items,
+            "items_per_second": items / seconds if items and seconds else None,
+        })
+        print(f"  {name}: {seconds:.3f}s" + (f" ({items}件)" if items is not None else ""), file=sys.stderr)
+        return result
+
+
+def prepare_corpus(corpus_root: pathlib.Path, scale: int, seed: int, profile: dict | None) -> tuple[pathlib.Path, dict | None]:
+    """
+    指定規模のベンチマーク用画像フォルダを用意する関数
+    作成済みの場合は再利用する（作成完了の目印ファイルで判定）
+    Args:
+        corpus_root: ベンチマーク用画像の保存先
+        scale: ファイル数
+        seed: 乱数シード
+        profile: 撮影傾向
+    Returns:
+        tuple: (画像フォルダ, 作成した場合は作成結果)
+    """
+    corpus_dir = corpus_root / f"{scale}_seed{seed}"
+    marker = corpus_dir / ".complete"
+    if marker.exists():
+        return corpus_dir, None
+    print(f"ベンチマーク用画像を作成しています：{corpus_dir}", file=sys.stderr)
+    start = time.perf_counter()
+    summary = SyntheticCorpusGenerator(profile, seed=seed).generate(str(corpus_dir), scale)
+    summary["seconds"] = time.perf_counter() - start
+    marker.write_text(json.dumps(summary), encoding="utf-8")
+    return corpus_dir, summary
+
+
+def run_scale(corpus_dir: pathlib.Path, args: argparse.Namespace) -> list[dict]:
+    """
+    1つの規模で各処理段階を計測する関数
+    Args:
+        corpus_dir: 画像フォルダ
+        args: コマンドライン引数の解析結果
+    Returns:
+        list: 処理段階ごとの計測結果
+    """
+    from analysis.report_aggregator import ReportAggregator
+    from chart.camera_bar_chart import GenerateCameraBarChart
+    from chart.chart_renderer import initialize_worker
+    from chart.f_and_focal_length_scatter_chart import GenerateFAndFocalLengthScatterChart
+    from chart.lens_bar_chart import GenerateLensBarChart
+    from generate_pdf import GeneratePdf
+
+    initialize_worker()
+    generate_pdf = GeneratePdf()
+    timer = StageTimer()
+
+    file_paths = timer.measure(
+        "collect_photo_files_path", lambda: list(generate_pdf.collect_photo_files_path(str(corpus_dir))))
+    photo_exifs = timer.measure(
+        "read_exif_data", lambda: generate_pdf.read_exif_data(
+            file_paths, workers=args.workers, chunk_size=args.chunk_size, cache_path=None))
+    if args.with_cache:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache_path = os.path.join(cache_dir, "exif_cache.sqlite3")
+            timer.measure(
+                "read_exif_data_cold_cache", lambda: generate_pdf.read_exif_data(
+                    file_paths, workers=args.workers, chunk_size=args.chunk_size, cache_path=cache_path))
+            timer.measure(
+                "read_exif_data_warm_cache", lambda: generate_pdf.read_exif_data(
+                    file_paths, workers=args.workers, chunk_size=args.chunk_size, cache_path=cache_path))
+
+    report_aggregator = timer.measure(
+        "aggregate", lambda: ReportAggregator().consume([photo_exifs]), items=len(photo_exifs))
+
+    camera_chart = GenerateCameraBarChart()
+    lens_chart = GenerateLensBarChart()
+    scatter_chart = GenerateFAndFocalLengthScatterChart()
+    timer.measure("extract_camera_info", lambda: camera_chart.extract_camera_info(report_aggregator),
+                  repeat=args.repeat)
+    timer.measure("extract_lens_info", lambda: lens_chart.extract_lens_info(report_aggregator),
+                  repeat=args.repeat)
+    timer.measure("extract_f_and_focal_length_info",
+                  lambda: scatter_chart.extract_f_and_focal_length_info(report_aggregator),
+                  items=len(report_aggregator.f_and_focal_length_counts), repeat=args.repeat)
+    timer.measure("camera_bar_chart.sub_routine", lambda: camera_chart.sub_routine(report_aggregator), items=1)
+    timer.measure("lens_bar_chart.sub_routine", lambda: lens_chart.sub_routine(report_aggregator), items=1)
+    timer.measure("f_and_focal_length_scatter_chart.sub_routine",
+                  lambda: scatter_chart.sub_routine(report_aggregator), items=1)
+
+    # PDFはベンチマーク用の一時フォルダへ出力し、レポート品質ごとに所要時間とファイルサイズを記録する
+    with tempfile.TemporaryDirectory() as output_dir:
+        generate_pdf.FILE_OUTPUT_PATH = output_dir
+        for quality in generate_pdf.QUALITY_PROFILES:
+            report_args = generate_pdf.parse_arguments(
+                ["generate_pdf.py", "--no-chart-cache", "--quality", quality])
+            doc, contents = timer.measure(
+                f"create_report_contents[{quality}]", lambda: generate_pdf.create_report_contents(
+                    report_aggregator, report_args, chart_workers=args.chart_workers), items=1)
+            timer.measure(f"doc.build[{quality}]", lambda: doc.build(contents), items=1)
+            timer.stages[-1]["pdf_bytes"] = os.path.getsize(doc.filename)
+    return timer.stages
+
+
+def main(argv: list[str]):
+    """
+    メインルーチン
+    Args:
+        argv: コマンドライン引数
+    """
+    parser = argparse.ArgumentParser(
+        prog=pathlib.Path(argv[0]).name if argv else None,
+        description="合成した画像ファイルで処理段階ごとの所要時間を計測します。")
+    parser.add_argument(
+        "--scales", type=int, nargs="+", default=[1000, 100000, 1000000],
+        help="計測するファイル数（複数指定可）")
+    parser.add_argument(
+        "--corpus-root", default="cache/bench_corpus", help="ベンチマーク用画像の保存先（作成済みの規模は再利用）")
+    parser.add_argument("--profile", default=None, help="撮影傾向の定義ファイル（JSON）")
+    parser.add_argument("--seed", type=int, default=0, help="乱数シード")
+    parser.add_argument("--workers", type=int, default=None, help="EXIF読込の並列プロセス数")
+    parser.add_argument("--chunk-size", type=int, default=64, help="1回のディスパッチでワーカーへ渡すファイル数")
+    parser.add_argument("--chart-workers", type=int, default=None, help="グラフ描画の並列プロセス数")
+    parser.add_argument("--repeat", type=int, default=5, help="短時間で終わる処理の計測回数（最短時間を記録）")
+    parser.add_argument("--with-cache", action="store_true", help="EXIF情報キャッシュ使用時の読込も計測する")
+    parser.add_argument("--output", default=None, help="計測結果の出力先（JSON、未指定時はout/benchmark_{日時}.json）")
+    args = parser.parse_args(argv[1:])
+
+    profile = None
+    if args.profile is not None:
+        with open(args.profile, encoding="utf-8") as file:
+            profile = json.load(file)
+
+    results = []
+    for scale in args.scales:
+        corpus_dir, generated = prepare_corpus(pathlib.Path(args.corpus_root), scale, args.seed, profile)
+        print(f"計測中：{scale}ファイル", file=sys.stderr)
+        results.append({
+            "scale": scale,
+            "corpus_dir": str(corpus_dir),
+            "corpus_generated": generated,
+            "stages": run_scale(corpus_dir, args),
+        })
+
+    report = {
+        "created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "options": {
+            "workers": args.workers,
+            "chunk_size": args.chunk_size,
+            "chart_workers": args.chart_workers,
+            "seed": args.seed,
+            "profile": args.profile,
+        },
+        "results": results,
+    }
+    output_path = pathlib.Path(args.output or pathlib.Path("out") / "benchmark_{}.json".format(
+        datetime.datetime.now().strftime("%Y%m%d_%H%M%S")))
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"計測結果を出力しました：{output_path}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
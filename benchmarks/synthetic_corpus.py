@@ -0,0 +1,394 @@
+import argparse
+import datetime
+import io
+import json
+import pathlib
+import random
+import struct
+import sys
+from typing import Optional
+
+
+# 既定の撮影傾向
+# 焦点距離は35mm換算値、f_minは開放F値
+DEFAULT_PROFILE = {
+    "cameras": [
+        {"make": "Canon", "model": "EOS R5", "weight": 18,
+         "lenses": ["RF24-70mm F2.8 L IS USM", "RF50mm F1.8 STM", "RF100-500mm F4.5-7.1 L IS USM"]},
+        {"make": "SONY", "model": "ILCE-7M4", "weight": 22,
+         "lenses": ["FE 35mm F1.8", "FE 24-105mm F4 G OSS", "FE 85mm F1.8"]},
+        {"make": "NIKON CORPORATION", "model": "NIKON Z 6", "weight": 12,
+         "lenses": ["NIKKOR Z 50mm f/1.8 S", "NIKKOR Z 24-70mm f/4 S"]},
+        {"make": "FUJIFILM", "model": "X-T4", "weight": 20,
+         "lenses": ["XF23mmF2 R WR", "XF16-55mmF2.8 R LM WR", "XF56mmF1.2 R"]},
+        {"make": "OLYMPUS", "model": "E-M1", "weight": 8,
+         "lenses": ["M.12-40mm F2.8", "M.40-150mm F2.8"]},
+        {"make": "Panasonic", "model": "DC-S5", "weight": 8,
+         "lenses": ["LUMIX S 50/F1.8", "LUMIX S 20-60/F3.5-5.6"]},
+        {"make": "RICOH", "model": "GR III", "weight": 12,
+         "lenses": ["GR LENS 18.3mm F2.8"]},
+    ],
+    "lenses": {
+        "RF24-70mm F2.8 L IS USM": {"focal_min": 24, "focal_max": 70, "f_min": 2.8},
+        "RF50mm F1.8 STM": {"focal_min": 50, "focal_max": 50, "f_min": 1.8},
+        "RF100-500mm F4.5-7.1 L IS USM": {"focal_min": 100, "focal_max": 500, "f_min": 4.5},
+        "FE 35mm F1.8": {"focal_min": 35, "focal_max": 35, "f_min": 1.8},
+        "FE 24-105mm F4 G OSS": {"focal_min": 24, "focal_max": 105, "f_min": 4.0},
+        "FE 85mm F1.8": {"focal_min": 85, "focal_max": 85, "f_min": 1.8},
+        "NIKKOR Z 50mm f/1.8 S": {"focal_min": 50, "focal_max": 50, "f_min": 1.8},
+        "NIKKOR Z 24-70mm f/4 S": {"focal_min": 24, "focal_max": 70, "f_min": 4.0},
+        "XF23mmF2 R WR": {"focal_min": 35, "focal_max": 35, "f_min": 2.0},
+        "XF16-55mmF2.8 R LM WR": {"focal_min": 24, "focal_max": 84, "f_min": 2.8},
+        "XF56mmF1.2 R": {"focal_min": 85, "focal_max": 85, "f_min": 1.2},
+        "M.12-40mm F2.8": {"focal_min": 24, "focal_max": 80, "f_min": 2.8},
+        "M.40-150mm F2.8": {"focal_min": 80, "focal_max": 300, "f_min": 2.8},
+        "LUMIX S 50/F1.8": {"focal_min": 50, "focal_max": 50, "f_min": 1.8},
+        "LUMIX S 20-60/F3.5-5.6": {"focal_min": 20, "focal_max": 60, "f_min": 3.5},
+        "GR LENS 18.3mm F2.8": {"focal_min": 28, "focal_max": 28, "f_min": 2.8},
+    },
+    # 選択可能なF値（開放F値以上のものから、開放に近いほど選ばれやすくする）
+    "f_stops": [1.2, 1.4, 1.8, 2.0, 2.8, 3.5, 4.0, 4.5, 5.6, 6.3, 7.1, 8.0, 11.0, 16.0, 22.0],
+    # 撮影期間
+    "date_start": "2015-01-01",
+    "date_end": "2025-12-31",
+    # 記録画素数（横×縦）
+    "image_size": [6000, 4000],
+    # 縦構図の割合（半数はOrientationで回転、残りは画素数の縦横を入れ替えて記録する）
+    "portrait_rate": 0.25,
+    # 撮影地のUTCとの時差
+    "utc_offset": "+09:00",
+    # TIFFファイルの割合
+    "tiff_ratio": 0.05,
+    # EXIF（IFD1）にサムネイルを埋め込むJPEGファイルの割合
+    "thumbnail_rate": 0.9,
+    # 各タグ（メーカー・機種以外）が記録されていない割合
+    "missing_rate": 0.03,
+    # タグの値またはファイルが破損している割合
+    "corrupt_rate": 0.005,
+}
+
+# TIFFフィールドタイプ
+TYPE_ASCII = 2
+TYPE_SHORT = 3
+TYPE_LONG = 4
+TYPE_RATIONAL = 5
+
+# タグID
+TAG_MAKE = 0x010F
+TAG_MODEL = 0x0110
+TAG_ORIENTATION = 0x0112
+TAG_COMPRESSION = 0x0103
+TAG_JPEG_INTERCHANGE_FORMAT = 0x0201
+TAG_JPEG_INTERCHANGE_FORMAT_LENGTH = 0x0202
+TAG_EXIF_IFD_POINTER = 0x8769
+TAG_F_NUMBER = 0x829D
+TAG_DATE_TIME_ORIGINAL = 0x9003
+TAG_OFFSET_TIME_ORIGINAL = 0x9011
+TAG_SUB_SEC_TIME_ORIGINAL = 0x9291
+TAG_EXIF_IMAGE_WIDTH = 0xA002
+TAG_EXIF_IMAGE_LENGTH = 0xA003
+TAG_FOCAL_LENGTH_IN_35MM_FILM = 0xA405
+TAG_LENS_MODEL = 0xA434
+
+
+def encode_entry(field_type: int, value) -> tuple[int, bytes]:
+    """
+    IFDエントリの値をバイト列に変換する関数
+    Returns:
+        tuple: (値の個数, 値のバイト列)
+    """
+    if field_type == TYPE_ASCII:
+        payload = value.encode("ascii") + b"\x00"
+        return len(payload), payload
+    if field_type == TYPE_SHORT:
+        return 1, struct.pack("<H", value)
+    if field_type == TYPE_LONG:
+        return 1, struct.pack("<I", value)
+    return 1, struct.pack("<II", *value)
+
+
+def encode_ifd(entries: list[tuple], data_offset: int) -> tuple[bytes, bytes]:
+    """
+    IFDをバイト列に変換する関数
+    4バイトに収まらない値はデータ領域に配置する
+    Args:
+        entries: (タグID, フィールドタイプ, 値)のリスト
+        data_offset: データ領域のTIFF先頭からのオフセット
+    Returns:
+        tuple: (IFDのバイト列, データ領域のバイト列)
+    """
+    ifd = bytearray(struct.pack("<H", len(entries)))
+    data = bytearray()
+    for tag, field_type, value in sorted(entries, key=lambda entry: entry[0]):
+        count, payload = encode_entry(field_type, value)
+        if len(payload) <= 4:
+            ifd += struct.pack("<HHI", tag, field_type, count) + payload.ljust(4, b"\x00")
+        else:
+            ifd += struct.pack("<HHII", tag, field_type, count, data_offset + len(data))
+            data += payload
+            if len(data) % 2:
+                data += b"\x00"
+    ifd += struct.pack("<I", 0)
+    return bytes(ifd), bytes(data)
+
+
+def build_tiff_block(ifd0_entries: list[tuple], exif_entries: list[tuple],
+                     thumbnail: Optional[bytes] = None) -> bytes:
+    """
+    IFD0とEXIF IFDを持つTIFF形式のバイト列を作成する関数（リトルエンディアン）
+    Args:
+        ifd0_entries: IFD0のエントリ
+        exif_entries: EXIF IFDのエントリ
+        thumbnail: IFD1に埋め込むサムネイルのJPEGデータ（未指定時はIFD1なし）
+    Returns:
+        bytes: TIFF形式のバイト列
+    """
+    ifd0_size = 2 + 12 * (len(ifd0_entries) + 1) + 4
+    exif_ifd_offset = 8 + ifd0_size
+    exif_ifd_size = 2 + 12 * len(exif_entries) + 4
+    ifd0, ifd0_data = encode_ifd(
+        ifd0_entries + [(TAG_EXIF_IFD_POINTER, TYPE_LONG, exif_ifd_offset)],
+        exif_ifd_offset + exif_ifd_size)
+    exif_ifd, exif_data = encode_ifd(
+        exif_entries, exif_ifd_offset + exif_ifd_size + len(ifd0_data))
+    block = b"II*\x00" + struct.pack("<I", 8) + ifd0 + exif_ifd + ifd0_data + exif_data
+    if thumbnail is None:
+        return block
+
+    # IFD1とサムネイルはデータ領域の後ろに置き、IFD0の次のIFDへのオフセットを書き換える
+    ifd1_offset = len(block)
+    ifd1_size = 2 + 12 * 3 + 4
+    ifd1, _ = encode_ifd([
+        (TAG_COMPRESSION, TYPE_SHORT, 6),  # JPEG圧縮
+        (TAG_JPEG_INTERCHANGE_FORMAT, TYPE_LONG, ifd1_offset + ifd1_size),
+        (TAG_JPEG_INTERCHANGE_FORMAT_LENGTH, TYPE_LONG, len(thumbnail)),
+    ], ifd1_offset + ifd1_size)
+    next_ifd_position = 8 + ifd0_size - 4
+    block = block[:next_ifd_position] + struct.pack("<I", ifd1_offset) + block[next_ifd_position + 4:]
+    return block + ifd1 + thumbnail
+
+
+def build_jpeg(ifd0_entries: list[tuple], exif_entries: list[tuple], jpeg_body: bytes,
+               thumbnail: Optional[bytes] = None) -> bytes:
+    """
+    EXIF(APP1)付きのJPEGファイルのバイト列を作成する関数
+    Args:
+        ifd0_entries: IFD0のエントリ
+        exif_entries: EXIF IFDのエントリ
+        jpeg_body: SOIを除いたJPEG画像データ
+        thumbnail: IFD1に埋め込むサムネイルのJPEGデータ（未指定時はサムネイルなし）
+    Returns:
+        bytes: JPEGファイルのバイト列
+    """
+    app1 = b"Exif\x00\x00" + build_tiff_block(ifd0_entries, exif_entries, thumbnail)
+    return b"\xff\xd8\xff\xe1" + struct.pack(">H", len(app1) + 2) + app1 + jpeg_body
+
+
+def build_tiff(ifd0_entries: list[tuple], exif_entries: list[tuple]) -> bytes:
+    """
+    1x1ピクセル(グレースケール)のTIFFファイルのバイト列を作成する関数
+    Args:
+        ifd0_entries: IFD0のエントリ
+        exif_entries: EXIF IFDのエントリ
+    Returns:
+        bytes: TIFFファイルのバイト列
+    """
+    image_entries = [
+        (0x0100, TYPE_SHORT, 1),  # ImageWidth
+        (0x0101, TYPE_SHORT, 1),  # ImageLength
+        (0x0102, TYPE_SHORT, 8),  # BitsPerSample
+        (0x0103, TYPE_SHORT, 1),  # Compression（無圧縮）
+        (0x0106, TYPE_SHORT, 1),  # PhotometricInterpretation
+        (0x0115, TYPE_SHORT, 1),  # SamplesPerPixel
+        (0x0116, TYPE_SHORT, 1),  # RowsPerStrip
+        (0x0117, TYPE_LONG, 1),  # StripByteCounts
+    ]
+    # 画素データはIFDの後ろに置くため、オフセットを求めてから作り直す
+    block = build_tiff_block(ifd0_entries + image_entries + [(0x0111, TYPE_LONG, 0)], exif_entries)
+    block = build_tiff_block(
+        ifd0_entries + image_entries + [(0x0111, TYPE_LONG, len(block))], exif_entries)
+    return block + b"\x80"
+
+
+def create_jpeg_body() -> bytes:
+    """
+    EXIFを持たない8x8ピクセルのJPEG画像データ（SOIを除く）を作成する関数
+    """
+    from PIL import Image
+
+    buf = io.BytesIO()
+    Image.new("RGB", (8, 8), (128, 128, 128)).save(buf, format="JPEG", quality=50)
+    return buf.getvalue()[2:]
+
+
+def create_thumbnail(color: tuple[int, int, int]) -> bytes:
+    """
+    EXIFに埋め込む160x120ピクセルのサムネイル（JPEG）を作成する関数
+    Args:
+        color: 塗りつぶす色（RGB）
+    """
+    from PIL import Image, ImageDraw
+
+    image = Image.new("RGB", (160, 120), color)
+    # 向きが分かるよう上部に帯を描く
+    ImageDraw.Draw(image).rectangle((0, 0, 159, 19), fill=(255, 255, 255))
+    buf = io.BytesIO()
+    image.save(buf, format="JPEG", quality=75)
+    return buf.getvalue()
+
+
+class SyntheticCorpusGenerator:
+    """
+    ベンチマーク用の画像ファイル群を作成するクラス
+    撮影傾向（プロファイル）に従ってEXIFタグを乱数で決め、ヘッダーを直接組み立てて書き込む
+    画像のエンコードは行わないため、100万ファイル規模でも短時間で作成できる
+    """
+
+    def __init__(self, profile: Optional[dict] = None, seed: int = 0):
+        """
+        コンストラクタ
+        Args:
+            profile: 撮影傾向（未指定の項目は既定値を使用）
+            seed: 乱数シード
+        """
+        self.profile = {**DEFAULT_PROFILE, **(profile or {})}
+        self.random = random.Random(seed)
+        self.jpeg_body = create_jpeg_body()
+        cameras = self.profile["cameras"]
+        # サムネイルはメーカーごとに色を変える
+        self.thumbnails = {
+            camera["make"]: create_thumbnail((
+                (80 + index * 70) % 256, (160 + index * 110) % 256, (40 + index * 150) % 256))
+            for index, camera in enumerate(cameras)}
+        self.camera_weights = [camera["weight"] for camera in cameras]
+        self.date_start = datetime.datetime.fromisoformat(self.profile["date_start"])
+        self.date_range_seconds = int((datetime.datetime.fromisoformat(
+            self.profile["date_end"]) + datetime.timedelta(days=1) - self.date_start).total_seconds())
+
+    def generate(self, output_dir: str, file_count: int) -> dict:
+        """
+        画像ファイルを作成するメソッド
+        撮影日ごとのフォルダ（{年}/{年-月-日}）に配置する
+        Args:
+            output_dir: 出力先フォルダ
+            file_count: 作成するファイル数
+        Returns:
+            dict: 作成したファイル数の内訳
+        """
+        output_path = pathlib.Path(output_dir)
+        created_dirs = set()
+        summary = {"files": 0, "jpeg": 0, "tiff": 0, "bytes": 0, "corrupt": 0}
+        for index in range(file_count):
+            captured_at = self.date_start + datetime.timedelta(
+                seconds=self.random.randrange(self.date_range_seconds))
+            ifd0_entries, exif_entries, corrupt = self.create_entries(captured_at)
+            is_tiff = self.random.random() < self.profile["tiff_ratio"]
+            if is_tiff:
+                data = build_tiff(ifd0_entries, exif_entries)
+                file_name = f"IMG_{index:07d}.tiff"
+            else:
+                thumbnail = None
+                if self.random.random() < self.profile["thumbnail_rate"]:
+                    thumbnail = self.thumbnails[dict((tag, value) for tag, _, value in ifd0_entries)[TAG_MAKE]]
+                data = build_jpeg(ifd0_entries, exif_entries, self.jpeg_body, thumbnail)
+                file_name = f"IMG_{index:07d}.jpg"
+            # 破損ファイル：ヘッダーの途中で切れたファイル
+            if corrupt == "truncated":
+                data = data[:self.random.randrange(12, 64)]
+
+            folder = output_path / f"{captured_at:%Y}" / f"{captured_at:%Y-%m-%d}"
+            if folder not in created_dirs:
+                folder.mkdir(parents=True, exist_ok=True)
+                created_dirs.add(folder)
+            (folder / file_name).write_bytes(data)
+
+            summary["files"] += 1
+            summary["tiff" if is_tiff else "jpeg"] += 1
+            summary["bytes"] += len(data)
+            summary["corrupt"] += corrupt is not None
+        return summary
+
+    def create_entries(self, captured_at: datetime.datetime) -> tuple[list, list, Optional[str]]:
+        """
+        1ファイル分のIFD0とEXIF IFDのエントリを作成するメソッド
+        Args:
+            captured_at: 撮影日時
+        Returns:
+            tuple: (IFD0のエントリ, EXIF IFDのエントリ, 破損の種類)
+        """
+        rng = self.random
+        camera = rng.choices(self.profile["cameras"], weights=self.camera_weights)[0]
+        lens_name = rng.choice(camera["lenses"])
+        lens = self.profile["lenses"][lens_name]
+        focal_length = lens["focal_min"]
+        if lens["focal_max"] > lens["focal_min"]:
+            # ズームレンズは両端が選ばれやすい
+            focal_length = rng.choice([
+                lens["focal_min"], lens["focal_max"],
+                rng.randint(lens["focal_min"], lens["focal_max"])])
+        f_stops = [f_stop for f_stop in self.profile["f_stops"] if f_stop >= lens["f_min"]]
+        f_number = rng.choices(f_stops, weights=[1 / (rank + 1) for rank in range(len(f_stops))])[0]
+
+        # 縦構図はOrientation（6: 90度回転）または画素数の縦横の入れ替えで記録する
+        width, height = self.profile["image_size"]
+        orientation = 1
+        if rng.random() < self.profile["portrait_rate"]:
+            if rng.random() < 0.5:
+                orientation = 6
+            else:
+                width, height = height, width
+
+        ifd0_entries = [
+            (TAG_MAKE, TYPE_ASCII, camera["make"]),
+            (TAG_MODEL, TYPE_ASCII, camera["model"]),
+            (TAG_ORIENTATION, TYPE_SHORT, orientation),
+        ]
+        exif_entries = {
+            TAG_F_NUMBER: (TYPE_RATIONAL, (round(f_number * 10), 10)),
+            TAG_DATE_TIME_ORIGINAL: (TYPE_ASCII, captured_at.strftime("%Y:%m:%d %H:%M:%S")),
+            TAG_OFFSET_TIME_ORIGINAL: (TYPE_ASCII, self.profile["utc_offset"]),
+            TAG_SUB_SEC_TIME_ORIGINAL: (TYPE_ASCII, f"{rng.randrange(100):02d}"),
+            TAG_FOCAL_LENGTH_IN_35MM_FILM: (TYPE_SHORT, focal_length),
+            TAG_LENS_MODEL: (TYPE_ASCII, lens_name),
+            TAG_EXIF_IMAGE_WIDTH: (TYPE_LONG, width),
+            TAG_EXIF_IMAGE_LENGTH: (TYPE_LONG, height),
+        }
+        for tag in list(exif_entries):
+            if rng.random() < self.profile["missing_rate"]:
+                del exif_entries[tag]
+
+        corrupt = None
+        if rng.random() < self.profile["corrupt_rate"]:
+            corrupt = rng.choice(["zero_denominator", "invalid_date", "truncated"])
+            if corrupt == "zero_denominator":
+                exif_entries[TAG_F_NUMBER] = (TYPE_RATIONAL, (28, 0))
+            elif corrupt == "invalid_date":
+                exif_entries[TAG_DATE_TIME_ORIGINAL] = (TYPE_ASCII, "0000:00:00 00:00:00")
+        return ifd0_entries, [(tag, *entry) for tag, entry in exif_entries.items()], corrupt
+
+
+def main(argv: list[str]):
+    """
+    メインルーチン
+    Args:
+        argv: コマンドライン引数
+    """
+    parser = argparse.ArgumentParser(
+        prog=pathlib.Path(argv[0]).name if argv else None,
+        description="ベンチマーク用にEXIF付きの画像ファイルを作成します。")
+    parser.add_argument("output_dir", help="出力先フォルダ")
+    parser.add_argument("file_count", type=int, help="作成するファイル数")
+    parser.add_argument("--profile", default=None, help="撮影傾向の定義ファイル（JSON、未指定の項目は既定値）")
+    parser.add_argument("--seed", type=int, default=0, help="乱数シード")
+    args = parser.parse_args(argv[1:])
+
+    profile = None
+    if args.profile is not None:
+        with open(args.profile, encoding="utf-8") as file:
+            profile = json.load(file)
+    summary = SyntheticCorpusGenerator(profile, seed=args.seed).generate(args.output_dir, args.file_count)
+    print(json.dumps(summary, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,126 @@
+import hashlib
+import itertools
+import json
+import os
+import pathlib
+from typing import Optional
+
+
+# 描画処理を変更した場合はインクリメントする（既存のキャッシュを無効にする）
+RENDERER_VERSION = 2
+
+
+def to_json_value(value):
+    """
+    json.dumpsで扱えない値を変換する関数
+    """
+    import numpy as np
+
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class ChartCache:
+    """
+    描画済みグラフ画像のキャッシュクラス
+    集計済みデータ・描画パラメータ・描画処理のバージョンから求めたハッシュをキーに、
+    画像を出力形式の拡張子のファイルとして保存する。合計サイズが上限を超えた場合は参照が古い順に削除する
+    """
+    # 出力形式ごとのキャッシュファイルの拡張子
+    IMAGE_EXTENSIONS = {"png": ".png", "jpeg": ".jpg"}
+    # キャッシュフォルダ
+    DEFAULT_CACHE_DIR = "cache/charts"
+    # キャッシュの合計サイズ上限（バイト）
+    DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        コンストラクタ
+        Args:
+            cache_dir: キャッシュフォルダ
+            max_bytes: キャッシュの合計サイズ上限（バイト）
+        """
+        self.cache_dir = pathlib.Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+    def make_key(self, chart_class: type, method_name: str, chart_params: dict, chart_data) -> str:
+        """
+        キャッシュキーを作成するメソッド
+        Args:
+            chart_class: グラフ生成クラス
+            method_name: 描画メソッド名
+            chart_params: 描画パラメータ
+            chart_data: 集計済みデータ
+        Returns:
+            str: キャッシュキー（SHA-256に出力形式の拡張子を付けたキャッシュファイル名）
+        """
+        payload = json.dumps({
+            "renderer_version": RENDERER_VERSION,
+            "chart": f"{chart_class.__module__}.{chart_class.__qualname__}.{method_name}",
+            "params": chart_params,
+            "data": chart_data,
+        }, sort_keys=True, ensure_ascii=False, default=to_json_value)
+        extension = self.IMAGE_EXTENSIONS[chart_params.get("image_format", "png")]
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest() + extension
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        キャッシュ済みの画像を取得するメソッド
+        Args:
+            key: キャッシュキー
+        Returns:
+            bytes: 画像データ（未登録の場合はNone）
+        """
+        file_path = self.cache_dir / key
+        try:
+            image = file_path.read_bytes()
+        except OSError:
+            return None
+        # 参照日時として更新日時を更新する（LRUの判定に使用）
+        os.utime(file_path)
+        return image
+
+    def put(self, key: str, image: bytes):
+        """
+        画像をキャッシュへ登録するメソッド
+        Args:
+            key: キャッシュキー
+            image: 画像データ
+        """
+        file_path = self.cache_dir / key
+        temp_path = self.cache_dir / f"{key}.tmp"
+        temp_path.write_bytes(image)
+        os.replace(temp_path, file_path)
+        self.evict()
+
+    def evict(self):
+        """
+        合計サイズが上限を超えている場合、参照が古い画像から削除するメソッド
+        """
+        entries = []
+        total_bytes = 0
+        file_paths = itertools.chain.from_iterable(
+            self.cache_dir.glob(f"*{extension}") for extension in self.IMAGE_EXTENSIONS.values())
+        for file_path in file_paths:
+            try:
+                stat = file_path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, file_path))
+            total_bytes += stat.st_size
+        if total_bytes <= self.max_bytes:
+            return
+
+        entries.sort()
+        for _, size, file_path in entries:
+            if total_bytes <= self.max_bytes:
+                break
+            try:
+                file_path.unlink()
+            except OSError:
+                continue
+            total_bytes -= size
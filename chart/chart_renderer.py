@@ -0,0 +1,141 @@
+from concurrent.futures import Future, ProcessPoolExecutor
+import io
+from typing import Optional
+
+import matplotlib
+
+from chart.chart_cache import ChartCache
+
+
+def initialize_worker():
+    """
+    描画プロセスの初期化関数
+    GUIを持たないAggバックエンドを使用する
+    """
+    matplotlib.use("Agg")
+
+
+def render_chart(chart_class: type, method_name: str, chart_data, chart_params: Optional[dict] = None) -> bytes:
+    """
+    グラフを1つ描画し、画像のバイト列を返す関数
+    プロセスプールからも呼び出すため、モジュール直下に定義する
+    Args:
+        chart_class: グラフ生成クラス
+        method_name: 描画メソッド名
+        chart_data: 描画メソッドへ渡す集計済みデータ
+        chart_params: 既定値から変更する描画パラメータ
+    Returns:
+        bytes: 画像データ
+    """
+    chart = create_chart(chart_class, chart_params)
+    buf = getattr(chart, method_name)(chart_data)
+    return buf.getvalue()
+
+
+def create_chart(chart_class: type, chart_params: Optional[dict] = None):
+    """
+    グラフ生成クラスを生成し、描画パラメータを反映する関数
+    Args:
+        chart_class: グラフ生成クラス
+        chart_params: 既定値から変更する描画パラメータ
+    Returns:
+        object: グラフ生成クラスのインスタンス
+    """
+    chart = chart_class()
+    for name, value in (chart_params or {}).items():
+        setattr(chart, name, value)
+    return chart
+
+
+class ChartRenderer:
+    """
+    グラフ描画クラス
+    複数のグラフをプロセスプールで同時に描画し、Futureで結果を受け取る
+    キャッシュが有効な場合、入力が同じグラフは描画せずにキャッシュの画像を返す
+    """
+
+    def __init__(self, workers: Optional[int] = None, chart_cache: Optional[ChartCache] = None):
+        """
+        コンストラクタ
+        Args:
+            workers: 描画プロセス数（1の場合は呼び出し元プロセスで逐次描画）
+            chart_cache: グラフ画像キャッシュ（未指定時は毎回描画）
+        """
+        self.workers = workers
+        self.chart_cache = chart_cache
+        self.executor: Optional[ProcessPoolExecutor] = None
+        if workers is None or workers > 1:
+            self.executor = ProcessPoolExecutor(
+                max_workers=workers, initializer=initialize_worker)
+
+    def __enter__(self) -> "ChartRenderer":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+    def submit(self, chart_class: type, method_name: str, chart_data, chart_params: Optional[dict] = None) -> Future:
+        """
+        グラフの描画を依頼するメソッド
+        Args:
+            chart_class: グラフ生成クラス
+            method_name: 描画メソッド名
+            chart_data: 描画メソッドへ渡す集計済みデータ
+            chart_params: 既定値から変更する描画パラメータ
+        Returns:
+            Future: 画像データ(bytes)を返すFuture
+        """
+        cache_key = None
+        if self.chart_cache is not None:
+            cache_key = self.chart_cache.make_key(
+                chart_class, method_name, create_chart(chart_class, chart_params).chart_params(), chart_data)
+            image = self.chart_cache.get(cache_key)
+            if image is not None:
+                future = Future()
+                future.set_result(image)
+                return future
+
+        if self.executor is not None:
+            future = self.executor.submit(
+                render_chart, chart_class, method_name, chart_data, chart_params)
+        else:
+            future = Future()
+            try:
+                future.set_result(render_chart(
+                    chart_class, method_name, chart_data, chart_params))
+            except Exception as e:
+                future.set_exception(e)
+
+        if cache_key is not None:
+            future.add_done_callback(
+                lambda done: self.store_cache(cache_key, done))
+        return future
+
+    def store_cache(self, cache_key: str, future: Future):
+        """
+        描画結果をキャッシュへ登録するメソッド
+        Args:
+            cache_key: キャッシュキー
+            future: 描画済みのFuture
+        """
+        if future.exception() is None:
+            self.chart_cache.put(cache_key, future.result())
+
+    def shutdown(self):
+        """
+        描画プロセスを終了するメソッド
+        """
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+
+def to_image_buffer(future: Future) -> io.BytesIO:
+    """
+    描画結果をreportlabへ渡せるバッファに変換する関数
+    Args:
+        future: ChartRenderer.submitの戻り値
+    Returns:
+        BytesIO: 画像データ
+    """
+    return io.BytesIO(future.result())
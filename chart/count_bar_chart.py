@@ -0,0 +1,131 @@
+from logging import getLogger
+import io
+from matplotlib.colors import to_hex
+from matplotlib.figure import Figure
+import matplotlib_fontja
+from reportlab.graphics.charts.barcharts import HorizontalBarChart
+from reportlab.graphics.shapes import Drawing
+from reportlab.lib import colors
+
+
+class GenerateCountBarChart:
+    """
+    分析項目（analysis.analysis_registry）の件数を棒グラフで作成するクラス
+    値の数が多い場合は、棒1本あたりの高さを保つようにグラフを縦に伸ばす
+    """
+    a4 = (8.27, 11.69)  # A4サイズのインチ数
+    mm = 0.0393701  # インチからmmへの変換係数
+    figsize = (a4[0] - (40*mm), (a4[1] - (40*mm))/5)  # グラフサイズ（インチ）
+    bar_height = 0.22  # 棒1本あたりの最小の高さ（インチ）
+    dpi = 350  # 出力解像度
+    image_format = "png"  # 出力形式（png: 可逆圧縮、jpeg: 非可逆圧縮で小さく高速）
+    jpeg_quality = 90  # JPEG出力時の画質
+    bar_colors = ["tab:red", "tab:blue", "tab:green",
+                  "tab:orange", "tab:purple", "tab:brown"]  # 棒の色（値の数が多い場合は繰り返す）
+
+    logger = getLogger(__name__)
+
+    def chart_params(self) -> dict:
+        """
+        描画結果に影響するパラメータを取得するメソッド（グラフキャッシュのキーに使用）
+        """
+        return {
+            "figsize": self.figsize,
+            "bar_height": self.bar_height,
+            "dpi": self.dpi,
+            "image_format": self.image_format,
+            "jpeg_quality": self.jpeg_quality,
+            "bar_colors": self.bar_colors,
+        }
+
+    def chart_height(self, bar_count: int) -> float:
+        """
+        棒の数に応じたグラフの高さ（インチ）を取得するメソッド
+        Args:
+            bar_count: 棒の数
+        Returns:
+            float: グラフの高さ
+        """
+        return max(self.figsize[1], self.bar_height * bar_count + 0.6)
+
+    def create_count_bar_chart(self, count_dict: dict) -> io.BytesIO:
+        """
+        値ごとの件数を棒グラフで表示するメソッド
+        Args:
+            count_dict: ラベルと件数dict（表示順）
+        Return:
+            buf: 画像データ
+        """
+        labels = list(count_dict.keys())
+        data = list(count_dict.values())
+
+        fig = Figure(
+            layout="constrained",
+            figsize=(self.figsize[0], self.chart_height(len(labels))), dpi=self.dpi)
+        ax = fig.subplots()
+
+        bar_colors = [self.bar_colors[index % len(self.bar_colors)] for index in range(len(data))]
+        bar = ax.barh(labels, data, color=bar_colors, zorder=2)
+        # バー内部のラベル色を白に変更し、最前面に配置
+        ax.bar_label(bar, color="white", label_type="center",
+                     fontsize=10, zorder=3)
+        ax.tick_params(axis="y", labelsize=8)
+        # グリッド線を有効にし、最背面に配置
+        ax.grid(axis='x', linestyle='--', zorder=0, alpha=0.5)
+        # 上から表示順に並べる
+        ax.invert_yaxis()
+
+        # 画像出力
+        buf = io.BytesIO()
+        fig.savefig(buf, format=self.image_format,
+                    pil_kwargs={"quality": self.jpeg_quality} if self.image_format == "jpeg" else None)
+        buf.seek(0)
+        return buf
+
+    def create_count_bar_drawing(self, count_dict: dict, width: float, font_name: str) -> Drawing:
+        """
+        値ごとの件数の棒グラフをreportlabのベクター図形で作成するメソッド
+        Args:
+            count_dict: ラベルと件数dict（表示順）
+            width: 描画幅（ポイント）
+            font_name: ラベルのフォント名
+        Return:
+            Drawing: 棒グラフ
+        """
+        labels = list(count_dict.keys())
+        data = list(count_dict.values())
+        height = width * self.chart_height(len(labels)) / self.figsize[0]
+        drawing = Drawing(width, height)
+
+        chart = HorizontalBarChart()
+        # ラベル領域を左側に確保する
+        chart.x = width * 0.3
+        chart.y = 20
+        chart.width = width * 0.67
+        chart.height = height - 30
+        chart.data = [data]
+        chart.categoryAxis.categoryNames = labels
+        # 上から順に並べる
+        chart.categoryAxis.reverseDirection = 1
+        chart.categoryAxis.labels.fontName = font_name
+        chart.categoryAxis.labels.fontSize = 6
+        chart.categoryAxis.labels.boxAnchor = "e"
+        chart.valueAxis.valueMin = 0
+        chart.valueAxis.labels.fontName = font_name
+        chart.valueAxis.labels.fontSize = 6
+        # グリッド線を有効にする
+        chart.valueAxis.visibleGrid = 1
+        chart.valueAxis.gridStrokeDashArray = (2, 2)
+        chart.valueAxis.gridStrokeColor = colors.lightgrey
+        chart.bars.strokeColor = None
+        for index in range(len(data)):
+            bar_color = self.bar_colors[index % len(self.bar_colors)]
+            chart.bars[(0, index)].fillColor = colors.HexColor(to_hex(bar_color))
+        # バー内部に白文字で件数を表示する
+        chart.barLabelFormat = "%d"
+        chart.barLabels.boxTarget = "mid"
+        chart.barLabels.fillColor = colors.white
+        chart.barLabels.fontName = font_name
+        chart.barLabels.fontSize = 7
+        drawing.add(chart)
+        return drawing
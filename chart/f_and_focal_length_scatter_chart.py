@@ -1,86 +1,266 @@
-from logging import getLogger, INFO, DEBUG, Formatter, FileHandler
+from logging import getLogger
 import io
-from matplotlib import pyplot
+from typing import Tuple
+from matplotlib.figure import Figure
+from matplotlib.colors import LogNorm, to_hex, to_rgba
 from matplotlib.ticker import FixedLocator, MultipleLocator
 import matplotlib_fontja
+import numpy as np
+from reportlab.graphics.charts.axes import XValueAxis, YValueAxis
+from reportlab.graphics.shapes import Circle, Drawing, Group, String
+from reportlab.lib import colors
+
+from analysis.report_aggregator import ReportAggregator
 
 
 class GenerateFAndFocalLengthScatterChart:
     a4 = (8.27, 11.69)  # A4サイズのインチ数
     mm = 0.0393701  # インチからmmへの変換係数
+    figsize = (a4[0] - (40*mm), (a4[1] - (40*mm))/4)  # グラフサイズ（インチ）
+    dpi = 350  # 出力解像度
+    image_format = "png"  # 出力形式（png: 可逆圧縮、jpeg: 非可逆圧縮で小さく高速）
+    jpeg_quality = 90  # JPEG出力時の画質
+    marker_color = "tab:blue"  # 点の色
+    # F値の目盛りは文字が重ならない程度に間引く
+    x_labels = [1.0, 2, 2.8, 4, 4.5, 5.6, 6.3, 7.1, 8, 9, 10,
+                11, 13, 14, 16, 18, 20, 22, 25, 29, 32]
+    # 描画方式
+    #   scatter: 組み合わせごとに透明度0.5の点を重ねた濃さで描画
+    #   bubble: 組み合わせごとに件数を点の大きさで描画
+    #   heatmap: F値と焦点距離を格子に区切った件数を色で描画
+    #   auto: 画像枚数と組み合わせ数から自動で選択
+    scatter_mode = "auto"
+    scatter_max_photos = 5000  # autoでscatterを選択する画像枚数の上限
+    bubble_max_points = 2000  # autoでbubbleを選択する組み合わせ数の上限
+    heatmap_bins = (64, 48)  # heatmapの格子数（F値, 焦点距離）
+    bubble_max_size = 200  # bubbleの最大の点の面積（pt^2）
 
     logger = getLogger(__name__)
 
-    def __init__(self):
+    def chart_params(self) -> dict:
         """
-        コンストラクタ
+        描画結果に影響するパラメータを取得するメソッド（グラフキャッシュのキーに使用）
         """
-        # log出力設定
-        self.logger.setLevel(DEBUG)
-        formatter = Formatter('%(asctime)s - %(levelname)s - %(message)s')
-        # ファイルへ出力するハンドラーを定義
-        fh = FileHandler(filename='./logs/logging.log', encoding='utf-8')
-        fh.setLevel(DEBUG)
-        fh.setFormatter(formatter)
-        # rootロガーにハンドラーを登録
-        self.logger.addHandler(fh)
+        return {
+            "figsize": self.figsize,
+            "dpi": self.dpi,
+            "image_format": self.image_format,
+            "jpeg_quality": self.jpeg_quality,
+            "marker_color": self.marker_color,
+            "x_labels": self.x_labels,
+            "scatter_mode": self.scatter_mode,
+            "scatter_max_photos": self.scatter_max_photos,
+            "bubble_max_points": self.bubble_max_points,
+            "heatmap_bins": self.heatmap_bins,
+            "bubble_max_size": self.bubble_max_size,
+        }
 
-    def sub_routine(self, photo_exifs: list[dict]) -> io.BytesIO:
+    def sub_routine(self, report_aggregator: ReportAggregator) -> io.BytesIO:
         """
         F値と焦点距離の関係を三府図グラフで作成するメソッド
         """
         f_and_focal_length_infos = self.extract_f_and_focal_length_info(
-            photo_exifs)
+            report_aggregator)
         return self.create_f_and_focal_length_scatter_chart(f_and_focal_length_infos)
 
-    def extract_f_and_focal_length_info(self, photo_exifs: list[dict]) -> dict:
+    def extract_f_and_focal_length_info(self, report_aggregator: ReportAggregator) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
         """
         F値と焦点距離の情報を抽出するメソッド
         Args:
-            photo_exifs: 画像EXIF情報リスト
+            report_aggregator: レポート集計値
         Returns:
-            dict: F値と焦点距離の関係性dict
+            tuple: (F値配列, 焦点距離配列, 出現回数配列)
         """
-        # F値と焦点距離を抽出
-        f_and_focal_length_infos = []
-        for image in photo_exifs:
-            if "EXIF FNumber" in image and "EXIF FocalLengthIn35mmFilm" in image:
-                f_and_focal_length_infos.append(
-                    (float(str(image["EXIF FNumber"])), int(str(image["EXIF FocalLengthIn35mmFilm"]))))
-        return f_and_focal_length_infos
+        return report_aggregator.f_and_focal_length_arrays()
 
-    def create_f_and_focal_length_scatter_chart(self, f_and_focal_length_infos: list[tuple]) -> io.BytesIO:
+    def create_f_and_focal_length_scatter_chart(self, f_and_focal_length_infos: Tuple[np.ndarray, np.ndarray, np.ndarray]) -> io.BytesIO:
         """
         F値と焦点距離の関係を三府図グラフで表示するメソッド
         Args:
-            f_and_focal_length_infos: F値と焦点距離dict
+            f_and_focal_length_infos: (F値配列, 焦点距離配列, 出現回数配列)
         Return:
             buf: 画像データ
         """
-        fig, ax = pyplot.subplots(
+        fig = Figure(
             layout="constrained",
-            figsize=(self.a4[0] - (40*self.mm), (self.a4[1] - (40*self.mm))/4), dpi=350)
+            figsize=self.figsize, dpi=self.dpi)
+        ax = fig.subplots()
 
-        ax.scatter(
-            [info[0] for info in f_and_focal_length_infos],
-            [info[1] for info in f_and_focal_length_infos],
-            alpha=0.5
-        )
+        f_numbers, focal_lengths, counts = f_and_focal_length_infos
+        scatter_mode = self.select_scatter_mode(counts)
+        if scatter_mode == "heatmap":
+            # 描画コストは画像枚数ではなく格子数に比例する
+            f_edges, focal_length_edges, histogram = self.bin_f_and_focal_length(
+                f_numbers, focal_lengths, counts)
+            mesh = ax.pcolormesh(
+                f_edges, focal_length_edges,
+                np.ma.masked_equal(histogram.T, 0),
+                cmap="Blues", norm=LogNorm(), zorder=2)
+            fig.colorbar(mesh, ax=ax, label="撮影枚数")
+        elif scatter_mode == "bubble":
+            # 件数を点の面積で表す
+            ax.scatter(
+                f_numbers,
+                focal_lengths,
+                s=self.bubble_sizes(counts),
+                c=self.marker_color,
+                alpha=0.6,
+            )
+        else:
+            # 同じ組み合わせはまとめて1点で描画し、透明度0.5の点をcount回重ねた場合と同じ濃さにする
+            colors = np.tile(to_rgba(self.marker_color), (len(counts), 1))
+            colors[:, 3] = 1 - np.power(0.5, counts)
+            ax.scatter(
+                f_numbers,
+                focal_lengths,
+                c=colors,
+            )
         ax.grid(True)
         ax.set_xlabel("F値")
         ax.set_ylabel("焦点距離 (35mm換算)")
 
-        # F値の目盛りは文字が重ならない程度に間引く
-        x_labels = [1.0, 2, 2.8, 4, 4.5, 5.6, 6.3, 7.1, 8, 9, 10,
-                    11, 13, 14, 16, 18, 20, 22, 25, 29, 32]
-
-        ax.set_xticks(x_labels)
-        pyplot.xticks(rotation=90)
-        ax.set_xticklabels(x_labels)
+        ax.set_xticks(self.x_labels)
+        ax.tick_params(axis="x", labelrotation=90)
+        ax.set_xticklabels(self.x_labels)
 
         # 画像出力
         buf = io.BytesIO()
-        pyplot.savefig(buf, format='png')
+        fig.savefig(buf, format=self.image_format,
+                    pil_kwargs={"quality": self.jpeg_quality} if self.image_format == "jpeg" else None)
         buf.seek(0)
-        pyplot.close(fig)
         return buf
+
+    def select_scatter_mode(self, counts: np.ndarray) -> str:
+        """
+        散布図の描画方式を決定するメソッド
+        Args:
+            counts: 組み合わせごとの出現回数配列
+        Returns:
+            str: 描画方式（scatter / bubble / heatmap）
+        """
+        if self.scatter_mode != "auto":
+            return self.scatter_mode
+        if counts.sum() <= self.scatter_max_photos:
+            return "scatter"
+        if len(counts) <= self.bubble_max_points:
+            return "bubble"
+        return "heatmap"
+
+    def bin_f_and_focal_length(self, f_numbers: np.ndarray, focal_lengths: np.ndarray,
+                               counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        F値と焦点距離の組み合わせを格子に区切って件数を集計するメソッド
+        Args:
+            f_numbers: F値配列
+            focal_lengths: 焦点距離配列
+            counts: 出現回数配列
+        Returns:
+            tuple: (F値の境界配列, 焦点距離の境界配列, 件数の2次元配列)
+        """
+        histogram, f_edges, focal_length_edges = np.histogram2d(
+            f_numbers, focal_lengths, bins=self.heatmap_bins,
+            range=[self.f_number_range(f_numbers),
+                   [min(focal_lengths.min(initial=0), 0), max(focal_lengths.max(initial=1), 1)]],
+            weights=counts)
+        return f_edges, focal_length_edges, histogram
+
+    def f_number_range(self, f_numbers: np.ndarray) -> Tuple[float, float]:
+        """
+        F値の軸の範囲を取得するメソッド
+        目盛りの範囲を基本とし、範囲外のF値（F0.95・F45・F64など）がある場合はそれを含むように広げる
+        （heatmapの格子の範囲外の画像は集計から外れるため）
+        Args:
+            f_numbers: F値配列
+        Returns:
+            tuple: (最小値, 最大値)
+        """
+        return (float(f_numbers.min(initial=min(self.x_labels))),
+                float(f_numbers.max(initial=max(self.x_labels))))
+
+    def bubble_sizes(self, counts: np.ndarray) -> np.ndarray:
+        """
+        件数に比例した点の面積を求めるメソッド
+        Args:
+            counts: 出現回数配列
+        Returns:
+            ndarray: 点の面積配列（pt^2）
+        """
+        return np.maximum(self.bubble_max_size * counts / counts.max(initial=1), 4)
+
+    def create_f_and_focal_length_scatter_drawing(self, f_and_focal_length_infos: Tuple[np.ndarray, np.ndarray, np.ndarray],
+                                                  width: float, font_name: str) -> Drawing:
+        """
+        F値と焦点距離の散布図をreportlabのベクター図形で作成するメソッド
+        Args:
+            f_and_focal_length_infos: (F値配列, 焦点距離配列, 出現回数配列)
+            width: 描画幅（ポイント）
+            font_name: ラベルのフォント名
+        Return:
+            Drawing: 散布図
+        """
+        f_numbers, focal_lengths, counts = f_and_focal_length_infos
+        height = width * self.figsize[1] / self.figsize[0]
+        drawing = Drawing(width, height)
+        plot_x, plot_y = 40, 40
+        plot_width, plot_height = width - plot_x - 10, height - plot_y - 10
+
+        # 軸を作成（目盛りはラスター版と同じ値を使用）
+        x_axis = XValueAxis()
+        x_axis.setPosition(plot_x, plot_y, plot_width)
+        x_axis.valueMin, x_axis.valueMax = self.f_number_range(f_numbers)
+        x_axis.valueSteps = self.x_labels
+        x_axis.labelTextFormat = lambda value: f"{value:g}"
+        x_axis.labels.angle = 90
+        x_axis.labels.boxAnchor = "e"
+        x_axis.labels.fontName = font_name
+        x_axis.labels.fontSize = 6
+        x_axis.visibleGrid = 1
+        x_axis.gridStrokeColor = colors.lightgrey
+        x_axis.gridStart = plot_y
+        x_axis.gridEnd = plot_y + plot_height
+        x_axis.configure([list(self.x_labels)])
+
+        y_axis = YValueAxis()
+        y_axis.setPosition(plot_x, plot_y, plot_height)
+        y_axis.labels.fontName = font_name
+        y_axis.labels.fontSize = 6
+        y_axis.visibleGrid = 1
+        y_axis.gridStrokeColor = colors.lightgrey
+        y_axis.gridStart = plot_x
+        y_axis.gridEnd = plot_x + plot_width
+        y_axis.configure([focal_lengths.tolist() or [0]])
+
+        drawing.add(x_axis)
+        drawing.add(y_axis)
+        drawing.add(String(plot_x + plot_width / 2, 2, "F値",
+                           fontName=font_name, fontSize=7, textAnchor="middle"))
+        # y軸の見出しは90度回転して配置する
+        drawing.add(Group(
+            String(0, 0, "焦点距離 (35mm換算)", fontName=font_name, fontSize=7, textAnchor="middle"),
+            transform=(0, 1, -1, 0, 8, plot_y + plot_height / 2)))
+
+        marker = colors.HexColor(to_hex(self.marker_color))
+        scatter_mode = self.select_scatter_mode(counts)
+        if scatter_mode == "scatter":
+            # 同じ組み合わせは透明度0.5の点をcount回重ねた場合と同じ濃さの1点で描画する
+            alphas = 1 - np.power(0.5, counts)
+            radii = np.full(len(counts), 2.5)
+        else:
+            # heatmapは格子の中心に件数を集約し、bubbleと同じく件数を点の面積で表す
+            if scatter_mode == "heatmap":
+                f_edges, focal_length_edges, histogram = self.bin_f_and_focal_length(
+                    f_numbers, focal_lengths, counts)
+                f_indexes, focal_length_indexes = np.nonzero(histogram)
+                f_numbers = (f_edges[f_indexes] + f_edges[f_indexes + 1]) / 2
+                focal_lengths = (focal_length_edges[focal_length_indexes]
+                                 + focal_length_edges[focal_length_indexes + 1]) / 2
+                counts = histogram[f_indexes, focal_length_indexes]
+            alphas = np.full(len(counts), 0.6)
+            radii = np.sqrt(self.bubble_sizes(counts) / np.pi)
+        for f_number, focal_length, alpha, radius in zip(
+                f_numbers.tolist(), focal_lengths.tolist(), alphas.tolist(), radii.tolist()):
+            drawing.add(Circle(
+                x_axis.scale(f_number), y_axis.scale(focal_length), radius,
+                fillColor=colors.Color(marker.red, marker.green, marker.blue, alpha=alpha),
+                strokeColor=None))
+        return drawing
@@ -1,66 +1,56 @@
-from logging import getLogger, INFO, DEBUG, Formatter, FileHandler
+from logging import getLogger
 import io
-from matplotlib import pyplot
+from matplotlib.colors import to_hex
+from matplotlib.figure import Figure
 import matplotlib_fontja
+from reportlab.graphics.charts.barcharts import HorizontalBarChart
+from reportlab.graphics.shapes import Drawing
+from reportlab.lib import colors
+
+from analysis.report_aggregator import ReportAggregator
 
 
 class GenerateLensBarChart:
     a4 = (8.27, 11.69)  # A4サイズのインチ数
     mm = 0.0393701  # インチからmmへの変換係数
+    figsize = (a4[0] - (40*mm), (a4[1] - (40*mm))/5)  # グラフサイズ（インチ）
+    dpi = 350  # 出力解像度
+    image_format = "png"  # 出力形式（png: 可逆圧縮、jpeg: 非可逆圧縮で小さく高速）
+    jpeg_quality = 90  # JPEG出力時の画質
+    bar_colors = ["tab:red", "tab:blue", "tab:green",
+                  "tab:orange", "tab:purple", "tab:brown"]  # 棒の色
 
     logger = getLogger(__name__)
 
-    def __init__(self):
+    def chart_params(self) -> dict:
         """
-        コンストラクタ
+        描画結果に影響するパラメータを取得するメソッド（グラフキャッシュのキーに使用）
         """
-        # log出力設定
-        self.logger.setLevel(DEBUG)
-        formatter = Formatter('%(asctime)s - %(levelname)s - %(message)s')
-        # ファイルへ出力するハンドラーを定義
-        fh = FileHandler(filename='./logs/logging.log', encoding='utf-8')
-        fh.setLevel(DEBUG)
-        fh.setFormatter(formatter)
-        # rootロガーにハンドラーを登録
-        self.logger.addHandler(fh)
+        return {
+            "figsize": self.figsize,
+            "dpi": self.dpi,
+            "image_format": self.image_format,
+            "jpeg_quality": self.jpeg_quality,
+            "bar_colors": self.bar_colors,
+        }
 
-    def sub_routine(self, photo_exifs: list[dict]) -> io.BytesIO:
+    def sub_routine(self, report_aggregator: ReportAggregator) -> io.BytesIO:
         """
         使用レンズの割合を棒グラフで作成するメソッド
         """
-        lens_count_dict = self.extract_lens_info(photo_exifs)
+        lens_count_dict = self.extract_lens_info(report_aggregator)
         return self.create_lens_bar_chart(lens_count_dict)
 
-    def extract_lens_info(self, photo_exifs: list[dict]) -> dict:
+    def extract_lens_info(self, report_aggregator: ReportAggregator) -> dict:
         """
         使用レンズの情報を抽出するメソッド
         Args:
-            photo_exifs: 画像EXIF情報リスト
+            report_aggregator: レポート集計値
         Returns:
             dict: レンズ名と出現回数dict
         """
-        # 使用レンズを抽出
-        lens_infos = []
-        for image in photo_exifs:
-            if "EXIF LensModel" in image:
-                lens_infos.append(str(image["EXIF LensModel"]).strip())
-
-        # レンズ名をキーに出現回数をカウント
-        lens_count_dict = {}
-        for lens in lens_infos:
-            lens_name = str(lens)
-            if lens_name in lens_count_dict:
-                lens_count_dict[lens_name] += 1
-            else:
-                lens_count_dict[lens_name] = 1
-
         # 上位5位まではそのまま、その他はまとめる
-        lens_chart_dict = dict(
-            sorted(lens_count_dict.items(), key=lambda x: x[1], reverse=True)[:5])
-        others_sum = sum(
-            value for key, value in lens_count_dict.items() if key not in lens_chart_dict)
-        lens_chart_dict['その他'] = others_sum  # その他を追加
-        return lens_chart_dict
+        return report_aggregator.lens_chart_counts(top_count=5)
 
     def create_lens_bar_chart(self, lens_count_dict: dict) -> io.BytesIO:
         """
@@ -73,14 +63,13 @@ class GenerateLensBarChart:
         # 棒グラフのデータを準備
         labels = list(lens_count_dict.keys())
         data = list(lens_count_dict.values())
-        bar_colors = ["tab:red", "tab:blue", "tab:green",
-                      "tab:orange", "tab:purple", "tab:brown"]
 
-        fig, ax = pyplot.subplots(
+        fig = Figure(
             layout="constrained",
-            figsize=(self.a4[0] - (40*self.mm), (self.a4[1] - (40*self.mm))/5), dpi=350)
+            figsize=self.figsize, dpi=self.dpi)
+        ax = fig.subplots()
 
-        bar = ax.barh(labels, data, color=bar_colors, zorder=2)
+        bar = ax.barh(labels, data, color=self.bar_colors, zorder=2)
         # バー内部のラベル色を白に変更し、最前面に配置
         ax.bar_label(bar, color="white", label_type="center",
                      fontsize=10, zorder=3)
@@ -93,7 +82,54 @@ class GenerateLensBarChart:
 
         # 画像出力
         buf = io.BytesIO()
-        pyplot.savefig(buf, format='png')
+        fig.savefig(buf, format=self.image_format,
+                    pil_kwargs={"quality": self.jpeg_quality} if self.image_format == "jpeg" else None)
         buf.seek(0)
-        pyplot.close(fig)
         return buf
+
+    def create_lens_bar_drawing(self, lens_count_dict: dict, width: float, font_name: str) -> Drawing:
+        """
+        レンズ使用回数の棒グラフをreportlabのベクター図形で作成するメソッド
+        Args:
+            lens_count_dict: レンズ名と出現回数dict
+            width: 描画幅（ポイント）
+            font_name: ラベルのフォント名
+        Return:
+            Drawing: 棒グラフ
+        """
+        labels = list(lens_count_dict.keys())
+        data = list(lens_count_dict.values())
+        height = width * self.figsize[1] / self.figsize[0]
+        drawing = Drawing(width, height)
+
+        chart = HorizontalBarChart()
+        # ラベル領域を左側に確保する
+        chart.x = width * 0.3
+        chart.y = 20
+        chart.width = width * 0.67
+        chart.height = height - 30
+        chart.data = [data]
+        chart.categoryAxis.categoryNames = labels
+        # 上から順に並べる
+        chart.categoryAxis.reverseDirection = 1
+        chart.categoryAxis.labels.fontName = font_name
+        chart.categoryAxis.labels.fontSize = 6
+        chart.categoryAxis.labels.boxAnchor = "e"
+        chart.valueAxis.valueMin = 0
+        chart.valueAxis.labels.fontName = font_name
+        chart.valueAxis.labels.fontSize = 6
+        # グリッド線を有効にする
+        chart.valueAxis.visibleGrid = 1
+        chart.valueAxis.gridStrokeDashArray = (2, 2)
+        chart.valueAxis.gridStrokeColor = colors.lightgrey
+        chart.bars.strokeColor = None
+        for index, bar_color in enumerate(self.bar_colors[:len(data)]):
+            chart.bars[(0, index)].fillColor = colors.HexColor(to_hex(bar_color))
+        # バー内部に白文字で回数を表示する
+        chart.barLabelFormat = "%d"
+        chart.barLabels.boxTarget = "mid"
+        chart.barLabels.fillColor = colors.white
+        chart.barLabels.fontName = font_name
+        chart.barLabels.fontSize = 7
+        drawing.add(chart)
+        return drawing
@@ -0,0 +1,107 @@
+import hashlib
+import io
+import struct
+from typing import Optional
+
+from reportlab.pdfbase.pdfdoc import PDFError
+from reportlab.pdfbase.pdfutils import readJPEGInfo
+from reportlab.platypus import Flowable
+
+
+# Orientationの値と、正しい向きで表示するための回転角度（反時計回り）
+# 反転を伴う値は回転のみ反映する
+ORIENTATION_ROTATIONS = {3: 180, 4: 180, 5: 90, 6: 270, 7: 270, 8: 90}
+
+
+class EmbeddedJpeg:
+    """
+    JPEGデータをデコードせずにPDFへ埋め込むための画像ソース
+    reportlabはjpeg_fhを持つ画像ソースのJPEGデータをそのままDCTDecodeのストリームとして書き込む
+    （ImageReaderを渡すと画像の識別のために画素データをデコードするため使用しない）
+    """
+
+    def __init__(self, jpeg: bytes):
+        """
+        コンストラクタ
+        Args:
+            jpeg: JPEGデータ
+        """
+        self.jpeg = jpeg
+        # 同じ画像を1つの画像オブジェクトとして共有するための名前
+        self.digest = hashlib.blake2b(jpeg, digest_size=16).hexdigest()
+
+    def jpeg_fh(self) -> io.BytesIO:
+        """
+        JPEGデータのファイルオブジェクトを取得するメソッド（reportlabから呼び出される）
+        """
+        return io.BytesIO(self.jpeg)
+
+    def __str__(self) -> str:
+        # reportlabは文字列表現から画像の名前を作成する
+        return f"embedded-jpeg:{self.digest}"
+
+
+class ThumbnailImage(Flowable):
+    """
+    サムネイル（JPEG）を枠内に収まるように縮小し、Orientationに従って回転して描画するFlowable
+    """
+
+    def __init__(self, image_source: EmbeddedJpeg, image_size: tuple[int, int], width: float, height: float,
+                 orientation: int = 1):
+        """
+        コンストラクタ
+        Args:
+            image_source: 画像ソース
+            image_size: 画像の幅と高さ（ピクセル）
+            width: 枠の幅（ポイント）
+            height: 枠の高さ（ポイント）
+            orientation: EXIFのOrientationの値
+        """
+        super().__init__()
+        self.image_source = image_source
+        self.image_size = image_size
+        self.width = width
+        self.height = height
+        self.rotation = ORIENTATION_ROTATIONS.get(orientation, 0)
+
+    @classmethod
+    def from_jpeg(cls, jpeg: bytes, width: float, height: float, orientation: int = 1) -> Optional["ThumbnailImage"]:
+        """
+        JPEGデータからFlowableを作成するメソッド（ヘッダーのみ読み、画像はデコードしない）
+        Args:
+            jpeg: JPEGデータ
+            width: 枠の幅（ポイント）
+            height: 枠の高さ（ポイント）
+            orientation: EXIFのOrientationの値
+        Returns:
+            ThumbnailImage: Flowable（JPEGとして読めない場合はNone）
+        """
+        try:
+            jpeg_info = readJPEGInfo(io.BytesIO(jpeg))
+        except (PDFError, struct.error, IndexError):
+            return None
+        image_width, image_height = jpeg_info[0], jpeg_info[1]
+        if image_width <= 0 or image_height <= 0:
+            return None
+        return cls(EmbeddedJpeg(jpeg), (image_width, image_height), width, height, orientation)
+
+    def wrap(self, available_width: float, available_height: float) -> tuple[float, float]:
+        return self.width, self.height
+
+    def draw(self):
+        image_width, image_height = self.image_size
+        # 90度回転する場合は縦横を入れ替えて枠に収める
+        if self.rotation in (90, 270):
+            display_width, display_height = image_height, image_width
+        else:
+            display_width, display_height = image_width, image_height
+        scale = min(self.width / display_width, self.height / display_height)
+        draw_width = image_width * scale
+        draw_height = image_height * scale
+
+        # 枠の中央を原点にして回転し、画像の中心を原点に合わせて描画する
+        self.canv.saveState()
+        self.canv.translate(self.width / 2, self.height / 2)
+        self.canv.rotate(self.rotation)
+        self.canv.drawImage(self.image_source, -draw_width / 2, -draw_height / 2, draw_width, draw_height)
+        self.canv.restoreState()
@@ -1,23 +1,39 @@
-from logging import getLogger, INFO, DEBUG, Formatter, FileHandler
+from __future__ import annotations
+
+from logging import getLogger
+import argparse
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+import contextlib
 import sys
 import os
 import datetime
+import json
 import pathlib
-from typing import Tuple
+import random
+import re
+import time
+from typing import TYPE_CHECKING, Iterable, Iterator, Tuple
+
+from analysis.sketches import SpaceSavingSketch, reservoir_sample
+from chart.chart_cache import ChartCache
+from instrumentation.log_setup import setup_logging
+from instrumentation.run_profiler import (
+    STAGE_AGGREGATE, STAGE_DEDUP, STAGE_PARSE, STAGE_PDF_BUILD, STAGE_RENDER, STAGE_SCAN, RunProfiler, cprofile_to,
+)
+from photo.exif_cache import ExifCache
+from photo.duplicate_filter import DEDUP_POLICIES, POLICY_OLDEST, DuplicateFilter
+from photo.exif_reader import ExifReader
+from photo.file_scanner import PhotoFileScanner
 
-from fractions import Fraction
-from reportlab.lib import enums
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Image, Spacer, Table
-from reportlab.lib.pagesizes import A4, portrait
-from reportlab.lib.units import mm
-from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
-from reportlab.pdfbase import pdfmetrics, cidfonts
-import exifread
-import numpy as np
+# pandas・matplotlib・reportlabは読込に時間がかかるため、使用するメソッド内で読み込む
+# （引数エラーや--stats-onlyの場合はグラフ・PDF関連のライブラリを読み込まずに終了できる）
+if TYPE_CHECKING:
+    import pandas as pd
+    from reportlab.graphics.shapes import Drawing
+    from reportlab.platypus import SimpleDocTemplate
 
-from chart.camera_bar_chart import GenerateCameraBarChart
-from chart.f_and_focal_length_scatter_chart import GenerateFAndFocalLengthScatterChart
-from chart.lens_bar_chart import GenerateLensBarChart
+    from analysis.report_aggregator import ReportAggregator
+    from chart.chart_renderer import ChartRenderer
 
 
 class GeneratePdf:
@@ -30,32 +46,82 @@ class GeneratePdf:
     FILE_OUTPUT_PATH = "out"
     # PDFファイル名テンプレート
     FILE_NAME_TEMPLATE = "photograph_analysis_report_{generate_timestamp}.pdf"
+    # PDFファイル名テンプレート（バッチ出力）
+    BATCH_FILE_NAME_TEMPLATE = "photograph_analysis_report_{report_name}_{generate_timestamp}.pdf"
+    # フォント名
+    FONT_NAME = "HeiseiKakuGo-W5"
+    # グラフ形式
+    CHART_FORMAT_RASTER = "raster"
+    CHART_FORMAT_VECTOR = "vector"
+    # レポート品質
+    #   draft: 低解像度のJPEGで描画し、PDFの圧縮も省略して素早く確認する
+    #   final: 高解像度のPNG（可逆圧縮）で描画する
+    QUALITY_DRAFT = "draft"
+    QUALITY_FINAL = "final"
+    QUALITY_PROFILES = {
+        QUALITY_DRAFT: {"dpi": 110, "image_format": "jpeg", "jpeg_quality": 75, "page_compression": 0},
+        QUALITY_FINAL: {"dpi": 350, "image_format": "png", "jpeg_quality": 90, "page_compression": 1},
+    }
+    # PDFサイズの上限を超えた場合に順に試す画質（実測したPDFサイズの大きい順）
+    #   グラフは単色の塗りと文字が中心で、同じ解像度ならPNGの方がJPEGより小さい
+    #   （例：200dpiでPNG 179KB、JPEG（品質90）279KB）ため、解像度のみを下げる
+    SIZE_BUDGET_STEPS = [
+        {"dpi": 250, "image_format": "png", "jpeg_quality": 90, "page_compression": 1},
+        {"dpi": 200, "image_format": "png", "jpeg_quality": 90, "page_compression": 1},
+        {"dpi": 150, "image_format": "png", "jpeg_quality": 90, "page_compression": 1},
+        {"dpi": 110, "image_format": "png", "jpeg_quality": 90, "page_compression": 1},
+        {"dpi": 80, "image_format": "png", "jpeg_quality": 90, "page_compression": 1},
+        {"dpi": 60, "image_format": "png", "jpeg_quality": 90, "page_compression": 1},
+    ]
+    # グラフ種別
+    CAMERA_BAR_CHART = "camera_bar_chart"
+    LENS_BAR_CHART = "lens_bar_chart"
+    F_AND_FOCAL_LENGTH_SCATTER_CHART = "f_and_focal_length_scatter_chart"
+    # 分析項目のグラフ種別（後ろに分析項目名を付ける）
+    ANALYSIS_CHART_PREFIX = "analysis_"
+    # コンタクトシートのサムネイルを並行して読み込むスレッド数（--io-threads指定時はその値）
+    THUMBNAIL_THREADS = 8
 
     logger = getLogger(__name__)
-    paragraph_sample_style = getSampleStyleSheet()
 
     def __init__(self):
         """
         コンストラクタ
         """
-        # log出力設定
-        self.logger.setLevel(DEBUG)
-        formatter = Formatter('%(asctime)s - %(levelname)s - %(message)s')
-        # ファイルへ出力するハンドラーを定義
-        fh = FileHandler(filename='./logs/logging.log', encoding='utf-8')
-        fh.setLevel(DEBUG)
-        fh.setFormatter(formatter)
-        # rootロガーにハンドラーを登録
-        self.logger.addHandler(fh)
+        # log出力設定（プロセスごとに1回のみ）
+        setup_logging()
+        # 実行プロファイル
+        self.profiler = RunProfiler()
+
+        # ParagraphStyleのテンプレート（最初にレポートを作成する時点で作成する）
+        self.paragraph_sample_style = None
+
+    def initialize_report_styles(self):
+        """
+        フォント登録とParagraphStyleの作成を行うメソッド
+        インスタンスごとに1回だけ行い、作成したスタイルは以降変更しない
+        """
+        if self.paragraph_sample_style is not None:
+            return
+        from reportlab.lib import enums
+        from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+        from reportlab.pdfbase import pdfmetrics, cidfonts
 
         # フォント登録
         pdfmetrics.registerFont(cidfonts.UnicodeCIDFont("HeiseiKakuGo-W5"))
 
         # ParagraphStyleのテンプレートを取得
-        # self.paragraph_sample_style = getSampleStyleSheet()
+        # 1プロセスで複数のレポートを作成できるよう、インスタンスごとに作成し以降は変更しない
+        self.paragraph_sample_style = getSampleStyleSheet()
         self.paragraph_sample_style["Title"].fontName = "HeiseiKakuGo-W5"
+        self.paragraph_sample_style["Title"].underlineWidth = 1
         self.paragraph_sample_style["Heading2"].fontName = "HeiseiKakuGo-W5"
+        self.paragraph_sample_style["Heading2"].underlineWidth = 1
         self.paragraph_sample_style["Heading3"].fontName = "HeiseiKakuGo-W5"
+        self.paragraph_sample_style.add(ParagraphStyle(
+            "Footer", parent=self.paragraph_sample_style["BodyText"], alignment=enums.TA_RIGHT))
+        self.paragraph_sample_style.add(ParagraphStyle(
+            "Note", parent=self.paragraph_sample_style["BodyText"], fontName="HeiseiKakuGo-W5", fontSize=8))
 
     def main(self, argv: list[str]):
         """
@@ -63,129 +129,797 @@ class GeneratePdf:
         Args:
             argv: コマンドライン引数
         """
-        # 入力パスの正当性確認
-        if not self.validate_input_path(argv):
+        args = self.parse_arguments(argv)
+
+        # 処理段階ごとの所要時間を計測し、終了時にログ（指定時はJSON）へ出力する
+        self.profiler = RunProfiler(record_files=args.profile_output is not None)
+        with cprofile_to(args.cprofile):
+            self.run(args)
+        self.profiler.log_summary()
+        if args.profile_output is not None:
+            self.profiler.write(args.profile_output)
+
+    def run(self, args: argparse.Namespace):
+        """
+        レポートを作成するメソッド
+        Args:
+            args: コマンドライン引数の解析結果
+        """
+        # マニフェスト・シャードファイルの指定がない場合は、入力パスと引数の組み合わせを確認する
+        if args.manifest is None and args.merge is None and not self.validate_arguments(args):
+            return
+
+        # 分析項目名の確認（未指定時は登録済みの全項目）
+        # 分析項目の定義はpandasを読み込むため、入力パスと引数の確認後に取得する
+        analyses = self.get_analyses(args)
+        if analyses is None:
+            return
+        args.analyses = [analysis.name for analysis in analyses]
+
+        # マニフェストが指定された場合は複数のレポートをまとめて出力する
+        if args.manifest is not None:
+            self.run_batch(args)
+            return
+
+        # シャードファイルが指定された場合は合算してレポートを出力する
+        if args.merge is not None:
+            self.run_merge(args)
+            return
+
+        # 常駐モードの場合はフォルダを監視し、変更のたびにレポートを作り直す
+        if args.watch:
+            from watch.report_watcher import ReportWatcher
+
+            ReportWatcher(self, args).run()
             return
 
         # 指定フォルダ内の画像を読み込む
-        photo_files = self.collect_photo_files_path(argv[1])
-        photo_exifs = self.read_exif_data(photo_files)
+        # 抽出件数が指定された場合は無作為に抽出したファイルのみ読み込み、カメラ・レンズはスケッチで近似集計する
+        photo_files = self.collect_photo_files_path(args.photo_dir)
+        sketch_capacity = args.sketch_capacity
+        population_count = None
+        if args.sample is not None:
+            photo_files, population_count = self.sample_photo_files(
+                photo_files, args.sample, seed=args.sample_seed)
+            sample_count = len(photo_files)
+            if sketch_capacity is None:
+                sketch_capacity = SpaceSavingSketch.DEFAULT_CAPACITY
+        # 重複除外が指定された場合は、内容が同じファイルを読込前に除き、残すファイルの優先順に並べる
+        duplicate_filter = None
+        if args.dedup is not None:
+            duplicate_filter = DuplicateFilter(args.dedup)
+            photo_files = duplicate_filter.order_files(photo_files)
+        report_aggregator = self.aggregate_exif_data(
+            photo_files, workers=args.workers, chunk_size=args.chunk_size,
+            cache_path=None if args.no_cache else args.cache, sketch_capacity=sketch_capacity,
+            io_threads=args.io_threads, io_in_flight=args.io_in_flight, analyses=analyses,
+            duplicate_filter=duplicate_filter, contact_sheet_group=args.contact_sheet)
+        if population_count is not None:
+            report_aggregator.set_sample(sample_count, population_count)
+        if duplicate_filter is not None:
+            # 重複の判定は読込と並行して行うため、所要時間は読込の所要時間と重複する
+            self.profiler.add(STAGE_DEDUP, duplicate_filter.seconds, items=duplicate_filter.file_count)
+            report_aggregator.record_duplicates(
+                duplicate_filter.identical_count, duplicate_filter.derivative_count)
+            self.logger.info("duplicates removed: identical=%d derivative=%d",
+                             duplicate_filter.identical_count, duplicate_filter.derivative_count)
+
+        # スナップショットが指定された場合は、保存済みの集計値へ今回の集計値を合算する
+        if args.snapshot is not None:
+            report_aggregator = self.fold_into_snapshot(
+                args.snapshot, args.photo_dir, report_aggregator)
+            if report_aggregator is None:
+                return
+
+        # シャードファイルの出力先が指定された場合は集計値のみ保存し、レポートは合算時に作成する
+        if args.shard_output is not None:
+            from analysis.report_snapshot import create_source, save_snapshot
+
+            save_snapshot(args.shard_output, report_aggregator, [create_source(args.photo_dir)])
+            print(f"シャードファイルを出力しました（{report_aggregator.photo_count}枚）：{args.shard_output}")
+            return
+
+        self.output_report(report_aggregator, args)
+
+    def validate_arguments(self, args: argparse.Namespace) -> bool:
+        """
+        入力パスの正当性と、併用できない引数の組み合わせを確認するメソッド
+        Args:
+            args: コマンドライン引数の解析結果
+        Returns:
+            bool: 確認結果
+        """
+        # 入力パスの正当性確認
+        if not self.validate_input_path(args.photo_dir):
+            return False
+
+        # 近似集計の集計値は誤差の範囲が異なる集計値と合算できないため、スナップショット・シャード・常駐モードとは併用しない
+        approximate = args.sample is not None or args.sketch_capacity is not None
+        if approximate and (args.snapshot is not None or args.shard_output is not None or args.watch):
+            print("エラー：--sample・--sketch-capacityは--snapshot・--shard-output・--watchと併用できません。")
+            return False
+        if args.shard_output is not None and args.snapshot is not None:
+            print("エラー：--shard-outputは--snapshotと併用できません。")
+            return False
+        if args.dedup is not None and args.watch:
+            print("エラー：--dedupは--watchと併用できません。")
+            return False
+        # 常駐モードは最新のレポートPDFのみを出力するため、集計値の出力先を指定する引数とは併用しない
+        if args.watch and (args.snapshot is not None or args.stats_only is not None or args.shard_output is not None):
+            print("エラー：--watchは--snapshot・--stats-only・--shard-outputと併用できません。")
+            return False
+        return True
+
+    def get_analyses(self, args: argparse.Namespace) -> list | None:
+        """
+        --analysesで指定された分析項目を取得するメソッド
+        Args:
+            args: コマンドライン引数の解析結果
+        Returns:
+            list: 分析項目（未登録の名前が指定された場合はNone）
+        """
+        from analysis.analysis_registry import get_analyses
+
+        try:
+            return get_analyses(args.analyses)
+        except KeyError as e:
+            print(f"エラー：{e.args[0]}")
+            return None
+
+    def run_merge(self, args: argparse.Namespace):
+        """
+        シャードファイル（--shard-outputで出力した集計値）を合算してレポートを出力するメソッド
+        Args:
+            args: コマンドライン引数の解析結果
+        """
+        from analysis.report_snapshot import SnapshotError, merge_snapshots
+
+        try:
+            with self.profiler.measure(STAGE_AGGREGATE, items=len(args.merge)):
+                report_aggregator, sources = merge_snapshots(args.merge)
+        except SnapshotError as e:
+            print(f"エラー：{e}")
+            return
+        self.logger.info("merged %d shards (%d folders)", len(args.merge), len(sources))
+        self.output_report(report_aggregator, args)
+
+    def output_report(self, report_aggregator: ReportAggregator, args: argparse.Namespace):
+        """
+        集計値から統計情報またはレポートを出力するメソッド
+        Args:
+            report_aggregator: レポート集計値
+            args: コマンドライン引数の解析結果
+        """
+        # 統計情報のみ出力する場合はグラフ・PDFを作成しない
+        if args.stats_only is not None:
+            self.write_stats(report_aggregator.to_stats(), args.stats_only)
+            return
 
         # exif情報が取得出来ない場合は処理を終了
-        if len(photo_exifs) == 0:
+        if report_aggregator.photo_count == 0:
             print("EXIF情報が取得できませんでした。処理を終了します。")
             return
 
-        # PDFテンプレートを作成
-        doc, contents = self.initialize_pdf_template()
-
-        # PDFタイトルを描画
-        # TODO cloneした方がよいか？
-        paragraph_title = self.paragraph_sample_style["Title"]
-        paragraph_title.underlineWidth = 1
-        title = Paragraph(
-            "<u>撮影スタイルレポート ver0.1α版</u>",
-            style=paragraph_title,
-        )
-        contents.append(title)
-        contents.append(Spacer(1, 12))
-
-        # テーブル情報を描画
-        self.create_table_info(doc, contents, photo_exifs)
-
-        # 使用カメラ割合の棒グラフを描画
-        self.create_camera_bar_chart(doc, contents, photo_exifs)
-        contents.append(Spacer(1, 12))
-
-        # 使用レンズ割合の棒グラフを描画
-        self.create_lens_bar_chart(doc, contents, photo_exifs)
-        contents.append(Spacer(1, 12))
-
-        # F値と焦点距離の散布図を描画
-        # TODO 広角、標準、望遠で分けた方が良さそう
-        self.create_f_and_focal_length_scatter_chart(
-            doc, contents, photo_exifs)
-        contents.append(Spacer(1, 12))
-
-        footer_style = self.paragraph_sample_style["BodyText"]
-        footer_style.alignment = enums.TA_RIGHT
-        paragraph_footer = Paragraph(
-            "report tool created by threads@suguru031213",
-            style=footer_style,
-        )
-        contents.append(paragraph_footer)
+        self.build_report_file(report_aggregator, args, chart_workers=args.chart_workers)
+
+    def run_batch(self, args: argparse.Namespace):
+        """
+        マニフェストに定義された複数のレポートをまとめて出力するメソッド
+        各画像のEXIF情報は1回だけ読み込み、レポートの作成はプロセスプールで並列に行う
+        Args:
+            args: コマンドライン引数の解析結果
+        """
+        from analysis.report_aggregator import ReportAggregator
+        from analysis.report_manifest import ManifestError, load_manifest, partition_folders
+        from analysis.analysis_registry import get_analyses, required_columns
+        from photo.exif_table import COLUMN_FILE_PATH, CORE_COLUMNS
+
+        if args.dedup is not None:
+            print("エラー：--dedupは--manifestと併用できません。")
+            return
+        try:
+            report_specs = load_manifest(args.manifest)
+        except ManifestError as e:
+            print(f"エラー：{e}")
+            return
+        partitions = partition_folders(report_specs)
+        if not all(self.validate_input_path(folder) for folder in partitions):
+            return
+
+        # 区画（重複のないフォルダ単位）ごとにEXIF情報を読み込み、各レポートで共有する
+        analyses = get_analyses(args.analyses)
+        # 代表写真を抽出する場合はファイルパスの列も作成する
+        columns = (*CORE_COLUMNS, *required_columns(analyses))
+        if args.contact_sheet is not None:
+            columns = (*columns, COLUMN_FILE_PATH)
+        partition_tables = {
+            folder: self.read_exif_data(
+                PhotoFileScanner(folder, exclude_dirs=exclude_dirs),
+                workers=args.workers, chunk_size=args.chunk_size,
+                cache_path=None if args.no_cache else args.cache,
+                io_threads=args.io_threads, io_in_flight=args.io_in_flight, columns=columns)
+            for folder, exclude_dirs in partitions.items()
+        }
+
+        report_aggregators = {}
+        for report_spec in report_specs:
+            report_aggregator = ReportAggregator(analyses=analyses, contact_sheet_group=args.contact_sheet)
+            for partition in report_spec.partitions:
+                photo_exifs = report_spec.filter_period(partition_tables[partition])
+                with self.profiler.measure(STAGE_AGGREGATE, items=len(photo_exifs)):
+                    report_aggregator.update(photo_exifs)
+            report_aggregators[report_spec.name] = report_aggregator
+
+        # 統計情報のみ出力する場合はレポート名をキーにまとめて出力する
+        if args.stats_only is not None:
+            self.write_stats(
+                {report_name: report_aggregator.to_stats()
+                 for report_name, report_aggregator in report_aggregators.items()},
+                args.stats_only)
+            return
+
+        for report_spec in report_specs:
+            if report_aggregators[report_spec.name].photo_count == 0:
+                print(f"レポート '{report_spec.name}'：EXIF情報が取得できませんでした。出力を省略します。")
+                del report_aggregators[report_spec.name]
+
+        if args.report_workers == 1 or len(report_aggregators) <= 1:
+            for report_name, report_aggregator in report_aggregators.items():
+                file_path = self.build_report_file(
+                    report_aggregator, args, report_name=report_name, chart_workers=args.chart_workers)
+                print(f"レポート '{report_name}' を出力しました：{file_path}")
+            return
 
-        # PDF生成
-        doc.build(contents)
+        # フォントとスタイルはワーカープロセスごとに1回だけ初期化する
+        with ProcessPoolExecutor(max_workers=args.report_workers, initializer=initialize_batch_worker) as executor:
+            futures = {
+                report_name: executor.submit(build_batch_report, report_name, report_aggregator, args)
+                for report_name, report_aggregator in report_aggregators.items()
+            }
+            for report_name, future in futures.items():
+                try:
+                    file_path, stages, reports = future.result()
+                except Exception as e:
+                    print(f"エラー：レポート '{report_name}' の作成中にエラーが発生しました。{e}")
+                    continue
+                # ワーカーでの所要時間を合算する（並列に実行するため合計は経過時間より長くなる）
+                for name, stage in stages.items():
+                    self.profiler.add(name, stage["seconds"], stage["items"])
+                self.profiler.reports.extend(reports)
+                print(f"レポート '{report_name}' を出力しました：{file_path}")
 
-    def validate_input_path(self, argv: list[str]) -> bool:
+    def write_stats(self, stats: dict, output_path: str):
         """
-        入力パスの正当性を確認するメソッド
+        統計情報をJSONで出力するメソッド
+        Args:
+            stats: 統計情報
+            output_path: 出力先ファイルパス（"-"の場合は標準出力）
+        """
+        if output_path == "-":
+            print(json.dumps(stats, ensure_ascii=False, indent=2))
+            return
+        file_path = pathlib.Path(output_path)
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(file_path, "w", encoding="utf-8") as file:
+            json.dump(stats, file, ensure_ascii=False, indent=2)
+
+    def build_report_file(self, report_aggregator: ReportAggregator, args: argparse.Namespace,
+                          report_name: str | None = None, chart_workers: int | None = None,
+                          chart_renderer: ChartRenderer | None = None) -> str:
+        """
+        集計値からPDFレポートを作成するメソッド
+        PDFサイズの上限が指定された場合は、上限に収まるまで画像の解像度を下げて作り直す
+        Args:
+            report_aggregator: レポート集計値
+            args: コマンドライン引数の解析結果（グラフ関連の設定を使用）
+            report_name: レポート名（バッチ出力時のファイル名に使用）
+            chart_workers: グラフ描画の並列プロセス数
+            chart_renderer: 起動済みのグラフ描画クラス（常駐モードで描画プロセスを使い回す場合に指定）
+        Returns:
+            str: PDFファイルパス
+        """
+        quality_steps = self.get_quality_steps(args)
+        for index, quality in enumerate(quality_steps):
+            start = time.perf_counter()
+            with self.profiler.measure(STAGE_RENDER, items=1):
+                doc, contents = self.create_report_contents(
+                    report_aggregator, args, report_name=report_name, chart_workers=chart_workers,
+                    chart_renderer=chart_renderer, quality=quality)
+
+            # PDF生成
+            with self.profiler.measure(STAGE_PDF_BUILD, items=1):
+                doc.build(contents)
+            file_size = os.path.getsize(doc.filename)
+            self.profiler.record_report(
+                describe_quality(quality, args.chart_format), time.perf_counter() - start, file_size)
+
+            if args.max_pdf_size is None or file_size <= args.max_pdf_size:
+                break
+            if index == len(quality_steps) - 1:
+                print(f"エラー：PDFのサイズ（{file_size:,}バイト）を上限（{args.max_pdf_size:,}バイト）"
+                      f"以下にできませんでした。最も小さい画質で出力します。")
+                break
+            # 上限を超えたPDFは削除し、1段階小さい画質で作り直す
+            os.remove(doc.filename)
+        return doc.filename
+
+    def get_quality_steps(self, args: argparse.Namespace) -> list[dict]:
+        """
+        レポートの作成に使用する画質を取得するメソッド
+        Args:
+            args: コマンドライン引数の解析結果
+        Returns:
+            list: 試す順の画質（PDFサイズの上限がない場合は指定された品質のみ）
+        """
+        quality = self.QUALITY_PROFILES[args.quality]
+        # ベクター形式は画像を含まないため、画質を下げてもサイズは変わらない
+        if args.max_pdf_size is None or args.chart_format == self.CHART_FORMAT_VECTOR:
+            return [quality]
+        return [quality] + [
+            step for step in self.SIZE_BUDGET_STEPS if step["dpi"] < quality["dpi"]]
+
+    def create_chart_renderer(self, args: argparse.Namespace, chart_workers: int | None = None) -> ChartRenderer:
+        """
+        コマンドライン引数のキャッシュ設定に従ってグラフ描画クラスを作成するメソッド
+        Args:
+            args: コマンドライン引数の解析結果
+            chart_workers: グラフ描画の並列プロセス数
+        Returns:
+            ChartRenderer: グラフ描画クラス
+        """
+        from chart.chart_renderer import ChartRenderer
+
+        chart_cache = None
+        if not args.no_chart_cache:
+            chart_cache = ChartCache(
+                args.chart_cache, max_bytes=args.chart_cache_size * 1024 * 1024)
+        return ChartRenderer(workers=chart_workers, chart_cache=chart_cache)
+
+    def create_report_contents(self, report_aggregator: ReportAggregator, args: argparse.Namespace,
+                               report_name: str | None = None, chart_workers: int | None = None,
+                               chart_renderer: ChartRenderer | None = None,
+                               quality: dict | None = None) -> Tuple[SimpleDocTemplate, list]:
+        """
+        グラフを描画し、PDFドキュメントとコンテンツを作成するメソッド
+        Args:
+            report_aggregator: レポート集計値
+            args: コマンドライン引数の解析結果（グラフ関連の設定を使用）
+            report_name: レポート名（バッチ出力時のファイル名に使用）
+            chart_workers: グラフ描画の並列プロセス数
+            chart_renderer: 起動済みのグラフ描画クラス（未指定時はこのレポート用に起動し、終了時に停止する）
+            quality: 画質（未指定時は--qualityで指定された品質）
+        Returns:
+            tuple: (PDFドキュメント, PDFコンテンツ)
+        """
+        from reportlab.platypus import Paragraph, Spacer
+
+        self.initialize_report_styles()
+        if quality is None:
+            quality = self.QUALITY_PROFILES[args.quality]
+
+        # グラフの描画を先に依頼し、PDFの組み立てと並行して描画する
+        with contextlib.ExitStack() as stack:
+            if chart_renderer is None:
+                chart_renderer = stack.enter_context(
+                    self.create_chart_renderer(args, chart_workers=chart_workers))
+            chart_futures = self.submit_charts(
+                chart_renderer, report_aggregator, chart_format=args.chart_format,
+                scatter_mode=args.scatter_mode, quality=quality)
+            # 代表写真のサムネイルも、グラフの描画と並行してスレッドで読み込む
+            contact_sheet_rows = None
+            if report_aggregator.contact_sheet is not None:
+                thumbnail_executor = stack.enter_context(
+                    ThreadPoolExecutor(max_workers=args.io_threads or self.THUMBNAIL_THREADS))
+                contact_sheet_rows = self.submit_thumbnails(thumbnail_executor, report_aggregator)
+
+            # PDFテンプレートを作成
+            doc, contents = self.initialize_pdf_template(report_name, quality=quality)
+
+            # PDFタイトルを描画
+            title = Paragraph(
+                "<u>撮影スタイルレポート ver0.1α版</u>",
+                style=self.paragraph_sample_style["Title"],
+            )
+            contents.append(title)
+            contents.append(Spacer(1, 12))
+
+            # テーブル情報を描画
+            self.create_table_info(doc, contents, report_aggregator)
+
+            # 使用カメラ割合の棒グラフを描画
+            self.create_camera_bar_chart(
+                doc, contents, chart_futures[self.CAMERA_BAR_CHART])
+            contents.append(Spacer(1, 12))
+
+            # 使用レンズ割合の棒グラフを描画
+            self.create_lens_bar_chart(
+                doc, contents, chart_futures[self.LENS_BAR_CHART])
+            contents.append(Spacer(1, 12))
+
+            # F値と焦点距離の散布図を描画
+            # TODO 広角、標準、望遠で分けた方が良さそう
+            self.create_f_and_focal_length_scatter_chart(
+                doc, contents, chart_futures[self.F_AND_FOCAL_LENGTH_SCATTER_CHART])
+            contents.append(Spacer(1, 12))
+
+            # 分析項目ごとの棒グラフを描画
+            for analysis in self.get_report_analyses(report_aggregator):
+                self.create_analysis_chart(
+                    doc, contents, analysis.title, chart_futures[self.ANALYSIS_CHART_PREFIX + analysis.name])
+                contents.append(Spacer(1, 12))
+
+            # 代表写真のコンタクトシートを描画
+            if contact_sheet_rows:
+                self.create_contact_sheet(
+                    doc, contents, report_aggregator.contact_sheet.group, contact_sheet_rows)
+                contents.append(Spacer(1, 12))
+
+            paragraph_footer = Paragraph(
+                "report tool created by threads@suguru031213",
+                style=self.paragraph_sample_style["Footer"],
+            )
+            contents.append(paragraph_footer)
+        return doc, contents
+
+    def parse_arguments(self, argv: list[str]) -> argparse.Namespace:
+        """
+        コマンドライン引数を解析するメソッド
         Args:
             argv: コマンドライン引数
+        Returns:
+            Namespace: 解析結果
+        """
+        parser = argparse.ArgumentParser(
+            prog=pathlib.Path(argv[0]).name if argv else None,
+            description="撮影スタイルレポートを生成します。")
+        parser.add_argument("photo_dir", nargs="?", help="分析対象フォルダ")
+        parser.add_argument(
+            "--manifest", default=None,
+            help="バッチ出力のマニフェストファイルパス（JSON）。定義された複数のレポートをまとめて出力する")
+        parser.add_argument(
+            "--report-workers", type=int, default=None,
+            help="バッチ出力時にレポートを並列に作成するプロセス数（未指定時はCPUコア数、1で逐次処理）")
+        parser.add_argument(
+            "--workers", type=int, default=None,
+            help="EXIF読込の並列プロセス数（未指定時はCPUコア数、1で逐次処理）")
+        parser.add_argument(
+            "--chunk-size", type=int, default=ExifReader.DEFAULT_CHUNK_SIZE,
+            help="1回のディスパッチでワーカーへ渡すファイル数")
+        parser.add_argument(
+            "--io-threads", type=int, default=None,
+            help="ネットワークドライブ（SMB/NFS）向けの先読みスレッド数。各ファイルの先頭を並行して読み込み、--workersのプロセスで解析する")
+        parser.add_argument(
+            "--io-in-flight", type=int, default=None,
+            help=f"同時に先読みするファイル数の上限（未指定時は先読みスレッド数の{ExifReader.IN_FLIGHT_PER_THREAD}倍）")
+        parser.add_argument(
+            "--cache", default=ExifCache.DEFAULT_CACHE_PATH,
+            help="EXIF情報キャッシュファイルパス")
+        parser.add_argument(
+            "--no-cache", action="store_true",
+            help="EXIF情報キャッシュを使用せず全ファイルを解析する")
+        parser.add_argument(
+            "--snapshot", default=None,
+            help=("集計値のスナップショットファイルパス。指定フォルダの集計値を合算して保存し、合算後のレポートを出力する"
+                  "（取り込めるのは未取込のフォルダのみ）"))
+        parser.add_argument(
+            "--shard-output", default=None, metavar="SHARD_PATH",
+            help="シャード出力。指定フォルダの集計値のみをファイルへ保存し、レポートは作成しない（--mergeで合算する）")
+        parser.add_argument(
+            "--merge", nargs="+", default=None, metavar="SHARD_PATH",
+            help="--shard-outputで出力した複数のシャードファイルを合算し、1つのレポートを出力する")
+        parser.add_argument(
+            "--stats-only", nargs="?", const="-", default=None, metavar="JSON_PATH",
+            help="グラフ・PDFを作成せず、集計した統計情報をJSONで出力する（出力先未指定時は標準出力）")
+        parser.add_argument(
+            "--sample", type=int, default=None, metavar="N",
+            help="近似モード。画像ファイルをN件だけ無作為に抽出して集計し、レポートに誤差の範囲を記載する")
+        parser.add_argument(
+            "--sample-seed", type=int, default=None,
+            help="近似モードの抽出に使用する乱数のシード値（指定すると同じファイルを抽出する）")
+        parser.add_argument(
+            "--sketch-capacity", type=int, default=None, metavar="K",
+            help=("カメラ・レンズを上位K種類までのスケッチで近似集計し、メモリ使用量を一定にする"
+                  f"（--sample指定時の既定値は{SpaceSavingSketch.DEFAULT_CAPACITY}）"))
+        parser.add_argument(
+            "--dedup", nargs="?", const=POLICY_OLDEST, default=None, choices=DEDUP_POLICIES, metavar="POLICY",
+            help=("同じ写真のコピー（内容が同じファイル・編集後の書き出し・RAW現像のTIFFなど）を1枚として数える。"
+                  "POLICYは残すファイルの選び方（first: 走査順、oldest: 更新日時が最も古い（既定）、"
+                  "largest: サイズが最も大きい、jpeg / tiff: 指定した形式を優先）。"
+                  "firstのみ走査と並行して読み込み、それ以外は全ファイルのパスを保持して並べ替えてから読み込む"))
+        parser.add_argument(
+            "--analyses", nargs="*", default=None, metavar="NAME",
+            help=("レポートに掲載する分析項目（camera_lens / f_number / orientation / season / hour / weekday / day / session、"
+                  "未指定時は全項目）。使用しない項目のEXIFタグは読み込まない"))
+        parser.add_argument(
+            "--contact-sheet", nargs="?", const="camera", default=None,
+            choices=["camera", "lens", "focal_range"], metavar="GROUP",
+            help=("代表的な写真のサムネイル一覧をレポートに掲載する。GROUPは分類"
+                  "（camera: カメラ別（既定）、lens: レンズ別、focal_range: 焦点距離別）。"
+                  "EXIFに埋め込まれたサムネイルを使用し、画像はデコードしない"))
+        parser.add_argument(
+            "--watch", action="store_true",
+            help="常駐モード。フォルダを監視し、画像の追加・更新・削除のたびにレポートを作り直す")
+        parser.add_argument(
+            "--watch-interval", type=float, default=2.0,
+            help="常駐モードでフォルダを走査する間隔（秒）")
+        parser.add_argument(
+            "--watch-debounce", type=float, default=3.0,
+            help="常駐モードで最後の変更からレポートを作り直すまでの待機時間（秒）")
+        parser.add_argument(
+            "--http-port", type=int, default=None,
+            help="常駐モードで最新のレポートと統計情報を配信するHTTPポート番号（127.0.0.1で待ち受け）")
+        parser.add_argument(
+            "--profile-output", default=None,
+            help="実行プロファイル（処理段階ごとの所要時間・件数/秒・解析時に読み込んだバイト数・最大RSS・ファイル単位の解析時間）のJSON出力先")
+        parser.add_argument(
+            "--cprofile", default=None,
+            help="cProfileの計測結果（pstats形式）の出力先")
+        parser.add_argument(
+            "--chart-workers", type=int, default=None,
+            help="グラフ描画の並列プロセス数（未指定時はCPUコア数、1で逐次処理）")
+        parser.add_argument(
+            "--chart-format", choices=[self.CHART_FORMAT_RASTER, self.CHART_FORMAT_VECTOR],
+            default=self.CHART_FORMAT_RASTER,
+            help="グラフ形式（raster: 350dpiのPNG画像、vector: ベクター図形で小さく高速）")
+        parser.add_argument(
+            "--scatter-mode", choices=["auto", "scatter", "bubble", "heatmap"], default="auto",
+            help="F値と焦点距離の散布図の描画方式（auto: 画像枚数と組み合わせ数から自動選択）")
+        parser.add_argument(
+            "--quality", choices=list(self.QUALITY_PROFILES), default=self.QUALITY_FINAL,
+            help="レポート品質（draft: 低解像度のJPEGで素早く作成、final: 350dpiのPNGで高画質）")
+        parser.add_argument(
+            "--max-pdf-size", type=parse_byte_size, default=None, metavar="SIZE",
+            help="PDFサイズの上限（例：500K、2M）。超えた場合はグラフ画像の解像度を下げて作り直す")
+        parser.add_argument(
+            "--chart-cache", default=ChartCache.DEFAULT_CACHE_DIR,
+            help="グラフ画像キャッシュフォルダ")
+        parser.add_argument(
+            "--chart-cache-size", type=int, default=ChartCache.DEFAULT_MAX_BYTES // (1024 * 1024),
+            help="グラフ画像キャッシュの上限サイズ（MB）")
+        parser.add_argument(
+            "--no-chart-cache", action="store_true",
+            help="グラフ画像キャッシュを使用せず毎回描画する")
+        return parser.parse_args(argv[1:])
+
+    def validate_input_path(self, photo_dir: str | None) -> bool:
+        """
+        入力パスの正当性を確認するメソッド
+        Args:
+            photo_dir: 分析対象フォルダ
         Returns:
             bool: 正当性確認結果
         """
-        if len(argv) < self.PHOTO_DIR_INDEX:
+        if photo_dir is None:
             print("エラー：引数が不足しています。")
             return False
-        if not os.path.exists(argv[1]):
-            print(f"エラー：指定されたパス '{argv[1]}' は存在しません。")
+        if not os.path.exists(photo_dir):
+            print(f"エラー：指定されたパス '{photo_dir}' は存在しません。")
             return False
         return True
 
-    def collect_photo_files_path(self, source_path: str) -> list[pathlib.Path]:
+    def collect_photo_files_path(self, source_path: str) -> Iterable[pathlib.Path]:
         """
         指定フォルダ内の画像ファイルパスを収集するメソッド
+        走査は別スレッドで行われ、見つかったパスから順にEXIF読込へ渡される
         Args:
             source_path: 画像フォルダパス
         Returns:
-            list: 画像ファイルパスリスト
+            Iterable: 画像ファイルパス
+        """
+        return PhotoFileScanner(source_path)
+
+    def sample_photo_files(self, file_paths: Iterable[pathlib.Path], sample_size: int,
+                           seed: int | None = None) -> Tuple[list[pathlib.Path], int]:
+        """
+        画像ファイルパスを無作為に抽出するメソッド
+        走査しながら抽出するため、全ファイルのパスは保持しない
+        Args:
+            file_paths: 画像ファイルパス（ジェネレータ可）
+            sample_size: 抽出件数
+            seed: 乱数のシード値
+        Returns:
+            tuple: (抽出した画像ファイルパスリスト, 抽出元のファイル数)
         """
-        pathlib_path = pathlib.Path(source_path).resolve()
-        paths = list(pathlib_path.rglob("*.*"))
-        return [f for f in paths if f.suffix.lower() in [".jpg", ".jpeg", ".tiff"]]
+        start = time.perf_counter()
+        population_count, sample = reservoir_sample(file_paths, sample_size, random.Random(seed))
+        self.profiler.add(STAGE_SCAN, time.perf_counter() - start, items=population_count)
+        # フォルダ順に読み込むことでディスクの読込位置が飛ばないようにする
+        sample.sort()
+        return sample, population_count
 
-    def read_exif_data(self, file_paths: list[pathlib.Path]) -> list[dict]:
+    def read_exif_data(self, file_paths: Iterable[pathlib.Path], workers: int | None = 1,
+                       chunk_size: int = ExifReader.DEFAULT_CHUNK_SIZE,
+                       cache_path: str | None = None,
+                       io_threads: int | None = None, io_in_flight: int | None = None,
+                       columns: Iterable[str] | None = None) -> pd.DataFrame:
         """
         対象の画像ファイルからEXIF情報を読み込むメソッド
+        読み込んだ値は列指向のテーブルへ順次変換する
+        Args:
+            file_paths: 画像ファイルパス（ジェネレータ可）
+            workers: 並列プロセス数（Noneの場合はCPUコア数、1で逐次処理）
+            chunk_size: 1回のディスパッチでワーカーへ渡すファイル数
+            cache_path: EXIF情報キャッシュファイルパス（Noneの場合はキャッシュを使用しない）
+            io_threads: 先読みスレッド数（ネットワークドライブ向け、Noneの場合は先読みしない）
+            io_in_flight: 同時に先読みするファイル数の上限
+            columns: 作成する列（未指定時は基本の列）
+        Returns:
+            DataFrame: EXIF情報テーブル
+        """
+        from photo.exif_table import CORE_COLUMNS, concat_exif_tables
+
+        columns = CORE_COLUMNS if columns is None else tuple(columns)
+        return concat_exif_tables(list(self.iter_exif_chunks(
+            file_paths, workers=workers, chunk_size=chunk_size, cache_path=cache_path,
+            io_threads=io_threads, io_in_flight=io_in_flight, columns=columns)), columns=columns)
+
+    def aggregate_exif_data(self, file_paths: Iterable[pathlib.Path], workers: int | None = 1,
+                            chunk_size: int = ExifReader.DEFAULT_CHUNK_SIZE,
+                            cache_path: str | None = None,
+                            sketch_capacity: int | None = None,
+                            io_threads: int | None = None, io_in_flight: int | None = None,
+                            analyses: Iterable = (),
+                            duplicate_filter: DuplicateFilter | None = None,
+                            contact_sheet_group: str | None = None) -> ReportAggregator:
+        """
+        対象の画像ファイルからEXIF情報を読み込み、レポートの集計値のみを保持するメソッド
+        テーブルはチャンク単位で集計後に破棄するため、メモリ使用量は画像枚数に依存しない
+        Args:
+            file_paths: 画像ファイルパス（ジェネレータ可）
+            workers: 並列プロセス数（Noneの場合はCPUコア数、1で逐次処理）
+            chunk_size: 1回のディスパッチでワーカーへ渡すファイル数
+            cache_path: EXIF情報キャッシュファイルパス（Noneの場合はキャッシュを使用しない）
+            io_threads: 先読みスレッド数（ネットワークドライブ向け、Noneの場合は先読みしない）
+            io_in_flight: 同時に先読みするファイル数の上限
+            sketch_capacity: カメラ・レンズを近似集計する場合の種類数の上限
+            analyses: 集計する分析項目（使用する列のタグのみEXIF情報から取り出す）
+            duplicate_filter: 重複画像の除外クラス（指定時は派生ファイルを集計前に除外する）
+            contact_sheet_group: コンタクトシートの代表写真の分類（指定時はファイルパスも読み込み、代表写真を抽出する）
+        Returns:
+            ReportAggregator: レポート集計値
+        """
+        from analysis.report_aggregator import ReportAggregator
+        from analysis.analysis_registry import required_columns
+        from photo.exif_table import COLUMN_FILE_PATH, CORE_COLUMNS
+
+        analyses = list(analyses)
+        report_aggregator = ReportAggregator(
+            sketch_capacity=sketch_capacity, analyses=analyses, contact_sheet_group=contact_sheet_group)
+        columns = (*CORE_COLUMNS, *required_columns(analyses))
+        if contact_sheet_group is not None:
+            columns = (*columns, COLUMN_FILE_PATH)
+        for photo_exifs in self.iter_exif_chunks(
+                file_paths, workers=workers, chunk_size=chunk_size, cache_path=cache_path,
+                io_threads=io_threads, io_in_flight=io_in_flight,
+                columns=columns, duplicate_filter=duplicate_filter):
+            with self.profiler.measure(STAGE_AGGREGATE, items=len(photo_exifs)):
+                report_aggregator.update(photo_exifs)
+        return report_aggregator
+
+    def fold_into_snapshot(self, snapshot_path: str, source_path: str,
+                           report_aggregator: ReportAggregator) -> ReportAggregator | None:
+        """
+        保存済みのスナップショットへ今回の集計値を合算し、スナップショットを更新するメソッド
+        スナップショットが存在しない場合は今回の集計値で新規作成する
+        集計値は画像単位の内訳を持たず差し引きできないため、差分更新は新しいフォルダの追加のみ行える
+        （取り込み済みのフォルダやその配下・親フォルダは、画像が二重に数えられるため取り込まない）
         Args:
-            file_paths: 画像ファイルパスリスト
+            snapshot_path: スナップショットファイルパス
+            source_path: 今回取り込んだフォルダパス
+            report_aggregator: 今回の集計値
         Returns:
-            dict: EXIFデータ
+            ReportAggregator: 合算後の集計値（エラー時はNone）
         """
-        picture_infos = []
-        for file_path in file_paths:
+        from analysis.report_snapshot import (
+            SnapshotError, create_source, find_overlapping_source, load_snapshot, save_snapshot,
+        )
+
+        sources = []
+        source = create_source(source_path)
+        if os.path.exists(snapshot_path):
             try:
-                with open(file_path, "rb") as file:
-                    picture_info = {}
-                    tags = exifread.process_file(file, details=False)
-                    for tag, value in tags.items():
-                        if tag.startswith("Image ") or tag.startswith("EXIF "):
-                            picture_info[tag] = value
-                    picture_infos.append(picture_info)
-            except Exception as e:
-                print(f"エラー：画像のEXIF情報を読込中にエラーが発生しました。画像パス：{file_path} {e}")
-        # F値を小数点表記に変換
-        for i, val in enumerate(picture_infos):
-            picture_infos[i]["EXIF FNumber"] = float(
-                Fraction(str(val["EXIF FNumber"])))
-        return picture_infos
-
-    def initialize_pdf_template(self) -> Tuple[SimpleDocTemplate, list]:
+                snapshot_aggregator, sources = load_snapshot(snapshot_path)
+            except SnapshotError as e:
+                print(f"エラー：{e}")
+                return None
+            # 取り込み済みのフォルダと画像が重複すると件数が二重に数えられるため中断する
+            ingested = find_overlapping_source(sources, source)
+            if ingested is not None:
+                print(f"エラー：フォルダ '{source_path}' はスナップショットへ取り込み済みのフォルダ "
+                      f"'{ingested['path']}' と重複しています。")
+                return None
+            report_aggregator = snapshot_aggregator.merge(report_aggregator)
+
+        sources.append(source)
+        save_snapshot(snapshot_path, report_aggregator, sources)
+        return report_aggregator
+
+    def iter_exif_chunks(self, file_paths: Iterable[pathlib.Path], workers: int | None = 1,
+                         chunk_size: int = ExifReader.DEFAULT_CHUNK_SIZE,
+                         cache_path: str | None = None,
+                         io_threads: int | None = None, io_in_flight: int | None = None,
+                         columns: Iterable[str] | None = None,
+                         duplicate_filter: DuplicateFilter | None = None) -> Iterator[pd.DataFrame]:
+        """
+        対象の画像ファイルからEXIF情報を読み込み、テーブルのチャンクを順次返すジェネレータ
+        解析（テーブルへの変換を含む）の所要時間は、呼び出し側の処理時間を除いて計測する
+        Args:
+            file_paths: 画像ファイルパス（ジェネレータ可）
+            workers: 並列プロセス数（Noneの場合はCPUコア数、1で逐次処理）
+            chunk_size: 1回のディスパッチでワーカーへ渡すファイル数
+            cache_path: EXIF情報キャッシュファイルパス（Noneの場合はキャッシュを使用しない）
+            io_threads: 先読みスレッド数（ネットワークドライブ向け、Noneの場合は先読みしない）
+            io_in_flight: 同時に先読みするファイル数の上限
+            columns: 作成する列（未指定時は基本の列。列の作成に必要なタグのみ読み込み、ファイルパスの列がある場合はパスを付加する）
+            duplicate_filter: 重複画像の除外クラス（指定時はフィンガープリントのタグも読み込み、派生ファイルを除外する）
+        Returns:
+            Iterator: EXIF情報テーブルのチャンク
+        """
+        from photo.duplicate_filter import FINGERPRINT_TAGS
+        from photo.exif_table import COLUMN_FILE_PATH, CORE_COLUMNS, ExifTableBuilder, required_tags
+
+        columns = CORE_COLUMNS if columns is None else tuple(columns)
+        tags = required_tags(columns)
+        if duplicate_filter is not None:
+            tags |= FINGERPRINT_TAGS
+        with contextlib.ExitStack() as stack:
+            cache = None
+            if cache_path is not None:
+                cache = stack.enter_context(ExifCache(cache_path, tags=tags))
+            exif_reader = ExifReader(
+                workers=workers, chunk_size=chunk_size, cache=cache, profiler=self.profiler,
+                io_threads=io_threads, io_in_flight=io_in_flight, tags=tags,
+                include_paths=COLUMN_FILE_PATH in columns)
+            parse_seconds = 0.0
+            start = time.perf_counter()
+            picture_infos = exif_reader.iter_files(file_paths)
+            if duplicate_filter is not None:
+                picture_infos = duplicate_filter.filter_records(picture_infos)
+            for photo_exifs in ExifTableBuilder(columns=columns).iter_chunks(picture_infos):
+                parse_seconds += time.perf_counter() - start
+                yield photo_exifs
+                start = time.perf_counter()
+            parse_seconds += time.perf_counter() - start
+
+        self.profiler.add(STAGE_PARSE, parse_seconds, items=exif_reader.file_count)
+        if isinstance(file_paths, PhotoFileScanner):
+            # 走査は解析と並行して別スレッドで行うため、所要時間は解析と重複する
+            self.profiler.add(STAGE_SCAN, file_paths.scan_seconds, items=file_paths.file_count)
+        for file_path, error in exif_reader.errors:
+            self.logger.warning("EXIF read error: %s %s", file_path, error)
+            # --stats-onlyで標準出力へ出力するJSONと混ざらないよう、標準エラー出力へ出力する
+            print(f"エラー：画像のEXIF情報を読込中にエラーが発生しました。画像パス：{file_path} {error}",
+                  file=sys.stderr)
+
+    def initialize_pdf_template(self, report_name: str | None = None,
+                                quality: dict | None = None) -> Tuple[SimpleDocTemplate, list]:
         """
         PDF初期化処理
+        Args:
+            report_name: レポート名（バッチ出力時のみ指定）
+            quality: 画質（未指定時は高画質）
         """
+        from reportlab.lib.pagesizes import A4, portrait
+        from reportlab.lib.units import mm
+        from reportlab.platypus import SimpleDocTemplate
+
         # ファイル名生成
         generate_timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        file_name = self.FILE_NAME_TEMPLATE.format(
-            generate_timestamp=generate_timestamp)
+        if report_name is None:
+            file_name = self.FILE_NAME_TEMPLATE.format(
+                generate_timestamp=generate_timestamp)
+        else:
+            # ファイル名に使用できない文字は置き換える
+            file_name = self.BATCH_FILE_NAME_TEMPLATE.format(
+                report_name=re.sub(r'[\\/:*?"<>|]', "_", report_name),
+                generate_timestamp=generate_timestamp)
 
         # PDFファイル出力先
         file_path = str(
             (pathlib.Path(self.FILE_OUTPUT_PATH) / file_name).resolve())
 
         # PDFテンプレートを作成
+        quality = quality or self.QUALITY_PROFILES[self.QUALITY_FINAL]
         doc = SimpleDocTemplate(
             file_path,
             pagesize=portrait(A4),
@@ -193,42 +927,31 @@ class GeneratePdf:
             leftMargin=(10*mm),
             topMargin=(5*mm),
             bottomMargin=(5*mm),
+            pageCompression=quality["page_compression"],
         )
         contents = []
         return doc, contents
 
-    def create_table_info(self, doc: SimpleDocTemplate, contents: list, photo_exifs: dict):
+    def create_table_info(self, doc: SimpleDocTemplate, contents: list, report_aggregator: ReportAggregator):
         """
         テーブル情報を描画するメソッド
         Args:
             doc: PDFドキュメント
             contents: PDFコンテンツ
-            photo_exifs: 画像EXIF情報リスト
-        """
-        # 撮影期間を取得
-        period_start = None
-        period_end = None
-        for image in photo_exifs:
-            if "EXIF DateTimeOriginal" in image:
-                date_str = str(image["EXIF DateTimeOriginal"])
-                date = datetime.datetime.strptime(
-                    date_str, "%Y:%m:%d %H:%M:%S")
-                if period_start is None:
-                    period_start = date
-                else:
-                    if period_start > date:
-                        period_start = date
-                if period_end is None:
-                    period_end = date
-                else:
-                    if period_end < date:
-                        period_end = date
-        period_start_str = period_start.strftime("%Y/%m/%d")
-        period_end_str = period_end.strftime("%Y/%m/%d")
+            report_aggregator: レポート集計値
+        """
+        from reportlab.lib.units import mm
+        from reportlab.platypus import Paragraph, Table
+
+        # 撮影期間を取得（撮影日時が記録された画像がない場合は不明とする）
+        period_str = "不明"
+        if report_aggregator.period_start is not None:
+            period_start_str = report_aggregator.period_start.strftime("%Y/%m/%d")
+            period_end_str = report_aggregator.period_end.strftime("%Y/%m/%d")
+            period_str = f"{period_start_str}～{period_end_str}"
 
         data = [
-            ["レポート対象画像", len(photo_exifs), "レポート対象期間",
-             f"{period_start_str}～{period_end_str}"],
+            ["レポート対象画像", report_aggregator.photo_count, "レポート対象期間", period_str],
         ]
         table = Table(data, colWidths=[30*mm, 40*mm, 30*mm, 60*mm])
         table.setStyle([
@@ -244,16 +967,136 @@ class GeneratePdf:
         ])
         contents.append(table)
 
-    def create_camera_bar_chart(self, doc: SimpleDocTemplate, contents: list, photo_exifs: dict):
+        # 重複画像を除外した場合は除外した枚数を記載する
+        if report_aggregator.duplicate_counts:
+            identical_count = report_aggregator.duplicate_counts["identical"]
+            derivative_count = report_aggregator.duplicate_counts["derivative"]
+            note = (f"同じ写真のコピー{identical_count + derivative_count:,}枚を除外しました"
+                    f"（内容が同じファイル{identical_count:,}枚、編集・現像による派生ファイル{derivative_count:,}枚）。")
+            contents.append(Paragraph(note, style=self.paragraph_sample_style["Note"]))
+
+        # 近似集計の場合は誤差の範囲を記載する
+        if report_aggregator.is_approximate:
+            note = self.create_approximation_note(report_aggregator.error_bounds())
+            if note:
+                contents.append(Paragraph(note, style=self.paragraph_sample_style["Note"]))
+
+    def create_approximation_note(self, error_bounds: dict) -> str:
+        """
+        近似集計の誤差の範囲を説明する文章を作成するメソッド
+        Args:
+            error_bounds: 誤差の上限（ReportAggregator.error_boundsの戻り値）
+        Returns:
+            str: 説明文
+        """
+        notes = []
+        if error_bounds["sample_population"] is not None:
+            notes.append(
+                f"※全{error_bounds['sample_population']:,}ファイルから無作為に抽出した"
+                f"{error_bounds['sample_count']:,}ファイルを集計しています。"
+                f"グラフの割合の誤差は最大±{error_bounds['share_margin'] * 100:.1f}ポイントです（95%信頼区間）。")
+        if error_bounds["camera_count_error"] or error_bounds["lens_count_error"]:
+            notes.append(
+                f"※カメラ・レンズは{error_bounds['sketch_capacity']}種類までを近似集計しています。"
+                f"件数はカメラで最大{error_bounds['camera_count_error']:,}件、"
+                f"レンズで最大{error_bounds['lens_count_error']:,}件多い可能性があります。")
+        return "<br/>".join(notes)
+
+    def submit_charts(self, chart_renderer: ChartRenderer, report_aggregator: ReportAggregator,
+                      chart_format: str = "raster", scatter_mode: str = "auto",
+                      quality: dict | None = None) -> dict[str, Future | Drawing]:
+        """
+        各グラフの描画を依頼するメソッド
+        集計値からの抽出はここで行い、描画プロセスへは集計済みデータのみ渡す
+        Args:
+            chart_renderer: グラフ描画クラス
+            report_aggregator: レポート集計値
+            chart_format: グラフ形式（raster: PNG画像、vector: reportlabのベクター図形）
+            scatter_mode: 散布図の描画方式（auto / scatter / bubble / heatmap）
+            quality: 画質（解像度・画像形式・JPEG画質、未指定時は各グラフの既定値）
+        Returns:
+            dict: グラフ種別と描画結果Future（ベクター形式の場合はDrawing）のdict
+        """
+        from reportlab.lib.pagesizes import A4, portrait
+        from reportlab.lib.units import mm
+
+        from chart.camera_bar_chart import GenerateCameraBarChart
+        from chart.count_bar_chart import GenerateCountBarChart
+        from chart.f_and_focal_length_scatter_chart import GenerateFAndFocalLengthScatterChart
+        from chart.lens_bar_chart import GenerateLensBarChart
+
+        count_chart = GenerateCountBarChart()
+        analysis_chart_dicts = {
+            self.ANALYSIS_CHART_PREFIX + analysis.name: analysis.chart_counts(
+                report_aggregator.analysis_counts[analysis.name])
+            for analysis in self.get_report_analyses(report_aggregator)}
+        camera_chart = GenerateCameraBarChart()
+        lens_chart = GenerateLensBarChart()
+        scatter_chart = GenerateFAndFocalLengthScatterChart()
+        scatter_chart.scatter_mode = scatter_mode
+        camera_chart_dict = camera_chart.extract_camera_info(report_aggregator)
+        lens_chart_dict = lens_chart.extract_lens_info(report_aggregator)
+        f_and_focal_length_infos = scatter_chart.extract_f_and_focal_length_info(
+            report_aggregator)
+
+        # ベクター形式は軽量なため、描画プロセスを使わずにその場で作成する
+        if chart_format == self.CHART_FORMAT_VECTOR:
+            width = portrait(A4)[0] - 20*mm
+            return {
+                self.CAMERA_BAR_CHART: camera_chart.create_camera_bar_drawing(
+                    camera_chart_dict, width, self.FONT_NAME),
+                self.LENS_BAR_CHART: lens_chart.create_lens_bar_drawing(
+                    lens_chart_dict, width, self.FONT_NAME),
+                self.F_AND_FOCAL_LENGTH_SCATTER_CHART: scatter_chart.create_f_and_focal_length_scatter_drawing(
+                    f_and_focal_length_infos, width, self.FONT_NAME),
+                **{chart_type: count_chart.create_count_bar_drawing(count_dict, width, self.FONT_NAME)
+                   for chart_type, count_dict in analysis_chart_dicts.items()},
+            }
+
+        image_params = {}
+        if quality is not None:
+            image_params = {name: quality[name] for name in ("dpi", "image_format", "jpeg_quality")}
+        return {
+            self.CAMERA_BAR_CHART: chart_renderer.submit(
+                GenerateCameraBarChart, "create_camera_bar_chart", camera_chart_dict, image_params),
+            self.LENS_BAR_CHART: chart_renderer.submit(
+                GenerateLensBarChart, "create_lens_bar_chart", lens_chart_dict, image_params),
+            self.F_AND_FOCAL_LENGTH_SCATTER_CHART: chart_renderer.submit(
+                GenerateFAndFocalLengthScatterChart, "create_f_and_focal_length_scatter_chart",
+                f_and_focal_length_infos, {**image_params, "scatter_mode": scatter_mode}),
+            **{chart_type: chart_renderer.submit(
+                GenerateCountBarChart, "create_count_bar_chart", count_dict, image_params)
+               for chart_type, count_dict in analysis_chart_dicts.items()},
+        }
+
+    def get_report_analyses(self, report_aggregator: ReportAggregator) -> list:
+        """
+        集計値に含まれる分析項目のうち、登録済みのものを取得するメソッド
+        （スナップショット・シャードから復元した集計値は、集計時の分析項目を含む）
+        Args:
+            report_aggregator: レポート集計値
+        Returns:
+            list: 分析項目（集計順）
+        """
+        from analysis.analysis_registry import ANALYSES
+
+        return [ANALYSES[name] for name in report_aggregator.analysis_counts if name in ANALYSES]
+
+    def create_camera_bar_chart(self, doc: SimpleDocTemplate, contents: list, chart_image: Future | Drawing):
         """
         使用カメラ回数を示す棒グラフを作成するメソッド
         Args:
             doc: PDFドキュメント
             contents: PDFコンテンツ
-            photo_exifs: 画像EXIF情報リスト
+            chart_image: 描画結果Future（ベクター形式の場合はDrawing）
         """
+        from reportlab.graphics.shapes import Drawing
+        from reportlab.lib.units import mm
+        from reportlab.platypus import Image, Paragraph, Spacer
+
+        from chart.chart_renderer import to_image_buffer
+
         header_style = self.paragraph_sample_style["Heading2"]
-        header_style.underlineWidth = 1
         header = Paragraph(
             "<u>使用カメラ回数</u>",
             style=header_style,
@@ -261,8 +1104,12 @@ class GeneratePdf:
         contents.append(header)
         contents.append(Spacer(1, 4))
 
-        generate_camera_bar_chart = GenerateCameraBarChart()
-        img = generate_camera_bar_chart.sub_routine(photo_exifs)
+        if isinstance(chart_image, Drawing):
+            contents.append(chart_image)
+            return
+
+        # 描画の完了を待って画像を取得
+        img = to_image_buffer(chart_image)
         camera_bar_chart_image = Image(
             img,
             width=doc.pagesize[0] - 20*mm,
@@ -271,16 +1118,21 @@ class GeneratePdf:
         )
         contents.append(camera_bar_chart_image)
 
-    def create_lens_bar_chart(self, doc: SimpleDocTemplate, contents: list, photo_exifs: dict):
+    def create_lens_bar_chart(self, doc: SimpleDocTemplate, contents: list, chart_image: Future | Drawing):
         """
         使用レンズ回数を示す棒グラフを作成するメソッド
         Args:
             doc: PDFドキュメント
             contents: PDFコンテンツ
-            photo_exifs: 画像EXIF情報リスト
+            chart_image: 描画結果Future（ベクター形式の場合はDrawing）
         """
+        from reportlab.graphics.shapes import Drawing
+        from reportlab.lib.units import mm
+        from reportlab.platypus import Image, Paragraph, Spacer
+
+        from chart.chart_renderer import to_image_buffer
+
         header_style = self.paragraph_sample_style["Heading2"]
-        header_style.underlineWidth = 1
         header = Paragraph(
             "<u>使用レンズ回数</u>",
             style=header_style,
@@ -288,8 +1140,11 @@ class GeneratePdf:
         contents.append(header)
         contents.append(Spacer(1, 4))
 
-        generate_lens_bar_chart = GenerateLensBarChart()
-        img = generate_lens_bar_chart.sub_routine(photo_exifs)
+        if isinstance(chart_image, Drawing):
+            contents.append(chart_image)
+            return
+
+        img = to_image_buffer(chart_image)
         lens_bar_chart_image = Image(
             img,
             width=doc.pagesize[0] - 20*mm,
@@ -298,16 +1153,21 @@ class GeneratePdf:
         )
         contents.append(lens_bar_chart_image)
 
-    def create_f_and_focal_length_scatter_chart(self, doc: SimpleDocTemplate, contents: list, photo_exifs: dict):
+    def create_f_and_focal_length_scatter_chart(self, doc: SimpleDocTemplate, contents: list, chart_image: Future | Drawing):
         """
         F値と焦点距離の散布図を作成するメソッド
         Args:
             doc: PDFドキュメント
             contents: PDFコンテンツ
-            photo_exifs: 画像EXIF情報リスト
+            chart_image: 描画結果Future（ベクター形式の場合はDrawing）
         """
+        from reportlab.graphics.shapes import Drawing
+        from reportlab.lib.units import mm
+        from reportlab.platypus import Image, Paragraph, Spacer
+
+        from chart.chart_renderer import to_image_buffer
+
         header_style = self.paragraph_sample_style["Heading2"]
-        header_style.underlineWidth = 1
         header = Paragraph(
             "<u>F値と焦点距離(35mm換算)組み合わせの散布図</u>",
             style=header_style,
@@ -315,9 +1175,11 @@ class GeneratePdf:
         contents.append(header)
         contents.append(Spacer(1, 4))
 
-        generate_f_and_focal_length_scatter_chart = GenerateFAndFocalLengthScatterChart()
-        img = generate_f_and_focal_length_scatter_chart.sub_routine(
-            photo_exifs)
+        if isinstance(chart_image, Drawing):
+            contents.append(chart_image)
+            return
+
+        img = to_image_buffer(chart_image)
         f_and_focal_length_scatter_chart_image = Image(
             img,
             width=doc.pagesize[0] - 20*mm,
@@ -326,6 +1188,186 @@ class GeneratePdf:
         )
         contents.append(f_and_focal_length_scatter_chart_image)
 
+    def create_analysis_chart(self, doc: SimpleDocTemplate, contents: list, title: str,
+                              chart_image: Future | Drawing):
+        """
+        分析項目の件数を示す棒グラフを作成するメソッド
+        Args:
+            doc: PDFドキュメント
+            contents: PDFコンテンツ
+            title: 分析項目の見出し
+            chart_image: 描画結果Future（ベクター形式の場合はDrawing）
+        """
+        from reportlab.graphics.shapes import Drawing
+        from reportlab.lib.units import mm
+        from reportlab.platypus import Image, Paragraph, Spacer
+
+        from chart.chart_renderer import to_image_buffer
+
+        header_style = self.paragraph_sample_style["Heading2"]
+        header = Paragraph(
+            f"<u>{title}</u>",
+            style=header_style,
+        )
+        contents.append(header)
+        contents.append(Spacer(1, 4))
+
+        if isinstance(chart_image, Drawing):
+            contents.append(chart_image)
+            return
+
+        img = to_image_buffer(chart_image)
+        analysis_chart_image = Image(
+            img,
+            width=doc.pagesize[0] - 20*mm,
+            height=doc.pagesize[1] - 20*mm,
+            kind="proportional",
+        )
+        contents.append(analysis_chart_image)
+
+    def submit_thumbnails(self, executor: ThreadPoolExecutor,
+                          report_aggregator: ReportAggregator) -> list[Tuple[str, int, list[Future]]]:
+        """
+        コンタクトシートに掲載する代表写真のサムネイルの読込を依頼するメソッド
+        Args:
+            executor: 読込用のスレッドプール
+            report_aggregator: レポート集計値（代表写真を含む）
+        Returns:
+            list: (分類名, 画像数, サムネイルの読込結果Futureのリスト)のリスト
+        """
+        from photo.exif_thumbnail import load_thumbnail
+
+        return [
+            (label, count, [executor.submit(load_thumbnail, pathlib.Path(file_path)) for file_path in file_paths])
+            for label, count, file_paths in report_aggregator.contact_sheet.representative_files()
+        ]
+
+    def create_contact_sheet(self, doc: SimpleDocTemplate, contents: list, group: str,
+                             contact_sheet_rows: list[Tuple[str, int, list[Future]]]):
+        """
+        分類ごとの代表写真のサムネイルを並べたコンタクトシートを作成するメソッド
+        サムネイルのJPEGデータはデコードせずにそのままPDFへ埋め込む
+        Args:
+            doc: PDFドキュメント
+            contents: PDFコンテンツ
+            group: 代表写真の分類
+            contact_sheet_rows: submit_thumbnailsの戻り値
+        """
+        from reportlab.lib.units import mm
+        from reportlab.platypus import KeepTogether, Paragraph, Spacer, Table
+
+        from analysis.contact_sheet import GROUP_TITLES, ContactSheetSampler
+        from chart.thumbnail_image import ThumbnailImage
+
+        header = Paragraph(
+            f"<u>代表的な写真（{GROUP_TITLES[group]}）</u>",
+            style=self.paragraph_sample_style["Heading2"],
+        )
+        contents.append(header)
+        contents.append(Spacer(1, 4))
+
+        # 1分類の代表写真を1行に並べる
+        column_count = ContactSheetSampler.DEFAULT_SAMPLE_SIZE
+        column_width = (doc.pagesize[0] - 20*mm) / column_count
+        image_width = column_width - 2*mm
+        image_height = image_width * 3 / 4
+        embedded_count = decoded_count = missing_count = 0
+        for label, count, futures in contact_sheet_rows:
+            cells = []
+            for future in futures:
+                thumbnail, orientation, embedded = future.result()
+                image = None
+                if thumbnail is not None:
+                    image = ThumbnailImage.from_jpeg(thumbnail, image_width, image_height, orientation)
+                if image is None:
+                    missing_count += 1
+                    continue
+                cells.append(image)
+                if embedded:
+                    embedded_count += 1
+                else:
+                    decoded_count += 1
+            cells += [""] * (column_count - len(cells))
+            row_header = Paragraph(f"{label}（{count:,}枚）", style=self.paragraph_sample_style["Heading3"])
+            table = Table([cells], colWidths=[column_width] * column_count, rowHeights=[image_height + 2*mm])
+            table.setStyle([
+                ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+                ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+                ("LEFTPADDING", (0, 0), (-1, -1), 1*mm),
+                ("RIGHTPADDING", (0, 0), (-1, -1), 1*mm),
+                ("TOPPADDING", (0, 0), (-1, -1), 1*mm),
+                ("BOTTOMPADDING", (0, 0), (-1, -1), 1*mm),
+            ])
+            contents.append(KeepTogether([row_header, table]))
+        self.logger.info("contact sheet thumbnails: embedded=%d decoded=%d missing=%d",
+                         embedded_count, decoded_count, missing_count)
+
+
+# バッチ出力のワーカープロセスで使用するPDF生成インスタンス
+batch_report_builder: GeneratePdf | None = None
+
+
+def parse_byte_size(value: str) -> int:
+    """
+    K/M/Gの単位付きのサイズ指定をバイト数に変換する関数（コマンドライン引数の型変換用）
+    Args:
+        value: サイズ指定（例：500K、2M、1048576）
+    Returns:
+        int: バイト数
+    """
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)\s*([KMG]?)B?", value.strip(), re.IGNORECASE)
+    if match is None:
+        raise argparse.ArgumentTypeError(f"サイズの指定が不正です: {value}")
+    unit = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}[match.group(2).upper()]
+    return int(float(match.group(1)) * unit)
+
+
+def describe_quality(quality: dict, chart_format: str = GeneratePdf.CHART_FORMAT_RASTER) -> str:
+    """
+    画質を実行プロファイルへ記録する表記にする関数
+    Args:
+        quality: 画質
+        chart_format: グラフ形式（vectorの場合は解像度と画像形式を使用しない）
+    Returns:
+        str: 表記（例：350dpi_png、110dpi_jpeg75、vector、vector_uncompressed）
+    """
+    if chart_format == GeneratePdf.CHART_FORMAT_VECTOR:
+        return "vector" if quality["page_compression"] else "vector_uncompressed"
+    if quality["image_format"] == "jpeg":
+        return f"{quality['dpi']}dpi_jpeg{quality['jpeg_quality']}"
+    return f"{quality['dpi']}dpi_{quality['image_format']}"
+
+
+def initialize_batch_worker():
+    """
+    バッチ出力のワーカープロセスの初期化関数
+    フォント登録とスタイルの作成をプロセスごとに1回だけ行う
+    """
+    from chart.chart_renderer import initialize_worker
+
+    global batch_report_builder
+    initialize_worker()
+    batch_report_builder = GeneratePdf()
+    batch_report_builder.initialize_report_styles()
+
+
+def build_batch_report(report_name: str, report_aggregator: ReportAggregator,
+                       args: argparse.Namespace) -> Tuple[str, dict, list]:
+    """
+    バッチ出力の1レポートを作成する関数
+    ワーカープロセス内で呼び出すため、グラフは同じプロセスで逐次描画する
+    Args:
+        report_name: レポート名
+        report_aggregator: レポート集計値
+        args: コマンドライン引数の解析結果
+    Returns:
+        tuple: (PDFファイルパス, 処理段階ごとの所要時間, 作成したPDFごとの画質・所要時間・ファイルサイズ)
+    """
+    batch_report_builder.profiler = RunProfiler()
+    file_path = batch_report_builder.build_report_file(
+        report_aggregator, args, report_name=report_name, chart_workers=1)
+    return file_path, batch_report_builder.profiler.stages, batch_report_builder.profiler.reports
+
 
 if __name__ == "__main__":
     generate_pdf = GeneratePdf()
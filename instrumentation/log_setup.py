@@ -0,0 +1,37 @@
+from logging import DEBUG, WARNING, FileHandler, Formatter, getLogger
+import pathlib
+
+
+# ログファイル出力先
+LOG_FILE_PATH = "./logs/logging.log"
+# ログレベルを設定するアプリケーションのロガー名（モジュールの上位パッケージ名）
+APP_LOGGER_NAMES = (
+    "__main__", "generate_pdf", "analysis", "benchmarks", "chart", "instrumentation", "photo", "watch",
+)
+
+# 設定済みかどうか（プロセスごと）
+logging_configured = False
+
+
+def setup_logging(log_file_path: str = LOG_FILE_PATH, level: int = DEBUG):
+    """
+    ログ出力を設定する関数
+    プロセスごとに1回だけrootロガーへファイルハンドラーを登録し、2回目以降の呼び出しは何もしない
+    ライブラリのログは警告以上のみ、アプリケーションのログは指定レベル以上を出力する
+    Args:
+        log_file_path: ログファイル出力先
+        level: アプリケーションのログレベル
+    """
+    global logging_configured
+    if logging_configured:
+        return
+    logging_configured = True
+
+    pathlib.Path(log_file_path).parent.mkdir(parents=True, exist_ok=True)
+    handler = FileHandler(filename=log_file_path, encoding="utf-8")
+    handler.setFormatter(Formatter("%(asctime)s - %(process)d - %(name)s - %(levelname)s - %(message)s"))
+    root_logger = getLogger()
+    root_logger.addHandler(handler)
+    root_logger.setLevel(WARNING)
+    for name in APP_LOGGER_NAMES:
+        getLogger(name).setLevel(level)
@@ -0,0 +1,212 @@
+from array import array
+import contextlib
+import datetime
+import json
+from logging import getLogger
+import math
+import os
+import pathlib
+import sys
+import time
+from typing import Iterator, Optional
+
+
+# 処理段階
+STAGE_SCAN = "scan"
+STAGE_DEDUP = "dedup"
+STAGE_PARSE = "parse"
+STAGE_AGGREGATE = "aggregate"
+STAGE_RENDER = "render"
+STAGE_PDF_BUILD = "pdf_build"
+
+# 出力するファイル単位の解析時間のパーセンタイル
+LATENCY_PERCENTILES = (50, 90, 99)
+
+logger = getLogger(__name__)
+
+
+def get_peak_rss() -> dict:
+    """
+    自プロセスと終了済みの子プロセス（ワーカー）の最大RSSを取得する関数
+    resourceモジュールがない環境（Windows）ではNoneを返す
+    Returns:
+        dict: 最大RSS（バイト）
+    """
+    try:
+        import resource
+    except ImportError:
+        return {"self": None, "children": None}
+    # ru_maxrssの単位はLinuxではKB、macOSではバイト
+    unit = 1 if sys.platform == "darwin" else 1024
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * unit,
+    }
+
+
+def percentile(sorted_values, rank: float) -> float:
+    """
+    ソート済みの値からパーセンタイルを求める関数（最近傍法）
+    """
+    index = max(0, math.ceil(len(sorted_values) * rank / 100) - 1)
+    return sorted_values[index]
+
+
+class RunProfiler:
+    """
+    実行プロファイル計測クラス
+    処理段階（走査・解析・集計・描画・PDF生成）ごとの所要時間と処理件数を記録し、
+    ログとJSONの実行プロファイルとして出力する
+    record_filesがTrueの場合は、ファイル単位の解析時間とファイルから実際に読み込んだバイト数も記録する
+    """
+
+    def __init__(self, record_files: bool = False):
+        """
+        コンストラクタ
+        Args:
+            record_files: ファイル単位の解析時間を記録するか
+        """
+        self.record_files = record_files
+        self.started_at = datetime.datetime.now()
+        self.start = time.perf_counter()
+        # 処理段階名と計測値（所要時間・件数）
+        self.stages: dict[str, dict] = {}
+        # ファイル単位の解析時間（秒）。100万件でも8MB程度に収まるようarrayで保持する
+        self.parse_latencies = array("d")
+        self.parsed_bytes_read = 0
+        # 作成したPDFごとの画質・所要時間・ファイルサイズ
+        self.reports: list[dict] = []
+
+    def add(self, name: str, seconds: float, items: Optional[int] = None):
+        """
+        処理段階の計測値を加算するメソッド
+        Args:
+            name: 処理段階名
+            seconds: 所要時間（秒）
+            items: 処理件数
+        """
+        stage = self.stages.setdefault(name, {"seconds": 0.0, "items": None})
+        stage["seconds"] += seconds
+        if items is not None:
+            stage["items"] = (stage["items"] or 0) + items
+
+    @contextlib.contextmanager
+    def measure(self, name: str, items: Optional[int] = None) -> Iterator[None]:
+        """
+        withブロックの所要時間を処理段階の計測値へ加算するコンテキストマネージャ
+        Args:
+            name: 処理段階名
+            items: 処理件数
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start, items)
+
+    def record_parse(self, seconds: float, bytes_read: int):
+        """
+        1ファイル分の解析時間と読み込んだバイト数を記録するメソッド
+        Args:
+            seconds: 解析時間（秒）
+            bytes_read: ファイルから読み込んだバイト数
+        """
+        self.parse_latencies.append(seconds)
+        self.parsed_bytes_read += bytes_read
+
+    def record_report(self, quality: str, seconds: float, file_size: int):
+        """
+        作成したPDFの画質・所要時間（描画とPDF生成）・ファイルサイズを記録するメソッド
+        Args:
+            quality: 画質の表記
+            seconds: 所要時間（秒）
+            file_size: ファイルサイズ（バイト）
+        """
+        self.reports.append({"quality": quality, "seconds": seconds, "file_size": file_size})
+
+    def to_dict(self) -> dict:
+        """
+        実行プロファイルをdictにするメソッド
+        Returns:
+            dict: 実行プロファイル
+        """
+        stages = {}
+        for name, stage in self.stages.items():
+            items = stage["items"]
+            seconds = stage["seconds"]
+            stages[name] = {
+                **stage,
+                "items_per_second": items / seconds if items and seconds > 0 else None,
+            }
+        if self.parse_latencies and STAGE_PARSE in stages:
+            stages[STAGE_PARSE]["bytes_read"] = self.parsed_bytes_read
+
+        profile = {
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "wall_seconds": time.perf_counter() - self.start,
+            "cpu_count": os.cpu_count(),
+            "peak_rss_bytes": get_peak_rss(),
+            "stages": stages,
+            "reports": self.reports,
+        }
+        if self.parse_latencies:
+            latencies = sorted(self.parse_latencies)
+            profile["parse_latency_seconds"] = {
+                "count": len(latencies),
+                **{f"p{rank}": percentile(latencies, rank) for rank in LATENCY_PERCENTILES},
+                "max": latencies[-1],
+                "mean": sum(latencies) / len(latencies),
+            }
+        return profile
+
+    def log_summary(self):
+        """
+        処理段階ごとの計測値をログへ出力するメソッド
+        """
+        profile = self.to_dict()
+        for name, stage in profile["stages"].items():
+            logger.info(
+                "stage=%s seconds=%.3f items=%s items_per_second=%s bytes_read=%s",
+                name, stage["seconds"], stage["items"],
+                None if stage["items_per_second"] is None else f"{stage['items_per_second']:.1f}",
+                stage.get("bytes_read"))
+        for report in profile["reports"]:
+            logger.info("report quality=%s seconds=%.3f file_size=%d",
+                        report["quality"], report["seconds"], report["file_size"])
+        if "parse_latency_seconds" in profile:
+            logger.info("parse_latency_seconds=%s", profile["parse_latency_seconds"])
+        logger.info("wall_seconds=%.3f peak_rss_bytes=%s", profile["wall_seconds"], profile["peak_rss_bytes"])
+
+    def write(self, output_path: str):
+        """
+        実行プロファイルをJSONファイルへ出力するメソッド
+        Args:
+            output_path: 出力先ファイルパス
+        """
+        file_path = pathlib.Path(output_path)
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(file_path, "w", encoding="utf-8") as file:
+            json.dump(self.to_dict(), file, ensure_ascii=False, indent=2)
+
+
+@contextlib.contextmanager
+def cprofile_to(output_path: Optional[str]) -> Iterator[None]:
+    """
+    withブロックをcProfileで計測し、pstats形式で保存するコンテキストマネージャ
+    出力先がNoneの場合は計測しない
+    Args:
+        output_path: 出力先ファイルパス（`python -m pstats {ファイル}`で参照できる）
+    """
+    if output_path is None:
+        yield
+        return
+    import cProfile
+
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        pathlib.Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        profile.dump_stats(output_path)
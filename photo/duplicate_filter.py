@@ -0,0 +1,255 @@
+import hashlib
+import os
+import pathlib
+import time
+from typing import Iterable, Iterator, Optional, Tuple
+
+from photo.exif_header_reader import read_exif_header
+
+
+# 同じ写真かどうかの判定（EXIFフィンガープリント）に使用するタグ
+FINGERPRINT_TAG_ORDER = (
+    "Image Make", "Image Model", "EXIF DateTimeOriginal", "EXIF SubSecTimeOriginal", "EXIF ImageUniqueID",
+)
+FINGERPRINT_TAGS = frozenset(FINGERPRINT_TAG_ORDER)
+
+# 残すファイルの選び方
+#   first: 走査順で最初に見つかったファイル
+#   oldest: 更新日時が最も古いファイル（カメラで記録したオリジナルの可能性が高い）
+#   largest: ファイルサイズが最も大きいファイル（高画質の書き出し・現像結果）
+#   jpeg / tiff: 指定した形式のファイル（同じ形式の中では走査順）
+POLICY_FIRST = "first"
+POLICY_OLDEST = "oldest"
+POLICY_LARGEST = "largest"
+POLICY_JPEG = "jpeg"
+POLICY_TIFF = "tiff"
+DEDUP_POLICIES = (POLICY_FIRST, POLICY_OLDEST, POLICY_LARGEST, POLICY_JPEG, POLICY_TIFF)
+
+JPEG_SUFFIXES = (".jpg", ".jpeg")
+
+
+def create_fingerprint(picture_info: dict) -> Optional[bytes]:
+    """
+    EXIF情報から同じ写真を判定するためのフィンガープリントを作成する関数
+    連写は同じ秒に複数枚記録されるため、ImageUniqueIDか秒未満の撮影時刻がない場合は判定しない
+    全ファイル分を保持するため、タグの値そのものではなくハッシュ値にする
+    Args:
+        picture_info: EXIF情報dict
+    Returns:
+        bytes: フィンガープリント（判定に必要なタグがない場合はNone）
+    """
+    values = [str(picture_info.get(tag, "")).strip() for tag in FINGERPRINT_TAG_ORDER]
+    _, _, date_time_original, subsec, image_unique_id = values
+    if not (image_unique_id or (date_time_original and subsec)):
+        return None
+    return hashlib.blake2b("\0".join(values).encode("utf-8"), digest_size=16).digest()
+
+
+class DuplicateFilter:
+    """
+    重複画像の除外クラス
+    同じ写真のコピー（カメラのJPEG・編集後の書き出し・RAW現像のTIFFなど）を1枚として数える
+
+    1. 内容が同じファイル: ファイルサイズと先頭数KBのハッシュが一致する候補を、
+       ヘッダーのみ読んだEXIFフィンガープリントで確認し、残さないファイルはEXIF読込を行わない
+    2. 派生ファイル: サイズが異なるため1では見つからないコピーは、
+       EXIF読込の結果からフィンガープリントが既出のものを集計前に除外する
+
+    1・2とも先に判定したファイルを残すため、残すファイルの選び方（policy）の順に並べてから読み込む
+    （firstは走査順のまま順次判定し、走査・解析と並行して処理する）
+    """
+    # ハッシュを求めるファイル先頭のバイト数
+    HEAD_HASH_SIZE = 4096
+
+    def __init__(self, policy: str = POLICY_FIRST):
+        """
+        コンストラクタ
+        Args:
+            policy: 残すファイルの選び方（DEDUP_POLICIES）
+        """
+        if policy not in DEDUP_POLICIES:
+            raise ValueError(f"重複画像の選び方 '{policy}' は指定できません。")
+        self.policy = policy
+        # 内容が同じため読み込まずに除外したファイル数
+        self.identical_count = 0
+        # フィンガープリントが一致したため集計から除外したファイル数
+        self.derivative_count = 0
+        self.seen_fingerprints: set[bytes] = set()
+        # 内容が同じファイルの判定に使用する値（サイズごとの残したファイルパス、先頭のハッシュ、フィンガープリント）
+        self.kept_paths_by_size: dict[int, list[pathlib.Path]] = {}
+        self.head_hashes: dict[pathlib.Path, Optional[bytes]] = {}
+        self.identities: dict[pathlib.Path, Optional[bytes]] = {}
+        # 判定したファイル数と、ファイル情報の取得・判定の所要時間（秒）
+        self.file_count = 0
+        self.seconds = 0.0
+
+    @property
+    def removed_count(self) -> int:
+        """
+        除外したファイル数の合計
+        """
+        return self.identical_count + self.derivative_count
+
+    def order_files(self, file_paths: Iterable[pathlib.Path]) -> Iterator[pathlib.Path]:
+        """
+        内容が同じファイルを除外し、残すファイルの選び方の順に返すジェネレータ
+        firstは走査順のまま1件ずつ判定して返すため、全ファイルを保持せず走査・解析と並行して処理できる
+        それ以外の選び方は全ファイルを見るまで先頭が決まらないため、全ファイルを並べ替えてから返す
+        Args:
+            file_paths: 画像ファイルパス（ジェネレータ可）
+        Returns:
+            Iterator: 読み込む画像ファイルパス（優先するファイルが先）
+        """
+        files = self.iter_file_stats(file_paths)
+        if self.policy != POLICY_FIRST:
+            files = sorted(files, key=self.sort_key)
+        for file_path, size, _ in files:
+            start = time.perf_counter()
+            identical = self.is_identical_file(file_path, size)
+            self.seconds += time.perf_counter() - start
+            if identical:
+                self.identical_count += 1
+            else:
+                yield file_path
+
+    def iter_file_stats(self, file_paths: Iterable[pathlib.Path]) -> Iterator[Tuple[pathlib.Path, int, float]]:
+        """
+        画像ファイルのサイズと更新日時を取得するジェネレータ
+        Args:
+            file_paths: 画像ファイルパス（ジェネレータ可）
+        Returns:
+            Iterator: (ファイルパス, ファイルサイズ, 更新日時)
+        """
+        for file_path in file_paths:
+            start = time.perf_counter()
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                # 読込時のエラーとして記録させるため、そのまま残す
+                stat = None
+            self.file_count += 1
+            self.seconds += time.perf_counter() - start
+            yield file_path, stat.st_size if stat else -1, stat.st_mtime if stat else 0.0
+
+    def sort_key(self, file: Tuple[pathlib.Path, int, float]):
+        """
+        残すファイルの選び方に応じた並び順のキーを取得するメソッド（同順位は走査順）
+        Args:
+            file: (ファイルパス, ファイルサイズ, 更新日時)
+        """
+        file_path, size, mtime = file
+        if self.policy == POLICY_OLDEST:
+            return mtime
+        if self.policy == POLICY_LARGEST:
+            return -size
+        if self.policy == POLICY_JPEG:
+            return file_path.suffix.lower() not in JPEG_SUFFIXES
+        if self.policy == POLICY_TIFF:
+            return file_path.suffix.lower() in JPEG_SUFFIXES
+        return 0
+
+    def is_identical_file(self, file_path: pathlib.Path, size: int) -> bool:
+        """
+        先に残したファイルと内容が同じかを判定するメソッド（優先順に呼び出すこと）
+        サイズが同じファイルが既にある場合のみ先頭を読み、ハッシュが一致した候補をフィンガープリントで確認する
+        サイズごとに残したファイルパスを保持するため、最初のファイルは読まずに判定できる
+        Args:
+            file_path: 画像ファイルパス
+            size: ファイルサイズ（取得できない場合は-1）
+        Returns:
+            bool: 内容が同じか（Trueの場合は読み込まずに除外する）
+        """
+        if size <= 0:
+            return False
+        kept_paths = self.kept_paths_by_size.setdefault(size, [])
+        if kept_paths:
+            head_hash = self.get_head_hash(file_path)
+            if head_hash is None:
+                return False
+            for kept_path in kept_paths:
+                if self.get_head_hash(kept_path) != head_hash:
+                    continue
+                identity = self.get_identity(file_path)
+                if identity is not None and identity == self.get_identity(kept_path):
+                    return True
+        kept_paths.append(file_path)
+        return False
+
+    def get_head_hash(self, file_path: pathlib.Path) -> Optional[bytes]:
+        """
+        ファイル先頭のハッシュを取得するメソッド（求めた値は再利用する）
+        Args:
+            file_path: 画像ファイルパス
+        Returns:
+            bytes: ハッシュ値（読み込めない場合はNone）
+        """
+        if file_path not in self.head_hashes:
+            self.head_hashes[file_path] = self.hash_head(file_path)
+        return self.head_hashes[file_path]
+
+    def get_identity(self, file_path: pathlib.Path) -> Optional[bytes]:
+        """
+        サイズと先頭のハッシュが一致したファイルを比較する値を取得するメソッド（求めた値は再利用する）
+        EXIFフィンガープリントを使用し、作成できないファイル（撮影日時の未記録・破損など）はファイル全体のハッシュを使用する
+        Args:
+            file_path: 画像ファイルパス
+        Returns:
+            bytes: フィンガープリントまたはハッシュ値（読み込めない場合はNone）
+        """
+        if file_path not in self.identities:
+            picture_info = read_exif_header(file_path, FINGERPRINT_TAGS)
+            identity = None if picture_info is None else create_fingerprint(picture_info)
+            if identity is None:
+                identity = self.hash_content(file_path)
+            self.identities[file_path] = identity
+        return self.identities[file_path]
+
+    def hash_head(self, file_path: pathlib.Path) -> Optional[bytes]:
+        """
+        ファイル先頭のハッシュを求めるメソッド
+        Args:
+            file_path: 画像ファイルパス
+        Returns:
+            bytes: ハッシュ値（読み込めない場合はNone）
+        """
+        try:
+            with open(file_path, "rb") as file:
+                head = file.read(self.HEAD_HASH_SIZE)
+        except OSError:
+            return None
+        return hashlib.blake2b(head, digest_size=16).digest()
+
+    def hash_content(self, file_path: pathlib.Path) -> Optional[bytes]:
+        """
+        ファイル全体のハッシュを求めるメソッド（EXIFフィンガープリントで確認できない候補のみ使用）
+        Args:
+            file_path: 画像ファイルパス
+        Returns:
+            bytes: ハッシュ値（読み込めない場合はNone）
+        """
+        content_hash = hashlib.blake2b(digest_size=16, person=b"content")
+        try:
+            with open(file_path, "rb") as file:
+                for block in iter(lambda: file.read(1024 * 1024), b""):
+                    content_hash.update(block)
+        except OSError:
+            return None
+        return content_hash.digest()
+
+    def filter_records(self, picture_infos: Iterable[dict]) -> Iterator[dict]:
+        """
+        フィンガープリントが既出のEXIF情報を除外するジェネレータ
+        優先順に読み込まれるため、先に現れたファイルを残す
+        Args:
+            picture_infos: EXIF情報dictのイテラブル
+        Returns:
+            Iterator: 重複を除いたEXIF情報dict
+        """
+        for picture_info in picture_infos:
+            fingerprint = create_fingerprint(picture_info)
+            if fingerprint is not None:
+                if fingerprint in self.seen_fingerprints:
+                    self.derivative_count += 1
+                    continue
+                self.seen_fingerprints.add(fingerprint)
+            yield picture_info
@@ -0,0 +1,136 @@
+import json
+import os
+import pathlib
+import sqlite3
+from typing import AbstractSet, Iterable, Optional, Tuple
+
+
+class ExifCache:
+    """
+    EXIF情報の永続キャッシュクラス
+    ファイルパス・サイズ・更新日時をキーに、抽出済みのImage/EXIFタグをSQLiteへ保存する
+    保持するタグを絞り込んでいる場合は、キャッシュにないタグが要求された時点で全エントリを作り直す
+    """
+    # スキーマを変更した場合はインクリメントする（不一致時はキャッシュを作り直す）
+    SCHEMA_VERSION = 4
+    # キャッシュファイル出力先
+    DEFAULT_CACHE_PATH = "cache/exif_cache.sqlite3"
+
+    def __init__(self, cache_path: str = DEFAULT_CACHE_PATH, tags: Optional[AbstractSet[str]] = None):
+        """
+        コンストラクタ
+        Args:
+            cache_path: キャッシュファイルパス
+            tags: 必要なタグ名（未指定時は全てのImage/EXIFタグ）
+        """
+        self.cache_path = pathlib.Path(cache_path)
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(self.cache_path)
+        self.initialize_schema()
+        # キャッシュのエントリが保持しているタグ（EXIF読込はこのタグで行う）
+        self.tags = self.resolve_tags(None if tags is None else frozenset(tags))
+
+    def __enter__(self) -> "ExifCache":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def initialize_schema(self):
+        """
+        スキーマのバージョンを確認し、必要に応じてテーブルを作り直すメソッド
+        """
+        version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        if version == self.SCHEMA_VERSION:
+            return
+        with self.connection:
+            self.connection.execute("DROP TABLE IF EXISTS exif_entries")
+            self.connection.execute(
+                """
+                CREATE TABLE exif_entries (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    tags TEXT NOT NULL
+                )
+                """)
+            self.connection.execute("DROP TABLE IF EXISTS cache_meta")
+            self.connection.execute(
+                "CREATE TABLE cache_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self.connection.execute(
+                f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+
+    def resolve_tags(self, tags: Optional[frozenset[str]]) -> Optional[frozenset[str]]:
+        """
+        キャッシュのエントリが保持するタグを決めるメソッド
+        必要なタグが全て保持されている場合はそのまま使用し、不足している場合は
+        保持するタグに必要なタグを加えたうえで、エントリを全て削除して読み直させる
+        Args:
+            tags: 必要なタグ名（Noneの場合は全てのImage/EXIFタグ）
+        Returns:
+            frozenset: キャッシュのエントリが保持するタグ名（Noneの場合は全てのImage/EXIFタグ）
+        """
+        row = self.connection.execute("SELECT value FROM cache_meta WHERE key = 'tags'").fetchone()
+        if row is not None:
+            stored_tags = json.loads(row[0])
+            stored_tags = None if stored_tags is None else frozenset(stored_tags)
+            if stored_tags is None or (tags is not None and tags <= stored_tags):
+                return stored_tags
+            tags = None if tags is None else tags | stored_tags
+        with self.connection:
+            self.connection.execute("DELETE FROM exif_entries")
+            self.connection.execute(
+                "INSERT OR REPLACE INTO cache_meta (key, value) VALUES ('tags', ?)",
+                (json.dumps(None if tags is None else sorted(tags)),))
+        return tags
+
+    def load_entries(self) -> dict[str, Tuple[int, int, str]]:
+        """
+        キャッシュ済みエントリを一括で読み込むメソッド
+        Returns:
+            dict: ファイルパスと(サイズ, 更新日時, タグJSON)のdict
+        """
+        cursor = self.connection.execute(
+            "SELECT path, size, mtime_ns, tags FROM exif_entries")
+        return {path: (size, mtime_ns, tags) for path, size, mtime_ns, tags in cursor}
+
+    def store_entries(self, entries: Iterable[Tuple[str, int, int, dict]]):
+        """
+        エントリを登録・更新するメソッド
+        Args:
+            entries: (ファイルパス, サイズ, 更新日時, EXIF情報dict)のリスト
+        """
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO exif_entries (path, size, mtime_ns, tags) VALUES (?, ?, ?, ?)",
+                ((path, size, mtime_ns, json.dumps(tags, ensure_ascii=False))
+                 for path, size, mtime_ns, tags in entries))
+
+    def delete_entries(self, paths: Iterable[str]):
+        """
+        エントリを削除するメソッド
+        Args:
+            paths: ファイルパスリスト
+        """
+        with self.connection:
+            self.connection.executemany(
+                "DELETE FROM exif_entries WHERE path = ?",
+                ((path,) for path in paths))
+
+    def prune_missing(self, paths: Iterable[str]) -> int:
+        """
+        指定エントリのうち、ファイルが削除されているものをキャッシュから取り除くメソッド
+        Args:
+            paths: 今回の走査で見つからなかったファイルパスリスト
+        Returns:
+            int: 削除件数
+        """
+        missing_paths = [path for path in paths if not os.path.exists(path)]
+        self.delete_entries(missing_paths)
+        return len(missing_paths)
+
+    def close(self):
+        """
+        キャッシュファイルを閉じるメソッド
+        """
+        self.connection.close()
@@ -0,0 +1,136 @@
+from typing import Optional, Sequence
+
+import numpy as np
+
+
+# DateTimeOriginalの書式（"YYYY:MM:DD HH:MM:SS"）の文字数と、数字・区切り文字の位置
+DATETIME_WIDTH = 19
+DATETIME_DIGIT_POSITIONS = [0, 1, 2, 3, 5, 6, 8, 9, 11, 12, 14, 15, 17, 18]
+DATETIME_SEPARATORS = {4: ":", 7: ":", 10: " ", 13: ":", 16: ":"}
+# SubSecTimeOriginalとして読み取る最大桁数（ナノ秒）
+SUBSEC_WIDTH = 9
+# OffsetTimeOriginalの書式（"+HH:MM"）の文字数
+OFFSET_WIDTH = 6
+# datetime64[ns]で表せる年の範囲
+MIN_YEAR = 1678
+MAX_YEAR = 2261
+# UTCとの時差が記録されていないことを示す値（分）
+UTC_OFFSET_MISSING = np.iinfo(np.int16).min
+
+NAT = np.datetime64("NaT", "ns")
+
+
+def to_code_points(values: Sequence[str], width: int) -> np.ndarray:
+    """
+    文字列リストを固定長の文字コード配列に変換する関数
+    numpyの固定長Unicode配列（1文字4バイト）をそのまま整数として参照するため、1件ずつの変換は行わない
+    Args:
+        values: 文字列リスト（未記録は空文字列）
+        width: 文字数（超える部分は切り捨て、足りない部分は0で埋める）
+    Returns:
+        ndarray: (件数, 文字数)のuint32配列
+    """
+    return np.array(values, dtype=f"U{width}").view(np.uint32).reshape(len(values), width)
+
+
+def digits_at(codes: np.ndarray, positions: list[int]) -> np.ndarray:
+    """
+    指定位置の文字を数字として連結した整数を求める関数
+    Args:
+        codes: 文字コード配列
+        positions: 上位桁から順の文字位置
+    Returns:
+        ndarray: 整数配列（数字以外を含む場合の値は不定のため、呼び出し側で除外すること）
+    """
+    value = np.zeros(len(codes), dtype=np.int64)
+    for position in positions:
+        value = value * 10 + (codes[:, position].astype(np.int64) - ord("0"))
+    return value
+
+
+def parse_datetime_originals(values: Sequence[str], subsecs: Optional[Sequence[str]] = None) -> np.ndarray:
+    """
+    DateTimeOriginalの文字列を一括でdatetime64[ns]配列に変換する関数
+    固定長の書式のため、文字位置ごとに数字を取り出して年月日・時分秒を配列演算で求める
+    書式・日付が不正な値はNaTとする
+    Args:
+        values: DateTimeOriginalの文字列リスト（未記録は空文字列）
+        subsecs: SubSecTimeOriginalの文字列リスト（未記録は空文字列、指定時は秒未満を加える）
+    Returns:
+        ndarray: datetime64[ns]配列
+    """
+    if len(values) == 0:
+        return np.array([], dtype="datetime64[ns]")
+    # 1文字多く取り出し、書式より長い値も不正とする
+    codes = to_code_points(values, DATETIME_WIDTH + 1)
+    digits = codes[:, DATETIME_DIGIT_POSITIONS]
+    valid = np.all((digits >= ord("0")) & (digits <= ord("9")), axis=1) & (codes[:, DATETIME_WIDTH] == 0)
+    for position, separator in DATETIME_SEPARATORS.items():
+        valid &= codes[:, position] == ord(separator)
+
+    years = digits_at(codes, [0, 1, 2, 3])
+    months = digits_at(codes, [5, 6])
+    days = digits_at(codes, [8, 9])
+    hours = digits_at(codes, [11, 12])
+    minutes = digits_at(codes, [14, 15])
+    seconds = digits_at(codes, [17, 18])
+    valid &= (years >= MIN_YEAR) & (years <= MAX_YEAR) & (months >= 1) & (months <= 12)
+    # 秒の60（うるう秒）は従来の変換方法（pandas.to_datetime）と同じく次の分の0秒として扱う
+    valid &= (hours <= 23) & (minutes <= 59) & (seconds <= 60)
+
+    # 不正な値は計算上のあふれを避けるため1970/01/01として求め、最後にNaTへ置き換える
+    month_index = np.where(valid, (years - 1970) * 12 + months - 1, 0)
+    month_starts = month_index.astype("datetime64[M]").astype("datetime64[D]")
+    days_in_month = ((month_index + 1).astype("datetime64[M]").astype("datetime64[D]") - month_starts).astype(np.int64)
+    valid &= (days >= 1) & (days <= days_in_month)
+
+    day_offsets = np.where(valid, days - 1, 0)
+    second_offsets = np.where(valid, hours * 3600 + minutes * 60 + seconds, 0)
+    captured_ats = ((month_starts + day_offsets).astype("datetime64[ns]")
+                    + (second_offsets * 1_000_000_000).astype("timedelta64[ns]"))
+    if subsecs is not None:
+        captured_ats = captured_ats + parse_subsec_times(subsecs).astype("timedelta64[ns]")
+    captured_ats[~valid] = NAT
+    return captured_ats
+
+
+def parse_subsec_times(values: Sequence[str]) -> np.ndarray:
+    """
+    SubSecTimeOriginal（秒未満の数字列。"05"は0.05秒）を一括でナノ秒に変換する関数
+    先頭から続く数字のみ使用し、数字で始まらない値は0とする
+    Args:
+        values: SubSecTimeOriginalの文字列リスト（未記録は空文字列）
+    Returns:
+        ndarray: ナノ秒のint64配列
+    """
+    if len(values) == 0:
+        return np.array([], dtype=np.int64)
+    codes = to_code_points(values, SUBSEC_WIDTH).astype(np.int64)
+    is_digit = (codes >= ord("0")) & (codes <= ord("9"))
+    # 先頭から連続する数字のみ有効とする
+    leading_digits = np.cumprod(is_digit, axis=1).astype(bool)
+    weights = 10 ** np.arange(SUBSEC_WIDTH - 1, -1, -1, dtype=np.int64)
+    return np.where(leading_digits, codes - ord("0"), 0) @ weights
+
+
+def parse_utc_offsets(values: Sequence[str]) -> np.ndarray:
+    """
+    OffsetTimeOriginal（"+09:00"形式）を一括でUTCとの時差（分）に変換する関数
+    書式が不正な値はUTC_OFFSET_MISSINGとする
+    Args:
+        values: OffsetTimeOriginalの文字列リスト（未記録は空文字列）
+    Returns:
+        ndarray: 時差（分）のint16配列
+    """
+    if len(values) == 0:
+        return np.array([], dtype=np.int16)
+    codes = to_code_points(values, OFFSET_WIDTH)
+    digits = codes[:, [1, 2, 4, 5]]
+    signs = np.where(codes[:, 0] == ord("-"), -1, 1)
+    valid = (np.isin(codes[:, 0], [ord("+"), ord("-")]) & (codes[:, 3] == ord(":"))
+             & np.all((digits >= ord("0")) & (digits <= ord("9")), axis=1))
+    hours = digits_at(codes, [1, 2])
+    minutes = digits_at(codes, [4, 5])
+    valid &= (hours <= 14) & (minutes <= 59)
+    offsets = signs * (hours * 60 + minutes)
+    return np.where(valid, offsets, UTC_OFFSET_MISSING).astype(np.int16)
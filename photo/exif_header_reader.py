@@ -0,0 +1,381 @@
+from fractions import Fraction
+import io
+import mmap
+import pathlib
+import struct
+from typing import AbstractSet, Optional, Tuple
+
+
+# レポートで使用するタグ (IFD名, タグID) とタグ名
+# キー名はexifreadの出力 ("{IFD名} {タグ名}") に合わせる
+REPORT_TAGS = {
+    ("Image", 0x010F): "Image Make",
+    ("Image", 0x0110): "Image Model",
+    ("Image", 0x0112): "Image Orientation",
+    ("EXIF", 0x829D): "EXIF FNumber",
+    ("EXIF", 0x9003): "EXIF DateTimeOriginal",
+    ("EXIF", 0x9011): "EXIF OffsetTimeOriginal",
+    ("EXIF", 0x9291): "EXIF SubSecTimeOriginal",
+    ("EXIF", 0xA002): "EXIF ExifImageWidth",
+    ("EXIF", 0xA003): "EXIF ExifImageLength",
+    ("EXIF", 0xA405): "EXIF FocalLengthIn35mmFilm",
+    ("EXIF", 0xA420): "EXIF ImageUniqueID",
+    ("EXIF", 0xA434): "EXIF LensModel",
+}
+# 高速読込で取得できるタグ名
+REPORT_TAG_NAMES = frozenset(REPORT_TAGS.values())
+# 数値ではなく名称で表示されるタグの値（exifreadの表示用文字列に合わせる）
+PRINTABLE_VALUES = {
+    "Image Orientation": {
+        1: "Horizontal (normal)",
+        2: "Mirrored horizontal",
+        3: "Rotated 180",
+        4: "Mirrored vertical",
+        5: "Mirrored horizontal then rotated 90 CCW",
+        6: "Rotated 90 CW",
+        7: "Mirrored horizontal then rotated 90 CW",
+        8: "Rotated 90 CCW",
+    },
+}
+# IFD0内のEXIF IFDへのポインタタグ
+EXIF_IFD_POINTER_TAG = 0x8769
+
+# TIFFフィールドタイプ: ASCII, SHORT, LONG, RATIONAL
+TYPE_ASCII = 2
+TYPE_SHORT = 3
+TYPE_LONG = 4
+TYPE_RATIONAL = 5
+TYPE_SIZES = {TYPE_ASCII: 1, TYPE_SHORT: 2, TYPE_LONG: 4, TYPE_RATIONAL: 8}
+
+# JPEGの先頭から読み込むバイト数（通常はAPP1セグメントまで収まる）
+JPEG_HEAD_SIZE = 64 * 1024
+# APP1に到達するまでに許容するマーカー数
+JPEG_MAX_MARKERS = 16
+# 1つのIFDに許容するエントリ数（破損ファイル対策）
+MAX_IFD_ENTRIES = 1024
+
+
+def supports_tags(tags: Optional[AbstractSet[str]]) -> bool:
+    """
+    要求されたタグを高速読込のみで取得できるかを判定する関数
+    tags未指定は（EXIF読込・キャッシュと同じく）全てのImage/EXIFタグを意味するため、高速読込では取得できない
+    Args:
+        tags: 必要なタグ名（Noneの場合は全てのImage/EXIFタグ）
+    Returns:
+        bool: REPORT_TAGSのタグのみが要求された場合はTrue
+    """
+    return tags is not None and tags <= REPORT_TAG_NAMES
+
+
+class UnsupportedHeader(Exception):
+    """
+    高速読込で扱えないヘッダーであることを示す例外
+    呼び出し元はexifreadによる通常の解析へフォールバックする
+    """
+
+
+class CountingFileIO(io.FileIO):
+    """
+    ファイルから実際に読み込んだバイト数を数えるFileIO
+    BufferedReaderで包んだ場合も、バッファへの読込（readinto）を数えるため先読み分を含む
+    """
+
+    def __init__(self, file_path: pathlib.Path):
+        """
+        コンストラクタ
+        Args:
+            file_path: ファイルパス（読込専用で開く）
+        """
+        super().__init__(file_path, "rb")
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = super().read(size)
+        self.bytes_read += len(data or b"")
+        return data
+
+    def readall(self) -> bytes:
+        data = super().readall()
+        self.bytes_read += len(data)
+        return data
+
+    def readinto(self, buffer) -> int:
+        size = super().readinto(buffer)
+        self.bytes_read += size or 0
+        return size
+
+
+def read_exif_header(file_path: pathlib.Path, tags: Optional[AbstractSet[str]] = None) -> Optional[dict]:
+    """
+    JPEG/TIFFのヘッダー部分のみを読み、レポートで使用するタグを取得する関数
+    値はexifreadの表示用文字列と同じ形式で返す
+    Args:
+        file_path: 画像ファイルパス
+        tags: 取得するタグ名（未指定時はREPORT_TAGSの全タグ）
+    Returns:
+        dict: EXIF情報dict（高速読込で扱えない場合はNone）
+    """
+    return read_exif_header_counted(file_path, tags)[0]
+
+
+def read_exif_header_counted(file_path: pathlib.Path,
+                             tags: Optional[AbstractSet[str]] = None) -> Tuple[Optional[dict], int]:
+    """
+    read_exif_headerと同じ処理で、ファイルから読み込んだバイト数も返す関数（実行プロファイル計測用）
+    Args:
+        file_path: 画像ファイルパス
+        tags: 取得するタグ名（未指定時はREPORT_TAGSの全タグ）
+    Returns:
+        tuple: (EXIF情報dict（高速読込で扱えない場合はNone）, 読み込んだバイト数)
+    """
+    file = None
+    try:
+        with CountingFileIO(file_path) as file:
+            picture_info = read_file_header(file, tags)
+    except (UnsupportedHeader, OSError, ValueError, struct.error):
+        picture_info = None
+    return picture_info, 0 if file is None else file.bytes_read
+
+
+def read_file_header(file: CountingFileIO, tags: Optional[AbstractSet[str]] = None) -> Optional[dict]:
+    """
+    開いたファイルのヘッダー部分からレポートで使用するタグを取得する関数
+    Args:
+        file: 画像ファイル（バッファなし）
+        tags: 取得するタグ名（未指定時はREPORT_TAGSの全タグ）
+    Returns:
+        dict: EXIF情報dict（EXIFがない場合はNone）
+    """
+    head = file.read(JPEG_HEAD_SIZE)
+    if head[:2] == b"\xff\xd8":
+        tiff = read_jpeg_app1(file, head)
+    elif head[:4] in (b"II*\x00", b"MM\x00*"):
+        # TIFFはIFDがファイル後方にあることが多いため、mmapで必要なページのみ読む
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            spans = []
+            try:
+                return parse_tiff(mapped, tags, spans)
+            finally:
+                file.bytes_read += count_mapped_bytes(spans, len(head), len(mapped))
+    else:
+        return None
+    if tiff is None:
+        return None
+    return parse_tiff(tiff, tags)
+
+
+def count_mapped_bytes(spans: list[Tuple[int, int]], head_size: int, size: int) -> int:
+    """
+    mmapで参照した範囲のうち、先頭の読込範囲外のページのバイト数を求める関数
+    Args:
+        spans: 参照した(オフセット, バイト数)のリスト
+        head_size: 先に読み込んだファイル先頭のバイト数
+        size: ファイルサイズ
+    Returns:
+        int: ページ単位に切り上げたバイト数
+    """
+    pages = set()
+    for offset, length in spans:
+        end = min(offset + length, size)
+        if end <= head_size:
+            continue
+        start = max(offset, head_size)
+        pages.update(range(start // mmap.PAGESIZE, (end - 1) // mmap.PAGESIZE + 1))
+    return sum(min(mmap.PAGESIZE, size - page * mmap.PAGESIZE) for page in pages)
+
+
+def parse_exif_head(head: bytes, tags: Optional[AbstractSet[str]] = None) -> Optional[dict]:
+    """
+    先読みしたファイル先頭のバイト列のみからレポートで使用するタグを取得する関数
+    ファイルへは再アクセスしないため、APP1やIFDが先頭のバイト列に収まらない場合はNoneを返す
+    Args:
+        head: ファイル先頭のバイト列
+        tags: 取得するタグ名（未指定時はREPORT_TAGSの全タグ）
+    Returns:
+        dict: EXIF情報dict（先頭のバイト列のみで扱えない場合はNone）
+    """
+    try:
+        if head[:2] == b"\xff\xd8":
+            tiff = read_jpeg_app1(PrefetchedHead(), head)
+        elif head[:4] in (b"II*\x00", b"MM\x00*"):
+            tiff = head
+        else:
+            return None
+        if tiff is None:
+            return None
+        return parse_tiff(tiff, tags)
+    except (UnsupportedHeader, ValueError, struct.error):
+        return None
+
+
+class PrefetchedHead:
+    """
+    先読みしたバイト列の範囲外を読もうとした場合に、ファイルの代わりにUnsupportedHeaderを送出するクラス
+    """
+
+    def seek(self, position: int):
+        raise UnsupportedHeader("header exceeds prefetched bytes")
+
+
+def read_jpeg_app1(file, head: bytes) -> Optional[bytes]:
+    """
+    JPEGのマーカーをAPP1まで辿り、EXIFのTIFF構造部分を取り出す関数
+    Args:
+        file: 画像ファイル（バッファなし）
+        head: ファイル先頭のバイト列
+    Returns:
+        bytes: TIFFヘッダー以降のバイト列（APP1が見つからない場合はNone）
+    """
+    app1 = find_jpeg_app1(file, head)
+    if app1 is None:
+        return None
+    return bytes(app1[1])
+
+
+def find_jpeg_app1(file, head: bytes) -> Optional[Tuple[int, memoryview]]:
+    """
+    JPEGのマーカーをAPP1まで辿り、EXIFのTIFF構造部分の位置とバイト列を取得する関数
+    APP1が先頭のバイト列に収まる場合はコピーせずにその範囲を参照する
+    Args:
+        file: 画像ファイル（バッファなし）
+        head: ファイル先頭のバイト列
+    Returns:
+        tuple: (TIFFヘッダーのファイル先頭からの位置, TIFFヘッダー以降のバイト列)（APP1が見つからない場合はNone）
+    """
+    position = 2
+    for _ in range(JPEG_MAX_MARKERS):
+        if position + 4 > len(head):
+            # 先頭バッファに収まらない場合はマーカーヘッダーのみ追加で読む
+            file.seek(position)
+            marker_header = file.read(4)
+        else:
+            marker_header = head[position:position + 4]
+        if len(marker_header) < 4 or marker_header[0] != 0xFF:
+            return None
+        marker = marker_header[1]
+        # SOS/EOIに到達した場合はEXIFなし
+        if marker in (0xD9, 0xDA):
+            return None
+        length = struct.unpack(">H", marker_header[2:4])[0]
+        if marker == 0xE1:
+            start = position + 4
+            end = position + 2 + length
+            if end <= len(head):
+                segment = memoryview(head)[start:end]
+            else:
+                file.seek(start)
+                segment = memoryview(file.read(end - start))
+            if segment[:6] == b"Exif\x00\x00":
+                return start + 6, segment[6:]
+        position += 2 + length
+    return None
+
+
+def parse_tiff(buffer, tags: Optional[AbstractSet[str]] = None,
+               spans: Optional[list[Tuple[int, int]]] = None) -> dict:
+    """
+    TIFF構造からIFD0とEXIF IFDのみを辿り、対象タグを取得する関数
+    Args:
+        buffer: TIFFヘッダーから始まるバイト列（bytesまたはmmap）
+        tags: 取得するタグ名（未指定時はREPORT_TAGSの全タグ）
+        spans: 参照した(オフセット, バイト数)を追加するリスト（mmapの読込量の計測用）
+    Returns:
+        dict: EXIF情報dict
+    """
+    byte_order = buffer[:2]
+    if byte_order == b"II":
+        endian = "<"
+    elif byte_order == b"MM":
+        endian = ">"
+    else:
+        raise UnsupportedHeader("unknown byte order")
+
+    picture_info = {}
+    ifd0_offset = struct.unpack_from(endian + "I", buffer, 4)[0]
+    exif_offset = parse_ifd(buffer, endian, ifd0_offset, "Image", picture_info, tags, spans)
+    if exif_offset:
+        parse_ifd(buffer, endian, exif_offset, "EXIF", picture_info, tags, spans)
+    return picture_info
+
+
+def parse_ifd(buffer, endian: str, ifd_offset: int, ifd_name: str, picture_info: dict,
+              tags: Optional[AbstractSet[str]] = None,
+              spans: Optional[list[Tuple[int, int]]] = None) -> Optional[int]:
+    """
+    1つのIFDを解析し、対象タグをpicture_infoへ格納する関数
+    対象外のタグは値を変換せずに読み飛ばす
+    Args:
+        buffer: TIFFヘッダーから始まるバイト列
+        endian: structのバイトオーダー指定
+        ifd_offset: IFDのオフセット
+        ifd_name: IFD名 ("Image" / "EXIF")
+        picture_info: 格納先dict
+        tags: 取得するタグ名（未指定時はREPORT_TAGSの全タグ）
+        spans: 参照した(オフセット, バイト数)を追加するリスト
+    Returns:
+        int: EXIF IFDへのオフセット（IFD0以外、または存在しない場合はNone）
+    """
+    entry_count = struct.unpack_from(endian + "H", buffer, ifd_offset)[0]
+    if entry_count > MAX_IFD_ENTRIES:
+        raise UnsupportedHeader("too many IFD entries")
+    if spans is not None:
+        spans.append((ifd_offset, 2 + entry_count * 12))
+
+    exif_offset = None
+    for index in range(entry_count):
+        entry = ifd_offset + 2 + index * 12
+        tag, field_type, count = struct.unpack_from(endian + "HHI", buffer, entry)
+        if ifd_name == "Image" and tag == EXIF_IFD_POINTER_TAG:
+            exif_offset = struct.unpack_from(endian + "I", buffer, entry + 8)[0]
+            continue
+        tag_name = REPORT_TAGS.get((ifd_name, tag))
+        if tag_name is None or (tags is not None and tag_name not in tags):
+            continue
+        value = decode_value(buffer, endian, entry, field_type, count, spans)
+        printable_values = PRINTABLE_VALUES.get(tag_name)
+        if printable_values is not None:
+            value = printable_values.get(int(value), value)
+        picture_info[tag_name] = value
+    return exif_offset
+
+
+def decode_value(buffer, endian: str, entry: int, field_type: int, count: int,
+                 spans: Optional[list[Tuple[int, int]]] = None) -> str:
+    """
+    IFDエントリの値をexifreadの表示用文字列と同じ形式で取得する関数
+    Args:
+        buffer: TIFFヘッダーから始まるバイト列
+        endian: structのバイトオーダー指定
+        entry: IFDエントリのオフセット
+        field_type: フィールドタイプ
+        count: 値の個数
+        spans: 参照した(オフセット, バイト数)を追加するリスト
+    Returns:
+        str: 表示用文字列
+    """
+    type_size = TYPE_SIZES.get(field_type)
+    if type_size is None or (field_type != TYPE_ASCII and count != 1):
+        raise UnsupportedHeader("unsupported field type")
+
+    # 4バイト以内の値はエントリ内に直接格納される
+    if count * type_size > 4:
+        value_offset = struct.unpack_from(endian + "I", buffer, entry + 8)[0]
+    else:
+        value_offset = entry + 8
+    if value_offset + count * type_size > len(buffer):
+        raise UnsupportedHeader("value out of range")
+    if spans is not None:
+        spans.append((value_offset, count * type_size))
+
+    if field_type == TYPE_ASCII:
+        raw = bytes(buffer[value_offset:value_offset + count])
+        # NUL以降は破棄する（exifreadと同じ扱い）
+        return raw.split(b"\x00", 1)[0].decode("utf-8")
+    if field_type == TYPE_SHORT:
+        return str(struct.unpack_from(endian + "H", buffer, value_offset)[0])
+    if field_type == TYPE_LONG:
+        return str(struct.unpack_from(endian + "I", buffer, value_offset)[0])
+    numerator, denominator = struct.unpack_from(endian + "II", buffer, value_offset)
+    if denominator == 0:
+        raise UnsupportedHeader("zero denominator")
+    return str(Fraction(numerator, denominator))
@@ -0,0 +1,443 @@
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+import functools
+import io
+import itertools
+import json
+import os
+import pathlib
+import time
+from typing import AbstractSet, Iterable, Iterator, Optional, Tuple
+
+import exifread
+
+from instrumentation.run_profiler import RunProfiler
+from photo.exif_cache import ExifCache
+from photo.exif_header_reader import (
+    JPEG_HEAD_SIZE, CountingFileIO, parse_exif_head, read_exif_header_counted, supports_tags,
+)
+
+
+# レポートで保持するタグの接頭辞
+EXIF_TAG_PREFIXES = ("Image ", "EXIF ")
+# ファイルパスを付加する場合のキー（タグ名と重ならない名前にする）
+FILE_PATH_KEY = "File Path"
+
+
+def read_exif_file(file_path: pathlib.Path,
+                   tags: Optional[AbstractSet[str]] = None) -> Tuple[Optional[dict], Optional[str]]:
+    """
+    1ファイル分のEXIF情報を読み込む関数
+    プロセスプールからも呼び出すため、モジュール直下に定義する
+    ヘッダーのみを読む高速読込を優先し、扱えない形式の場合はexifreadで解析する
+    高速読込はREPORT_TAGSのみ取得するため、それ以外のタグが必要な場合（tags未指定を含む）はexifreadで解析する
+    Args:
+        file_path: 画像ファイルパス
+        tags: 保持するタグ名（未指定時は全てのImage/EXIFタグ）
+    Returns:
+        tuple: (EXIF情報dict, エラーメッセージ)
+    """
+    picture_info, error, _ = read_exif_file_counted(file_path, tags)
+    return picture_info, error
+
+
+def read_exif_file_counted(file_path: pathlib.Path,
+                           tags: Optional[AbstractSet[str]] = None) -> Tuple[Optional[dict], Optional[str], int]:
+    """
+    read_exif_fileと同じ処理で、ファイルから読み込んだバイト数も返す関数（実行プロファイル計測用）
+    Args:
+        file_path: 画像ファイルパス
+        tags: 保持するタグ名（未指定時は全てのImage/EXIFタグ）
+    Returns:
+        tuple: (EXIF情報dict, エラーメッセージ, 読み込んだバイト数（高速読込とexifreadの合計）)
+    """
+    bytes_read = 0
+    if supports_tags(tags):
+        picture_info, bytes_read = read_exif_header_counted(file_path, tags)
+        if picture_info is not None:
+            return picture_info, None, bytes_read
+
+    raw_file = None
+    try:
+        raw_file = CountingFileIO(file_path)
+        with io.BufferedReader(raw_file) as file:
+            file_tags = exifread.process_file(file, details=False)
+    except Exception as e:
+        return None, str(e), bytes_read + (0 if raw_file is None else raw_file.bytes_read)
+    bytes_read += raw_file.bytes_read
+
+    # IfdTagはプロセス間受け渡しが重いため、表示用文字列に変換して保持する
+    # 保持するタグが指定された場合は、それ以外のタグを文字列に変換しない
+    picture_info = {}
+    for tag, value in file_tags.items():
+        keep = tag in tags if tags is not None else tag.startswith(EXIF_TAG_PREFIXES)
+        if keep:
+            picture_info[tag] = str(value)
+    return picture_info, None, bytes_read
+
+
+def read_exif_file_timed(file_path: pathlib.Path,
+                         tags: Optional[AbstractSet[str]] = None) -> Tuple[Optional[dict], Optional[str], float, int]:
+    """
+    read_exif_fileの結果に解析時間と読み込んだバイト数を加えて返す関数（実行プロファイル計測用）
+    Args:
+        file_path: 画像ファイルパス
+        tags: 保持するタグ名（未指定時は全てのImage/EXIFタグ）
+    Returns:
+        tuple: (EXIF情報dict, エラーメッセージ, 解析時間（秒）, 読み込んだバイト数)
+    """
+    start = time.perf_counter()
+    picture_info, error, bytes_read = read_exif_file_counted(file_path, tags)
+    return picture_info, error, time.perf_counter() - start, bytes_read
+
+
+def read_file_head(file_path: pathlib.Path,
+                   size: int = JPEG_HEAD_SIZE) -> Tuple[Optional[bytes], Optional[str], float]:
+    """
+    ファイル先頭のバイト列を1回の読込で取得する関数（先読みスレッドから呼び出す）
+    Args:
+        file_path: 画像ファイルパス
+        size: 読み込むバイト数
+    Returns:
+        tuple: (ファイル先頭のバイト列, エラーメッセージ, 読込時間（秒）)
+    """
+    start = time.perf_counter()
+    try:
+        with open(file_path, "rb", buffering=0) as file:
+            head = file.read(size)
+    except OSError as e:
+        return None, str(e), time.perf_counter() - start
+    return head, None, time.perf_counter() - start
+
+
+def read_prefetched_exif(file_path: pathlib.Path, head: bytes,
+                         tags: Optional[AbstractSet[str]] = None) -> Tuple[Optional[dict], Optional[str], int]:
+    """
+    先読みしたファイル先頭のバイト列からEXIF情報を読み込む関数
+    先頭のバイト列に収まらない場合や高速読込で扱えない形式の場合は、ファイルを開き直して解析する
+    Args:
+        file_path: 画像ファイルパス
+        head: ファイル先頭のバイト列
+        tags: 保持するタグ名（未指定時は全てのImage/EXIFタグ）
+    Returns:
+        tuple: (EXIF情報dict, エラーメッセージ, 開き直した場合に追加で読み込んだバイト数)
+    """
+    if supports_tags(tags):
+        picture_info = parse_exif_head(head, tags)
+        if picture_info is not None:
+            return picture_info, None, 0
+    return read_exif_file_counted(file_path, tags)
+
+
+def read_prefetched_chunk(items: list[Tuple[pathlib.Path, Optional[bytes], Optional[str]]],
+                          tags: Optional[AbstractSet[str]] = None) -> list[tuple]:
+    """
+    先読みしたファイル先頭のバイト列をチャンク単位で解析する関数（プロセスプールから呼び出す）
+    Args:
+        items: (画像ファイルパス, ファイル先頭のバイト列, 先読み時のエラーメッセージ)のリスト
+        tags: 保持するタグ名（未指定時は全てのImage/EXIFタグ）
+    Returns:
+        list: (EXIF情報dict, エラーメッセージ, 解析時間（秒）, 開き直した場合に追加で読み込んだバイト数)のリスト
+    """
+    results = []
+    for file_path, head, error in items:
+        if error is not None:
+            results.append((None, error, 0.0, 0))
+            continue
+        start = time.perf_counter()
+        picture_info, error, bytes_read = read_prefetched_exif(file_path, head, tags)
+        results.append((picture_info, error, time.perf_counter() - start, bytes_read))
+    return results
+
+
+class ExifReader:
+    """
+    EXIF情報読込クラス
+    workersが2以上の場合はプロセスプールで並列に読み込む
+    入力はジェネレータでもよく、一定件数ずつ取り出して処理するため
+    フォルダ走査と並行してEXIF読込を進められる
+    io_threadsを指定した場合は、ネットワークドライブ向けにスレッドプールで各ファイルの先頭を先読みし、
+    読み込んだバイト列をチャンク単位でプロセスプールへ渡して解析する（読込の往復待ちを同時実行数分だけ重ねる）
+    tagsを指定した場合は、レポートで使用するタグのみ変換して保持する
+    include_pathsを指定した場合は、EXIF情報dictにファイルパス（FILE_PATH_KEY）を付加する（キャッシュには保存しない）
+    """
+    # チャンク単位でワーカーへ渡すファイル数
+    DEFAULT_CHUNK_SIZE = 64
+    # 1バッチあたりのチャンク数（ワーカー1つあたり）
+    CHUNKS_PER_WORKER = 4
+    # 先読みスレッド1つあたりの既定の先読み件数
+    IN_FLIGHT_PER_THREAD = 4
+
+    def __init__(self, workers: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 cache: Optional[ExifCache] = None, profiler: Optional[RunProfiler] = None,
+                 io_threads: Optional[int] = None, io_in_flight: Optional[int] = None,
+                 tags: Optional[AbstractSet[str]] = None, include_paths: bool = False):
+        """
+        コンストラクタ
+        Args:
+            workers: 並列プロセス数（未指定時はCPUコア数、1で逐次処理）
+            chunk_size: 1回のディスパッチでワーカーへ渡すファイル数
+            cache: EXIF情報キャッシュ（未指定時は毎回全ファイルを解析）
+            profiler: 実行プロファイル（ファイル単位の解析時間を記録する場合に指定）
+            io_threads: 先読みスレッド数（指定時はスレッドで先読みし、解析はプロセスプールで行う）
+            io_in_flight: 同時に先読みするファイル数の上限（未指定時はスレッド数の4倍）
+            tags: 保持するタグ名（未指定時は全てのImage/EXIFタグ。キャッシュ使用時はキャッシュのタグ）
+            include_paths: EXIF情報dictにファイルパスを付加するかどうか
+        """
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.chunk_size = max(1, chunk_size)
+        self.io_threads = io_threads
+        self.io_in_flight = max(1, io_in_flight or (io_threads or 1) * self.IN_FLIGHT_PER_THREAD)
+        # キャッシュの内容は保持するタグが揃っている必要があるため、キャッシュ側のタグで読み込む
+        self.tags = cache.tags if cache is not None else tags
+        if self.tags is not None:
+            self.tags = frozenset(self.tags)
+        self.cache = cache
+        self.profiler = profiler
+        self.include_paths = include_paths
+        # 読込対象のファイル数
+        self.file_count = 0
+        # 読込に失敗したファイルと理由
+        self.errors: list[Tuple[pathlib.Path, str]] = []
+
+    def read_files(self, file_paths: Iterable[pathlib.Path]) -> list[dict]:
+        """
+        画像ファイル群からEXIF情報を読み込むメソッド
+        結果は入力順を保持する
+        Args:
+            file_paths: 画像ファイルパスリスト
+        Returns:
+            list: EXIF情報リスト
+        """
+        return list(self.iter_files(file_paths))
+
+    def read_files_by_path(self, file_paths: list[pathlib.Path]) -> dict[str, dict]:
+        """
+        画像ファイル群からEXIF情報を読み込み、ファイルパスをキーにしたdictで返すメソッド
+        読込に失敗したファイルは含まない（errorsに記録される）
+        Args:
+            file_paths: 画像ファイルパスリスト
+        Returns:
+            dict: ファイルパスとEXIF情報dict
+        """
+        picture_infos = self.read_files(file_paths)
+        # 結果は入力順のため、失敗したファイルを除いたパスと対応する
+        failed_paths = {str(file_path) for file_path, _ in self.errors}
+        succeeded_paths = [str(file_path) for file_path in file_paths if str(file_path) not in failed_paths]
+        return dict(zip(succeeded_paths, picture_infos))
+
+    def iter_files(self, file_paths: Iterable[pathlib.Path]) -> Iterator[dict]:
+        """
+        画像ファイル群からEXIF情報を読み込み、入力順に返すジェネレータ
+        Args:
+            file_paths: 画像ファイルパス（ジェネレータ可）
+        Returns:
+            Iterator: EXIF情報dict
+        """
+        self.errors = []
+        self.file_count = 0
+        cached_entries = self.cache.load_entries() if self.cache is not None else {}
+        batch_size = self.chunk_size * self.workers * self.CHUNKS_PER_WORKER
+        file_path_iter = iter(file_paths)
+        executor = None
+        io_executor = None
+        if self.io_threads:
+            # 先読みはバッチの切れ目で途切れるため、バッチを先読み件数より十分大きくする
+            batch_size = max(batch_size, self.io_in_flight * self.CHUNKS_PER_WORKER)
+            io_executor = ThreadPoolExecutor(max_workers=self.io_threads)
+        try:
+            while True:
+                batch = list(itertools.islice(file_path_iter, batch_size))
+                if not batch:
+                    break
+                self.file_count += len(batch)
+                # ファイル数が少ない場合はプロセス起動コストの方が大きいため、
+                # 1チャンクを超える解析が必要になった時点でプロセスプールを起動する
+                if executor is None and self.workers > 1 and len(batch) > self.chunk_size:
+                    executor = ProcessPoolExecutor(max_workers=self.workers)
+                yield from self.read_batch(batch, cached_entries, executor, io_executor)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+            if io_executor is not None:
+                io_executor.shutdown()
+
+        # 今回見つからなかったエントリのうち、削除済みファイルのものを取り除く
+        if self.cache is not None:
+            self.cache.prune_missing(cached_entries.keys())
+
+    def read_batch(self, file_paths: list[pathlib.Path], cached_entries: dict,
+                   executor: Optional[Executor], io_executor: Optional[Executor] = None) -> list[dict]:
+        """
+        1バッチ分のファイルを読み込むメソッド
+        キャッシュが有効な場合は新規・更新ファイルのみ解析する
+        Args:
+            file_paths: 画像ファイルパスリスト
+            cached_entries: キャッシュ済みエントリ（参照したものは取り除く）
+            executor: プロセスプール（Noneの場合は逐次処理）
+            io_executor: 先読み用のスレッドプール（Noneの場合は先読みしない）
+        Returns:
+            list: EXIF情報リスト
+        """
+        if self.cache is None:
+            results = self.parse_files(file_paths, executor, io_executor)
+            return self.collect_results(file_paths, results)
+
+        picture_infos: list[Optional[dict]] = [None] * len(file_paths)
+        miss_indexes = []
+        miss_keys = []
+        for index, file_path in enumerate(file_paths):
+            # シンボリックリンクや「..」を含むパスでも同じファイルは同じキーになるよう、実体のパスをキーにする
+            path = str(pathlib.Path(file_path).resolve())
+            try:
+                stat = os.stat(path)
+            except OSError as e:
+                self.errors.append((file_path, str(e)))
+                continue
+            entry = cached_entries.pop(path, None)
+            if entry is not None and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+                picture_infos[index] = json.loads(entry[2])
+            else:
+                miss_indexes.append(index)
+                miss_keys.append((path, stat.st_size, stat.st_mtime_ns))
+
+        # キャッシュにないファイルのみ解析し、結果を登録する
+        miss_paths = [file_paths[index] for index in miss_indexes]
+        new_entries = []
+        results = self.parse_files(miss_paths, executor, io_executor)
+        for index, key, (picture_info, error) in zip(miss_indexes, miss_keys, results):
+            if error is not None:
+                self.errors.append((file_paths[index], error))
+                continue
+            picture_infos[index] = picture_info
+            new_entries.append((*key, picture_info))
+        self.cache.store_entries(new_entries)
+        if self.include_paths:
+            for file_path, picture_info in zip(file_paths, picture_infos):
+                if picture_info is not None:
+                    picture_info[FILE_PATH_KEY] = str(file_path)
+        return [picture_info for picture_info in picture_infos if picture_info is not None]
+
+    def parse_files(self, file_paths: list[pathlib.Path], executor: Optional[Executor],
+                    io_executor: Optional[Executor] = None) -> Iterator[tuple]:
+        """
+        画像ファイル群を解析し、入力順に結果を返すメソッド
+        Args:
+            file_paths: 画像ファイルパスリスト
+            executor: プロセスプール（Noneの場合は逐次処理）
+            io_executor: 先読み用のスレッドプール（Noneの場合は先読みしない）
+        Returns:
+            Iterator: read_exif_fileの戻り値
+        """
+        if io_executor is not None:
+            return self.prefetch_files(file_paths, io_executor, executor)
+        if self.profiler is not None and self.profiler.record_files:
+            return self.record_parse_results(self.map_files(
+                functools.partial(read_exif_file_timed, tags=self.tags), file_paths, executor))
+        return self.map_files(functools.partial(read_exif_file, tags=self.tags), file_paths, executor)
+
+    def map_files(self, func, file_paths: list[pathlib.Path], executor: Optional[Executor]) -> Iterator:
+        """
+        画像ファイル群に解析関数を適用し、入力順に結果を返すメソッド
+        Args:
+            func: 解析関数
+            file_paths: 画像ファイルパスリスト
+            executor: プロセスプール（Noneの場合は逐次処理）
+        Returns:
+            Iterator: 解析関数の戻り値
+        """
+        if executor is None or len(file_paths) <= self.chunk_size:
+            return map(func, file_paths)
+        return executor.map(func, file_paths, chunksize=self.chunk_size)
+
+    def prefetch_files(self, file_paths: list[pathlib.Path], io_executor: Executor,
+                       executor: Optional[Executor]) -> Iterator[tuple]:
+        """
+        スレッドプールで各ファイルの先頭を先読みし、読み込んだバイト列を入力順に解析するジェネレータ
+        先読みしたバイト列はchunk_size件ずつプロセスプールへ渡し、ワーカーあたりCHUNKS_PER_WORKER個まで並行して解析する
+        Args:
+            file_paths: 画像ファイルパスリスト
+            io_executor: 先読み用のスレッドプール
+            executor: プロセスプール（Noneの場合は逐次処理）
+        Returns:
+            Iterator: (EXIF情報dict, エラーメッセージ)
+        """
+        record_files = self.profiler is not None and self.profiler.record_files
+        max_pending = 1 if executor is None else self.workers * self.CHUNKS_PER_WORKER
+        chunks = self.iter_prefetched_chunks(file_paths, io_executor)
+        pending = deque()
+        while True:
+            for chunk in itertools.islice(chunks, max_pending - len(pending)):
+                items = [(file_path, head, error) for file_path, head, error, _ in chunk]
+                if executor is None:
+                    results = read_prefetched_chunk(items, self.tags)
+                else:
+                    results = executor.submit(read_prefetched_chunk, items, self.tags)
+                pending.append((chunk, results))
+            if not pending:
+                break
+            chunk, results = pending.popleft()
+            if isinstance(results, Future):
+                results = results.result()
+            for (_, head, _, read_seconds), (picture_info, error, seconds, bytes_read) in zip(chunk, results):
+                if record_files and head is not None:
+                    self.profiler.record_parse(read_seconds + seconds, len(head) + bytes_read)
+                yield picture_info, error
+
+    def iter_prefetched_chunks(self, file_paths: list[pathlib.Path], io_executor: Executor) -> Iterator[list]:
+        """
+        スレッドプールで各ファイルの先頭を先読みし、chunk_size件ずつ入力順に返すジェネレータ
+        先読み中のファイル数はio_in_flight件までに制限し、解析が追い付かない場合にメモリを使い過ぎないようにする
+        Args:
+            file_paths: 画像ファイルパスリスト
+            io_executor: 先読み用のスレッドプール
+        Returns:
+            Iterator: (画像ファイルパス, ファイル先頭のバイト列, エラーメッセージ, 読込時間（秒）)のリスト
+        """
+        file_path_iter = iter(file_paths)
+        in_flight = deque(
+            (file_path, io_executor.submit(read_file_head, file_path))
+            for file_path in itertools.islice(file_path_iter, self.io_in_flight))
+        chunk = []
+        while in_flight:
+            file_path, future = in_flight.popleft()
+            # 1件受け取るごとに次のファイルの先読みを依頼する
+            for next_path in itertools.islice(file_path_iter, 1):
+                in_flight.append((next_path, io_executor.submit(read_file_head, next_path)))
+            chunk.append((file_path, *future.result()))
+            if len(chunk) >= self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def record_parse_results(self, results: Iterable[tuple]) -> Iterator[tuple]:
+        """
+        read_exif_file_timedの結果から解析時間を記録し、read_exif_fileと同じ形式で返すジェネレータ
+        Args:
+            results: read_exif_file_timedの戻り値
+        Returns:
+            Iterator: (EXIF情報dict, エラーメッセージ)
+        """
+        for picture_info, error, seconds, bytes_read in results:
+            self.profiler.record_parse(seconds, bytes_read)
+            yield picture_info, error
+
+    def collect_results(self, file_paths: list[pathlib.Path], results: Iterable[tuple]) -> list[dict]:
+        """
+        読込結果を入力順に集約し、エラーを記録するメソッド
+        Args:
+            file_paths: 画像ファイルパスリスト
+            results: read_exif_fileの戻り値
+        Returns:
+            list: EXIF情報リスト
+        """
+        picture_infos = []
+        for file_path, (picture_info, error) in zip(file_paths, results):
+            if error is not None:
+                self.errors.append((file_path, error))
+                continue
+            if self.include_paths:
+                picture_info[FILE_PATH_KEY] = str(file_path)
+            picture_infos.append(picture_info)
+        return picture_infos
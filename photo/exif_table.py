@@ -0,0 +1,305 @@
+from fractions import Fraction
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from photo.exif_datetime import UTC_OFFSET_MISSING, parse_datetime_originals, parse_utc_offsets
+from photo.exif_reader import FILE_PATH_KEY
+
+
+# 列名
+COLUMN_MAKE = "make"
+COLUMN_MODEL = "model"
+COLUMN_LENS = "lens"
+COLUMN_F_NUMBER = "f_number"
+COLUMN_FOCAL_LENGTH = "focal_length"
+COLUMN_CAPTURED_AT = "captured_at"
+COLUMN_IMAGE_WIDTH = "image_width"
+COLUMN_IMAGE_HEIGHT = "image_height"
+COLUMN_ROTATED = "rotated"
+COLUMN_UTC_OFFSET = "utc_offset"
+COLUMN_FILE_PATH = "file_path"
+
+# 列と値の取得元のタグ
+COLUMN_TAGS = {
+    COLUMN_MAKE: ("Image Make",),
+    COLUMN_MODEL: ("Image Model",),
+    COLUMN_LENS: ("EXIF LensModel",),
+    COLUMN_F_NUMBER: ("EXIF FNumber",),
+    COLUMN_FOCAL_LENGTH: ("EXIF FocalLengthIn35mmFilm",),
+    COLUMN_CAPTURED_AT: ("EXIF DateTimeOriginal", "EXIF SubSecTimeOriginal"),
+    COLUMN_IMAGE_WIDTH: ("EXIF ExifImageWidth",),
+    COLUMN_IMAGE_HEIGHT: ("EXIF ExifImageLength",),
+    COLUMN_ROTATED: ("Image Orientation",),
+    COLUMN_UTC_OFFSET: ("EXIF OffsetTimeOriginal",),
+    # タグではなく、ExifReader（include_paths指定時）が付加するファイルパス
+    COLUMN_FILE_PATH: (),
+}
+# 基本のレポート（撮影期間・カメラ・レンズ・F値と焦点距離）で常に使用する列
+CORE_COLUMNS = (
+    COLUMN_MAKE, COLUMN_MODEL, COLUMN_LENS, COLUMN_F_NUMBER, COLUMN_FOCAL_LENGTH, COLUMN_CAPTURED_AT,
+)
+# 出現順のカテゴリとして保持する列
+CATEGORICAL_COLUMNS = (COLUMN_MAKE, COLUMN_MODEL, COLUMN_LENS)
+
+# 焦点距離(35mm換算)が記録されていないことを示す値
+FOCAL_LENGTH_MISSING = -1
+# 焦点距離(35mm換算)として保持できる上限（int16の範囲を超える値は未記録として扱う）
+FOCAL_LENGTH_MAX = np.iinfo(np.int16).max
+# 画像サイズが記録されていないことを示す値
+IMAGE_SIZE_MISSING = -1
+# 画像を90度回転して表示するOrientationの値（exifreadの表示用文字列）
+ROTATED_ORIENTATIONS = frozenset({
+    "Rotated 90 CW", "Rotated 90 CCW",
+    "Mirrored horizontal then rotated 90 CW", "Mirrored horizontal then rotated 90 CCW",
+})
+
+
+def required_tags(columns: Iterable[str]) -> frozenset[str]:
+    """
+    列の作成に必要なタグを取得する関数（EXIF読込で保持するタグの絞り込みに使用）
+    Args:
+        columns: 列名
+    Returns:
+        frozenset: タグ名
+    """
+    return frozenset(tag for column in columns for tag in COLUMN_TAGS[column])
+
+
+class ExifTableBuilder:
+    """
+    EXIF情報を列指向のテーブル(pandas.DataFrame)へ変換するクラス
+    一定件数ごとに型付きの列へ確定させるため、IfdTagや文字列を全件保持しない
+    基本の列（CORE_COLUMNS）は常に作成し、それ以外の列は指定された場合のみ作成する
+
+    列の型:
+        make / model / lens: category（出現順のカテゴリ）
+        f_number: float32（未記録はNaN）
+        focal_length: int16（未記録はFOCAL_LENGTH_MISSING）
+        captured_at: datetime64（撮影地の現地時刻、SubSecTimeOriginalの秒未満を含む。未記録はNaT）
+        image_width / image_height: int32（未記録はIMAGE_SIZE_MISSING）
+        rotated: bool（Orientationが90度回転。未記録はFalse）
+        utc_offset: int16（OffsetTimeOriginalのUTCとの時差（分）。未記録はUTC_OFFSET_MISSING）
+        file_path: object（画像ファイルパスの文字列）
+    """
+    # 型付きの列へ確定させる件数
+    DEFAULT_FLUSH_SIZE = 65536
+
+    def __init__(self, flush_size: int = DEFAULT_FLUSH_SIZE, columns: Iterable[str] = CORE_COLUMNS):
+        """
+        コンストラクタ
+        Args:
+            flush_size: 型付きの列へ確定させる件数
+            columns: 作成する列（基本の列は指定しなくても作成する）
+        """
+        self.flush_size = max(1, flush_size)
+        self.extra_columns = [
+            column for column in COLUMN_TAGS if column in set(columns) and column not in CORE_COLUMNS]
+        self.reset_buffer()
+        # 同じ値の変換を繰り返さないためのキャッシュ
+        self.f_number_cache: dict[str, float] = {}
+        self.focal_length_cache: dict[str, int] = {}
+
+    def reset_buffer(self):
+        """
+        確定前の値を保持するバッファを初期化するメソッド
+        """
+        self.makes: list[Optional[str]] = []
+        self.models: list[Optional[str]] = []
+        self.lenses: list[Optional[str]] = []
+        self.f_numbers: list[float] = []
+        self.focal_lengths: list[int] = []
+        self.captured_ats: list[str] = []
+        self.subsecs: list[str] = []
+        self.image_widths: list[int] = []
+        self.image_heights: list[int] = []
+        self.rotations: list[bool] = []
+        self.utc_offsets: list[str] = []
+        self.file_paths: list[str] = []
+
+    def append_row(self, picture_info: dict):
+        """
+        1ファイル分のEXIF情報をバッファへ追加するメソッド
+        Args:
+            picture_info: EXIF情報dict
+        """
+        self.makes.append(self.strip_value(picture_info.get("Image Make")))
+        self.models.append(self.strip_value(picture_info.get("Image Model")))
+        self.lenses.append(self.strip_value(picture_info.get("EXIF LensModel")))
+        self.f_numbers.append(self.convert_f_number(picture_info.get("EXIF FNumber")))
+        self.focal_lengths.append(self.convert_focal_length(
+            picture_info.get("EXIF FocalLengthIn35mmFilm")))
+        # 撮影日時は文字列のまま保持し、チャンク単位で一括変換する（未記録は空文字列）
+        self.captured_ats.append(str(picture_info.get("EXIF DateTimeOriginal", "")))
+        self.subsecs.append(str(picture_info.get("EXIF SubSecTimeOriginal", "")))
+        if not self.extra_columns:
+            return
+        # 基本以外の列は指定された場合のみ変換する
+        if COLUMN_IMAGE_WIDTH in self.extra_columns:
+            self.image_widths.append(self.convert_image_size(picture_info.get("EXIF ExifImageWidth")))
+        if COLUMN_IMAGE_HEIGHT in self.extra_columns:
+            self.image_heights.append(self.convert_image_size(picture_info.get("EXIF ExifImageLength")))
+        if COLUMN_ROTATED in self.extra_columns:
+            self.rotations.append(
+                self.strip_value(picture_info.get("Image Orientation")) in ROTATED_ORIENTATIONS)
+        if COLUMN_UTC_OFFSET in self.extra_columns:
+            self.utc_offsets.append(str(picture_info.get("EXIF OffsetTimeOriginal", "")).strip())
+        if COLUMN_FILE_PATH in self.extra_columns:
+            self.file_paths.append(picture_info.get(FILE_PATH_KEY, ""))
+
+    def iter_chunks(self, picture_infos: Iterable[dict]) -> Iterator[pd.DataFrame]:
+        """
+        EXIF情報dictを順次テーブルのチャンクへ変換するジェネレータ
+        チャンクは保持しないため、集計側で逐次処理すればメモリ使用量は一定になる
+        Args:
+            picture_infos: EXIF情報dictのイテラブル
+        Returns:
+            Iterator: EXIF情報テーブルのチャンク
+        """
+        for picture_info in picture_infos:
+            self.append_row(picture_info)
+            if len(self.makes) >= self.flush_size:
+                yield self.take_chunk()
+        if self.makes:
+            yield self.take_chunk()
+
+    def take_chunk(self) -> pd.DataFrame:
+        """
+        バッファの値から型付きのチャンクを作成し、バッファを空にするメソッド
+        Returns:
+            DataFrame: EXIF情報テーブル（チャンク）
+        """
+        chunk = pd.DataFrame({
+            COLUMN_MAKE: self.to_categorical(self.makes),
+            COLUMN_MODEL: self.to_categorical(self.models),
+            COLUMN_LENS: self.to_categorical(self.lenses),
+            COLUMN_F_NUMBER: np.array(self.f_numbers, dtype=np.float32),
+            COLUMN_FOCAL_LENGTH: np.array(self.focal_lengths, dtype=np.int16),
+            COLUMN_CAPTURED_AT: parse_datetime_originals(self.captured_ats, self.subsecs),
+        })
+        if COLUMN_IMAGE_WIDTH in self.extra_columns:
+            chunk[COLUMN_IMAGE_WIDTH] = np.array(self.image_widths, dtype=np.int32)
+        if COLUMN_IMAGE_HEIGHT in self.extra_columns:
+            chunk[COLUMN_IMAGE_HEIGHT] = np.array(self.image_heights, dtype=np.int32)
+        if COLUMN_ROTATED in self.extra_columns:
+            chunk[COLUMN_ROTATED] = np.array(self.rotations, dtype=bool)
+        if COLUMN_UTC_OFFSET in self.extra_columns:
+            chunk[COLUMN_UTC_OFFSET] = parse_utc_offsets(self.utc_offsets)
+        if COLUMN_FILE_PATH in self.extra_columns:
+            chunk[COLUMN_FILE_PATH] = np.array(self.file_paths, dtype=object)
+        self.reset_buffer()
+        return chunk
+
+    def strip_value(self, value) -> Optional[str]:
+        """
+        タグの値を前後の空白を除いた文字列に変換するメソッド
+        """
+        if value is None:
+            return None
+        return str(value).strip()
+
+    def convert_f_number(self, value) -> float:
+        """
+        F値を小数点表記に変換するメソッド
+        """
+        if value is None:
+            return np.nan
+        key = str(value)
+        f_number = self.f_number_cache.get(key)
+        if f_number is None:
+            try:
+                f_number = float(Fraction(key))
+            except (ValueError, ZeroDivisionError):
+                f_number = np.nan
+            self.f_number_cache[key] = f_number
+        return f_number
+
+    def convert_focal_length(self, value) -> int:
+        """
+        焦点距離(35mm換算)を整数に変換するメソッド
+        EXIFのSHORT型は65535まで記録できるが、int16の列に収まらない値や負の値は未記録として扱う
+        """
+        if value is None:
+            return FOCAL_LENGTH_MISSING
+        key = str(value)
+        focal_length = self.focal_length_cache.get(key)
+        if focal_length is None:
+            try:
+                focal_length = int(key)
+            except ValueError:
+                focal_length = FOCAL_LENGTH_MISSING
+            if not 0 <= focal_length <= FOCAL_LENGTH_MAX:
+                focal_length = FOCAL_LENGTH_MISSING
+            self.focal_length_cache[key] = focal_length
+        return focal_length
+
+    def convert_image_size(self, value) -> int:
+        """
+        画像の幅・高さ（ピクセル）を整数に変換するメソッド
+        """
+        if value is None:
+            return IMAGE_SIZE_MISSING
+        try:
+            return int(str(value))
+        except ValueError:
+            return IMAGE_SIZE_MISSING
+
+    def to_categorical(self, values: list[Optional[str]]) -> pd.Categorical:
+        """
+        文字列リストを出現順のカテゴリ列に変換するメソッド
+        """
+        categories = pd.unique(pd.Series(values, dtype=object).dropna())
+        return pd.Categorical(values, categories=categories)
+
+
+def create_empty_table(columns: Iterable[str] = CORE_COLUMNS) -> pd.DataFrame:
+    """
+    空のEXIF情報テーブルを作成する関数
+    Args:
+        columns: 作成する列
+    Returns:
+        DataFrame: 列と型のみ定義されたテーブル
+    """
+    empty_columns = {
+        COLUMN_MAKE: pd.Categorical([]),
+        COLUMN_MODEL: pd.Categorical([]),
+        COLUMN_LENS: pd.Categorical([]),
+        COLUMN_F_NUMBER: np.array([], dtype=np.float32),
+        COLUMN_FOCAL_LENGTH: np.array([], dtype=np.int16),
+        COLUMN_CAPTURED_AT: pd.Series([], dtype="datetime64[ns]"),
+        COLUMN_IMAGE_WIDTH: np.array([], dtype=np.int32),
+        COLUMN_IMAGE_HEIGHT: np.array([], dtype=np.int32),
+        COLUMN_ROTATED: np.array([], dtype=bool),
+        COLUMN_UTC_OFFSET: np.array([], dtype=np.int16),
+        COLUMN_FILE_PATH: np.array([], dtype=object),
+    }
+    return pd.DataFrame({column: empty_columns[column] for column in columns})
+
+
+def concat_exif_tables(chunks: list[pd.DataFrame], columns: Iterable[str] = CORE_COLUMNS) -> pd.DataFrame:
+    """
+    EXIF情報テーブルのチャンクを結合する関数
+    カテゴリ列はチャンク間でカテゴリを統合する（出現順を維持）
+    Args:
+        chunks: EXIF情報テーブルのチャンクリスト
+        columns: チャンクがない場合に作成する空のテーブルの列
+    Returns:
+        DataFrame: EXIF情報テーブル
+    """
+    if not chunks:
+        return create_empty_table(columns)
+    if len(chunks) == 1:
+        return chunks[0]
+
+    table = pd.DataFrame({
+        column: union_categoricals([chunk[column] for chunk in chunks])
+        for column in CATEGORICAL_COLUMNS
+    })
+    for column in chunks[0].columns:
+        if column in CATEGORICAL_COLUMNS:
+            continue
+        table[column] = pd.concat(
+            [chunk[column] for chunk in chunks], ignore_index=True)
+    return table
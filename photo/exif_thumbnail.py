@@ -0,0 +1,149 @@
+import io
+import mmap
+import pathlib
+import struct
+from typing import Optional, Tuple
+
+from photo.exif_header_reader import (
+    JPEG_HEAD_SIZE, MAX_IFD_ENTRIES, TYPE_SHORT, UnsupportedHeader, find_jpeg_app1,
+)
+
+
+# IFD0のOrientationタグ
+ORIENTATION_TAG = 0x0112
+# IFD1（サムネイル）のJPEGデータの位置・長さタグ
+THUMBNAIL_OFFSET_TAG = 0x0201
+THUMBNAIL_LENGTH_TAG = 0x0202
+# Orientationが記録されていない場合の値（回転なし）
+ORIENTATION_NORMAL = 1
+# 埋め込みサムネイルがない画像から作成するサムネイルの長辺（ピクセル）
+THUMBNAIL_MAX_SIZE = 320
+# 埋め込みサムネイルがない画像から作成するサムネイルのJPEG画質
+THUMBNAIL_JPEG_QUALITY = 85
+
+
+def load_thumbnail(file_path: pathlib.Path, max_size: int = THUMBNAIL_MAX_SIZE) -> Tuple[Optional[bytes], int, bool]:
+    """
+    画像のサムネイル（JPEG）を取得する関数
+    EXIFに埋め込まれたサムネイルをバイト列のまま取り出し、埋め込みサムネイルがない場合のみ画像をデコードして作成する
+    スレッドプールから呼び出すため、モジュール直下に定義する
+    Args:
+        file_path: 画像ファイルパス
+        max_size: 埋め込みサムネイルがない場合に作成するサムネイルの長辺（ピクセル）
+    Returns:
+        tuple: (サムネイルのJPEGデータ（取得できない場合はNone）, Orientationの値, 埋め込みサムネイルかどうか)
+    """
+    try:
+        thumbnail, orientation = read_embedded_thumbnail(file_path)
+    except (UnsupportedHeader, OSError, ValueError, struct.error):
+        thumbnail, orientation = None, ORIENTATION_NORMAL
+    if thumbnail is not None:
+        return thumbnail, orientation, True
+    return create_thumbnail(file_path, max_size), orientation, False
+
+
+def read_embedded_thumbnail(file_path: pathlib.Path) -> Tuple[Optional[bytes], int]:
+    """
+    EXIFのIFD1に埋め込まれたサムネイルのJPEGデータを取得する関数
+    JPEGのサムネイルはAPP1内にあるため、通常はEXIF読込と同じ先頭の読込のみで取得できる
+    Args:
+        file_path: 画像ファイルパス
+    Returns:
+        tuple: (サムネイルのJPEGデータ（埋め込まれていない場合はNone）, Orientationの値)
+    """
+    with open(file_path, "rb", buffering=0) as file:
+        head = file.read(JPEG_HEAD_SIZE)
+        if head[:2] == b"\xff\xd8":
+            app1 = find_jpeg_app1(file, head)
+            if app1 is None:
+                return None, ORIENTATION_NORMAL
+            return extract_thumbnail(app1[1])
+        if head[:4] in (b"II*\x00", b"MM\x00*"):
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return extract_thumbnail(mapped)
+    return None, ORIENTATION_NORMAL
+
+
+def extract_thumbnail(buffer) -> Tuple[Optional[bytes], int]:
+    """
+    TIFF構造からIFD0のOrientationとIFD1のサムネイルを取得する関数
+    Args:
+        buffer: TIFFヘッダーから始まるバイト列（bytes・memoryviewまたはmmap）
+    Returns:
+        tuple: (サムネイルのJPEGデータ（埋め込まれていない場合はNone）, Orientationの値)
+    """
+    byte_order = bytes(buffer[:2])
+    if byte_order == b"II":
+        endian = "<"
+    elif byte_order == b"MM":
+        endian = ">"
+    else:
+        raise UnsupportedHeader("unknown byte order")
+
+    ifd0_offset = struct.unpack_from(endian + "I", buffer, 4)[0]
+    ifd0_values, ifd1_offset = read_ifd_values(buffer, endian, ifd0_offset)
+    orientation = ifd0_values.get(ORIENTATION_TAG, ORIENTATION_NORMAL)
+    if not ifd1_offset:
+        return None, orientation
+
+    ifd1_values, _ = read_ifd_values(buffer, endian, ifd1_offset)
+    offset = ifd1_values.get(THUMBNAIL_OFFSET_TAG)
+    length = ifd1_values.get(THUMBNAIL_LENGTH_TAG)
+    if not offset or not length or offset + length > len(buffer):
+        return None, orientation
+    thumbnail = bytes(buffer[offset:offset + length])
+    # 非圧縮のサムネイルや破損したデータはJPEGとして使用しない
+    if thumbnail[:2] != b"\xff\xd8":
+        return None, orientation
+    return thumbnail, orientation
+
+
+def read_ifd_values(buffer, endian: str, ifd_offset: int) -> Tuple[dict, int]:
+    """
+    IFDのうち値が1つの整数（SHORT/LONG）のエントリと、次のIFDへのオフセットを取得する関数
+    Args:
+        buffer: TIFFヘッダーから始まるバイト列
+        endian: structのバイトオーダー指定
+        ifd_offset: IFDのオフセット
+    Returns:
+        tuple: (タグIDと値dict, 次のIFDへのオフセット（ない場合は0）)
+    """
+    entry_count = struct.unpack_from(endian + "H", buffer, ifd_offset)[0]
+    if entry_count > MAX_IFD_ENTRIES:
+        raise UnsupportedHeader("too many IFD entries")
+
+    values = {}
+    for index in range(entry_count):
+        entry = ifd_offset + 2 + index * 12
+        tag, field_type, count = struct.unpack_from(endian + "HHI", buffer, entry)
+        if count != 1:
+            continue
+        # 4バイト以内の値はエントリ内に直接格納される
+        value_format = "H" if field_type == TYPE_SHORT else "I"
+        values[tag] = struct.unpack_from(endian + value_format, buffer, entry + 8)[0]
+    next_offset = struct.unpack_from(endian + "I", buffer, ifd_offset + 2 + entry_count * 12)[0]
+    return values, next_offset
+
+
+def create_thumbnail(file_path: pathlib.Path, max_size: int = THUMBNAIL_MAX_SIZE) -> Optional[bytes]:
+    """
+    画像をデコードしてサムネイル（JPEG）を作成する関数（埋め込みサムネイルがない画像のみ使用）
+    JPEGはDCTの縮小デコードで必要な解像度のみ読み込む
+    Args:
+        file_path: 画像ファイルパス
+        max_size: サムネイルの長辺（ピクセル）
+    Returns:
+        bytes: サムネイルのJPEGデータ（画像を読み込めない場合はNone）
+    """
+    from PIL import Image
+
+    try:
+        with Image.open(file_path) as image:
+            image.draft("RGB", (max_size, max_size))
+            thumbnail = image.convert("RGB")
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None
+    thumbnail.thumbnail((max_size, max_size))
+    buf = io.BytesIO()
+    thumbnail.save(buf, format="JPEG", quality=THUMBNAIL_JPEG_QUALITY)
+    return buf.getvalue()
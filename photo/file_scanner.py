@@ -0,0 +1,125 @@
+import os
+import pathlib
+import queue
+import threading
+import time
+from typing import Iterable, Iterator
+
+
+# 分析対象とする画像ファイルの拡張子
+PHOTO_SUFFIXES = (".jpg", ".jpeg", ".tiff")
+
+
+def iter_photo_files(source_path: str, exclude_dirs: Iterable[str] = ()) -> Iterator[pathlib.Path]:
+    """
+    os.scandirでフォルダを走査し、画像ファイルパスを順次返すジェネレータ
+    拡張子の判定は走査と同時に行い、パスの全件リストは作成しない
+    Args:
+        source_path: 画像フォルダパス
+        exclude_dirs: 走査しないサブフォルダパス
+    Returns:
+        Iterator: 画像ファイルパス
+    """
+    excluded = {str(pathlib.Path(exclude_dir).resolve()) for exclude_dir in exclude_dirs}
+    pending_dirs = [str(pathlib.Path(source_path).resolve())]
+    while pending_dirs:
+        current_dir = pending_dirs.pop()
+        try:
+            with os.scandir(current_dir) as entries:
+                sub_dirs = []
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.path not in excluded:
+                                sub_dirs.append(entry.path)
+                        elif os.path.splitext(entry.name)[1].lower() in PHOTO_SUFFIXES and entry.is_file():
+                            yield pathlib.Path(entry.path)
+                    except OSError:
+                        continue
+        except OSError:
+            # アクセスできないフォルダは読み飛ばす
+            continue
+        # 走査順を安定させるため、見つけた順にサブフォルダを辿る
+        pending_dirs.extend(reversed(sub_dirs))
+
+
+class PhotoFileScanner:
+    """
+    画像ファイル走査クラス
+    別スレッドでフォルダを走査し、上限付きキューを介してEXIF読込側へパスを渡す
+    """
+    # キューに保持するパスの上限
+    DEFAULT_QUEUE_SIZE = 4096
+    # 走査終了を示す番兵
+    END_OF_SCAN = None
+
+    def __init__(self, source_path: str, queue_size: int = DEFAULT_QUEUE_SIZE,
+                 exclude_dirs: Iterable[str] = ()):
+        """
+        コンストラクタ
+        Args:
+            source_path: 画像フォルダパス
+            queue_size: キューに保持するパスの上限
+            exclude_dirs: 走査しないサブフォルダパス
+        """
+        self.source_path = source_path
+        self.queue_size = max(1, queue_size)
+        self.exclude_dirs = list(exclude_dirs)
+        # 直近の走査で見つかったファイル数と所要時間（キューの空き待ちを含む）
+        self.file_count = 0
+        self.scan_seconds = 0.0
+
+    def __iter__(self) -> Iterator[pathlib.Path]:
+        """
+        走査スレッドを開始し、見つかった画像ファイルパスを順次返す
+        """
+        path_queue = queue.Queue(maxsize=self.queue_size)
+        stop_event = threading.Event()
+        scan_thread = threading.Thread(
+            target=self.scan, args=(path_queue, stop_event), daemon=True)
+        scan_thread.start()
+        try:
+            while True:
+                file_path = path_queue.get()
+                if file_path is self.END_OF_SCAN:
+                    break
+                yield file_path
+        finally:
+            # 読込側が途中で終了した場合も走査スレッドを止める
+            stop_event.set()
+
+    def scan(self, path_queue: queue.Queue, stop_event: threading.Event):
+        """
+        フォルダを走査してキューへパスを投入するメソッド
+        Args:
+            path_queue: 画像ファイルパスキュー
+            stop_event: 走査中断イベント
+        """
+        start = time.perf_counter()
+        self.file_count = 0
+        try:
+            for file_path in iter_photo_files(self.source_path, self.exclude_dirs):
+                if not self.put(path_queue, file_path, stop_event):
+                    return
+                self.file_count += 1
+        finally:
+            self.scan_seconds = time.perf_counter() - start
+            self.put(path_queue, self.END_OF_SCAN, stop_event)
+
+    def put(self, path_queue: queue.Queue, item, stop_event: threading.Event) -> bool:
+        """
+        中断イベントを確認しながらキューへ投入するメソッド
+        Args:
+            path_queue: 画像ファイルパスキュー
+            item: 投入する値
+            stop_event: 走査中断イベント
+        Returns:
+            bool: 投入できた場合はTrue
+        """
+        while not stop_event.is_set():
+            try:
+                path_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
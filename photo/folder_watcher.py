@@ -0,0 +1,48 @@
+import os
+from typing import Tuple
+
+from photo.file_scanner import iter_photo_files
+
+
+class FolderWatcher:
+    """
+    フォルダ監視クラス
+    定期的にフォルダを走査し、前回の走査からの追加・更新・削除ファイルを検出する
+    更新の判定はファイルサイズと更新日時（ナノ秒）で行う
+    走査のたびにフォルダ全体を辿り全ファイルの属性を取得するため、1回の走査の所要時間はファイル数に比例する
+    （画像数の多いフォルダやネットワークドライブでは走査間隔を長くする）
+    """
+
+    def __init__(self, source_path: str):
+        """
+        コンストラクタ
+        Args:
+            source_path: 画像フォルダパス
+        """
+        self.source_path = source_path
+        # ファイルパスと(ファイルサイズ, 更新日時)
+        self.entries: dict[str, Tuple[int, int]] = {}
+
+    def poll(self) -> Tuple[list[str], list[str]]:
+        """
+        フォルダを走査し、前回の走査からの変更を検出するメソッド
+        初回は全ファイルが追加として検出される
+        Returns:
+            tuple: (追加・更新されたファイルパスリスト, 削除されたファイルパスリスト)
+        """
+        current_entries = {}
+        for file_path in iter_photo_files(self.source_path):
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                # 走査後に削除されたファイルは次回の走査で削除として扱う
+                continue
+            current_entries[str(file_path)] = (stat.st_size, stat.st_mtime_ns)
+
+        changed_paths = [
+            file_path for file_path, entry in current_entries.items()
+            if self.entries.get(file_path) != entry]
+        removed_paths = [
+            file_path for file_path in self.entries if file_path not in current_entries]
+        self.entries = current_entries
+        return changed_paths, removed_paths
@@ -0,0 +1,57 @@
+import pathlib
+import sys
+
+import pytest
+
+# リポジトリ直下のパッケージ（photo・analysisなど）を読み込めるようにする
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+
+from benchmarks.synthetic_corpus import SyntheticCorpusGenerator  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def corpus_dir(tmp_path_factory) -> pathlib.Path:
+    """
+    テスト用の画像ファイル群（JPEG・TIFF・破損ファイルを含む）を作成するフィクスチャ
+    """
+    output_dir = tmp_path_factory.mktemp("corpus")
+    SyntheticCorpusGenerator(profile={"corrupt_rate": 0.05}, seed=1).generate(str(output_dir), 300)
+    return output_dir
+
+
+@pytest.fixture(scope="session")
+def corpus_files(corpus_dir) -> list[pathlib.Path]:
+    """
+    テスト用の画像ファイルパス（パス順）
+    """
+    return sorted(path for path in corpus_dir.rglob("*") if path.is_file())
+
+
+def aggregate_files(file_paths, analyses=(), contact_sheet_group=None):
+    """
+    画像ファイルを読み込んで集計値を作成する（EXIF読込は逐次処理）
+    """
+    from analysis.report_aggregator import ReportAggregator
+    from photo.exif_reader import ExifReader
+    from photo.exif_table import COLUMN_FILE_PATH, CORE_COLUMNS, ExifTableBuilder
+
+    columns = (*CORE_COLUMNS, *{column for analysis in analyses for column in analysis.columns})
+    if contact_sheet_group is not None:
+        columns = (*columns, COLUMN_FILE_PATH)
+    exif_reader = ExifReader(workers=1, include_paths=contact_sheet_group is not None)
+    report_aggregator = ReportAggregator(analyses=analyses, contact_sheet_group=contact_sheet_group)
+    table_builder = ExifTableBuilder(columns=columns)
+    return report_aggregator.consume(table_builder.iter_chunks(exif_reader.iter_files(file_paths)))
+
+
+def assert_same_aggregate(actual, expected):
+    """
+    2つの集計値が同じ画像を集計した結果であることを確認する（初出順の違いは問わない）
+    """
+    assert actual.photo_count == expected.photo_count
+    assert actual.period_start == expected.period_start
+    assert actual.period_end == expected.period_end
+    assert dict(actual.camera_counts.items()) == dict(expected.camera_counts.items())
+    assert dict(actual.lens_counts.items()) == dict(expected.lens_counts.items())
+    assert actual.f_and_focal_length_counts == expected.f_and_focal_length_counts
+    assert actual.analysis_counts == expected.analysis_counts
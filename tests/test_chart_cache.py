@@ -0,0 +1,30 @@
+from chart.chart_cache import ChartCache
+from chart.f_and_focal_length_scatter_chart import GenerateFAndFocalLengthScatterChart
+
+
+def make_key(cache, image_format):
+    chart_params = {"dpi": 110, "image_format": image_format, "jpeg_quality": 75}
+    return cache.make_key(GenerateFAndFocalLengthScatterChart, "heatmap", chart_params, {"counts": [1, 2]})
+
+
+def test_cache_file_uses_image_format_extension(tmp_path):
+    cache = ChartCache(str(tmp_path))
+    jpeg_key = make_key(cache, "jpeg")
+    png_key = make_key(cache, "png")
+    cache.put(jpeg_key, b"\xff\xd8jpeg")
+    cache.put(png_key, b"\x89PNGpng")
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted([jpeg_key, png_key])
+    assert jpeg_key.endswith(".jpg") and png_key.endswith(".png")
+    assert cache.get(jpeg_key) == b"\xff\xd8jpeg"
+    assert cache.get(png_key) == b"\x89PNGpng"
+
+
+def test_evict_removes_jpeg_entries(tmp_path):
+    cache = ChartCache(str(tmp_path), max_bytes=10)
+    for dpi in range(3):
+        key = cache.make_key(GenerateFAndFocalLengthScatterChart, "heatmap",
+                             {"dpi": dpi, "image_format": "jpeg"}, None)
+        cache.put(key, b"0123456789")
+    # JPEGのキャッシュも合計サイズの上限の対象になる
+    assert len(list(tmp_path.glob("*.jpg"))) == 1
@@ -0,0 +1,99 @@
+import os
+import shutil
+
+import pytest
+
+import generate_pdf
+from photo.duplicate_filter import (
+    DEDUP_POLICIES, FINGERPRINT_TAGS, POLICY_FIRST, POLICY_OLDEST, DuplicateFilter, create_fingerprint,
+)
+from photo.exif_header_reader import read_exif_header
+from conftest import aggregate_files, assert_same_aggregate
+
+
+@pytest.fixture
+def archive(tmp_path, corpus_files):
+    """
+    テスト用の画像ファイルに、内容が同じコピーと末尾にデータを付加した派生ファイルを加えたフォルダ
+    コピー・派生ファイルは元のファイルより更新日時が新しく、走査順も後になる
+    派生ファイルはフィンガープリントを作成できる（破損していない）ファイルのみ作成する
+    """
+    originals = []
+    for index, file_path in enumerate(corpus_files):
+        original = tmp_path / "a_originals" / f"{index:04d}{file_path.suffix}"
+        original.parent.mkdir(exist_ok=True)
+        shutil.copyfile(file_path, original)
+        os.utime(original, (1_600_000_000, 1_600_000_000))
+        originals.append(original)
+    copies = []
+    for original in originals[::3]:
+        copy = tmp_path / "b_copies" / original.name
+        copy.parent.mkdir(exist_ok=True)
+        shutil.copyfile(original, copy)
+        copies.append(copy)
+    derivatives = []
+    for original in originals[1::3]:
+        picture_info = read_exif_header(original, FINGERPRINT_TAGS)
+        if picture_info is None or create_fingerprint(picture_info) is None:
+            continue
+        derivative = tmp_path / "c_exports" / original.name
+        derivative.parent.mkdir(exist_ok=True)
+        derivative.write_bytes(original.read_bytes() + b"\0" * 64)
+        derivatives.append(derivative)
+    return originals, copies, derivatives
+
+
+@pytest.mark.parametrize("policy", DEDUP_POLICIES)
+def test_order_files_removes_identical_copies(archive, policy):
+    originals, copies, derivatives = archive
+    duplicate_filter = DuplicateFilter(policy)
+    ordered = list(duplicate_filter.order_files(originals + copies + derivatives))
+
+    assert duplicate_filter.identical_count == len(copies)
+    assert duplicate_filter.file_count == len(originals) + len(copies) + len(derivatives)
+    assert len(ordered) == len(originals) + len(derivatives)
+    assert len({path.name for path in ordered if path.parent.name != "c_exports"}) == len(originals)
+
+
+def test_order_files_keeps_files_of_the_same_size(corpus_files):
+    # 合成画像は同じサイズのファイルが多いが、内容が異なるため除外しない
+    assert len({os.path.getsize(path) for path in corpus_files}) < len(corpus_files)
+    duplicate_filter = DuplicateFilter(POLICY_FIRST)
+    assert list(duplicate_filter.order_files(corpus_files)) == corpus_files
+    assert duplicate_filter.identical_count == 0
+
+
+def test_order_files_streams_first_policy(archive):
+    originals, copies, _ = archive
+    pulled = []
+
+    def scan():
+        for file_path in originals + copies:
+            pulled.append(file_path)
+            yield file_path
+
+    # firstは走査順のまま返すため、全ファイルを走査する前に先頭のファイルを返す
+    ordered = DuplicateFilter(POLICY_FIRST).order_files(scan())
+    assert next(ordered) == originals[0]
+    assert len(pulled) == 1
+
+
+def test_order_files_prefers_oldest_copy(archive):
+    originals, copies, _ = archive
+    # コピーの方を先に走査しても、更新日時が古い元のファイルを残す
+    ordered = list(DuplicateFilter(POLICY_OLDEST).order_files(copies + originals))
+    assert set(ordered) == set(originals)
+
+
+@pytest.mark.parametrize("policy", [POLICY_FIRST, POLICY_OLDEST])
+def test_deduplicated_aggregate_equals_originals(monkeypatch, archive, policy):
+    originals, copies, derivatives = archive
+    monkeypatch.setattr(generate_pdf, "setup_logging", lambda: None)
+    duplicate_filter = DuplicateFilter(policy)
+    report_aggregator = generate_pdf.GeneratePdf().aggregate_exif_data(
+        duplicate_filter.order_files(originals + copies + derivatives), workers=1,
+        duplicate_filter=duplicate_filter)
+
+    assert_same_aggregate(report_aggregator, aggregate_files(originals))
+    assert duplicate_filter.identical_count == len(copies)
+    assert 0 < duplicate_filter.derivative_count == len(derivatives)
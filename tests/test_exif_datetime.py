@@ -0,0 +1,129 @@
+import random
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from photo.exif_datetime import (
+    MAX_YEAR, MIN_YEAR, UTC_OFFSET_MISSING, parse_datetime_originals, parse_subsec_times, parse_utc_offsets,
+)
+
+
+# 固定長の書式（数字の位置が決まっており、空白で桁を埋めた値は不正とする）
+DATETIME_PATTERN = re.compile(r"\d{4}:\d{2}:\d{2} \d{2}:\d{2}:\d{2}")
+
+
+def parse_datetime_reference(values: list[str], subsecs: list[str] | None = None) -> np.ndarray:
+    """
+    従来の変換方法（pandas.to_datetimeの書式指定）による参照実装
+    EXIFのASCII値の終端のNUL文字は取り除き、書式が固定長でない値と年の範囲外の値はNaTとする
+    """
+    values = [value.rstrip("\0") for value in values]
+    values = [value if DATETIME_PATTERN.fullmatch(value) and MIN_YEAR <= int(value[:4]) <= MAX_YEAR else None
+              for value in values]
+    captured_ats = pd.to_datetime(
+        pd.Series(values, dtype=object), format="%Y:%m:%d %H:%M:%S", errors="coerce").to_numpy()
+    if subsecs is not None:
+        nanoseconds = [int(re.match(r"\d*", subsec[:9]).group().ljust(9, "0")) for subsec in subsecs]
+        captured_ats = captured_ats + np.array(nanoseconds, dtype="timedelta64[ns]")
+    return captured_ats
+
+
+def random_datetime_strings(count: int, seed: int = 0) -> list[str]:
+    """
+    正しい値と、桁・区切り文字・日付が不正な値を混ぜた文字列を作成する
+    """
+    rng = random.Random(seed)
+    values = []
+    for _ in range(count):
+        value = (f"{rng.randrange(1600, 2300):04d}:{rng.randrange(0, 14):02d}:{rng.randrange(0, 33):02d} "
+                 f"{rng.randrange(0, 25):02d}:{rng.randrange(0, 61):02d}:{rng.randrange(0, 61):02d}")
+        mutation = rng.random()
+        if mutation < 0.05:
+            position = rng.randrange(len(value))
+            value = value[:position] + rng.choice("x -/:.0") + value[position + 1:]
+        elif mutation < 0.08:
+            value = value[:rng.randrange(len(value))]
+        elif mutation < 0.1:
+            value += rng.choice(["0", " ", "\0"])
+        values.append(value)
+    return values
+
+
+def test_datetime_originals_match_reference():
+    values = random_datetime_strings(5000)
+    expected = parse_datetime_reference(values)
+    np.testing.assert_array_equal(parse_datetime_originals(values), expected)
+    # 正しい値と不正な値の両方を含む
+    assert 0 < np.count_nonzero(np.isnat(expected)) < len(values)
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("2024:02:29 23:59:59", "2024-02-29T23:59:59"),
+    ("2023:02:29 12:00:00", None),
+    ("2024:04:31 12:00:00", None),
+    ("2024-01-01 12:00:00", None),
+    ("2024:01:01 24:00:00", None),
+    ("2024:12:31 23:59:60", "2025-01-01T00:00:00"),
+    ("2024:12:31 23:59:61", None),
+    ("2024:01:01 12:00:00 ", None),
+    ("2024:01:01 12:00:00\0", "2024-01-01T12:00:00"),
+    # 従来の変換方法と異なり、空白で埋めた桁は受け付けない
+    ("2024:01: 1 12:00:00", None),
+    ("2024:01:01  7:00:00", None),
+    ("0000:00:00 00:00:00", None),
+    ("    :  :     :  :  ", None),
+    ("", None),
+    (f"{MIN_YEAR}:01:01 00:00:00", f"{MIN_YEAR}-01-01T00:00:00"),
+    (f"{MAX_YEAR + 1}:01:01 00:00:00", None),
+])
+def test_datetime_original_edge_cases(value, expected):
+    parsed = parse_datetime_originals([value])[0]
+    if expected is None:
+        assert np.isnat(parsed)
+    else:
+        assert parsed == np.datetime64(expected, "ns")
+
+
+def test_subsec_times_match_reference():
+    rng = random.Random(1)
+    values = random_datetime_strings(1000, seed=1)
+    subsecs = ["".join(rng.choice("0123456789a ") for _ in range(rng.randrange(0, 12))) for _ in values]
+    expected = parse_datetime_reference(values, subsecs)
+    np.testing.assert_array_equal(parse_datetime_originals(values, subsecs), expected)
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("05", 50_000_000),
+    ("5", 500_000_000),
+    ("123456789123", 123_456_789),
+    ("12a", 120_000_000),
+    ("a12", 0),
+    ("", 0),
+])
+def test_subsec_time_edge_cases(value, expected):
+    assert parse_subsec_times([value])[0] == expected
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("+09:00", 540),
+    ("-05:30", -330),
+    ("+00:00", 0),
+    ("+14:00", 840),
+    ("+15:00", UTC_OFFSET_MISSING),
+    ("+09:60", UTC_OFFSET_MISSING),
+    ("09:00", UTC_OFFSET_MISSING),
+    ("+0900", UTC_OFFSET_MISSING),
+    ("", UTC_OFFSET_MISSING),
+])
+def test_utc_offset_edge_cases(value, expected):
+    offsets = parse_utc_offsets([value])
+    assert offsets.dtype == np.int16
+    assert offsets[0] == expected
+
+
+def test_empty_inputs():
+    assert len(parse_datetime_originals([])) == 0
+    assert len(parse_subsec_times([])) == 0
+    assert len(parse_utc_offsets([])) == 0
@@ -0,0 +1,146 @@
+from concurrent.futures import ProcessPoolExecutor
+import random
+import struct
+
+import exifread
+
+from photo.exif_cache import ExifCache
+from photo.exif_header_reader import REPORT_TAG_NAMES, parse_exif_head, read_exif_header
+import photo.exif_reader
+from photo.exif_reader import ExifReader, read_exif_file
+
+
+def read_with_exifread(file_path) -> dict:
+    """
+    exifreadで読み込んだREPORT_TAGSのタグを表示用文字列で取得する
+    """
+    with open(file_path, "rb") as file:
+        file_tags = exifread.process_file(file, details=False)
+    return {tag: str(value) for tag, value in file_tags.items() if tag in REPORT_TAG_NAMES}
+
+
+def test_header_reader_matches_exifread(corpus_files):
+    parsed_count = 0
+    for file_path in corpus_files:
+        picture_info = read_exif_header(file_path)
+        if picture_info is None:
+            # 扱えないファイルはexifreadへフォールバックする
+            continue
+        parsed_count += 1
+        assert picture_info == read_with_exifread(file_path), file_path
+    assert parsed_count > len(corpus_files) * 0.9
+
+
+def test_prefetched_head_matches_header_reader(corpus_files):
+    for file_path in corpus_files:
+        head = file_path.read_bytes()[:64 * 1024]
+        assert parse_exif_head(head) == read_exif_header(file_path), file_path
+
+
+def test_prefetched_heads_are_parsed_in_process_pool(monkeypatch, corpus_files):
+    submitted = []
+
+    class RecordingExecutor(ProcessPoolExecutor):
+        def submit(self, fn, /, *args, **kwargs):
+            submitted.append(len(args[0]))
+            return super().submit(fn, *args, **kwargs)
+
+    monkeypatch.setattr(photo.exif_reader, "ProcessPoolExecutor", RecordingExecutor)
+    reader = ExifReader(workers=2, chunk_size=16, io_threads=4, tags=REPORT_TAG_NAMES)
+    expected_reader = ExifReader(workers=1, tags=REPORT_TAG_NAMES)
+    assert reader.read_files(corpus_files) == expected_reader.read_files(corpus_files)
+    assert reader.errors == expected_reader.errors
+    # 先読みしたバイト列はchunk_size件ずつワーカーへ渡される
+    assert sum(submitted) == len(corpus_files)
+    assert max(submitted) == 16
+
+
+def test_header_reader_selects_tags(corpus_files):
+    tags = frozenset({"Image Make", "EXIF FNumber"})
+    for file_path in corpus_files:
+        picture_info = read_exif_header(file_path, tags)
+        if picture_info is not None:
+            assert set(picture_info) <= tags
+
+
+def test_header_reader_big_endian(tmp_path):
+    # IFD0にMake(ASCII)・Orientation(SHORT)、EXIF IFDにFNumber(RATIONAL)を持つビッグエンディアンのTIFF
+    make = b"Nikon\x00"
+    ifd0_offset = 8
+    exif_offset = ifd0_offset + 2 + 12 * 3 + 4
+    data_offset = exif_offset + 2 + 12 + 4
+    tiff = b"MM\x00*" + struct.pack(">I", ifd0_offset)
+    tiff += struct.pack(">H", 3)
+    tiff += struct.pack(">HHII", 0x010F, 2, len(make), data_offset)
+    tiff += struct.pack(">HHIHH", 0x0112, 3, 1, 6, 0)
+    tiff += struct.pack(">HHII", 0x8769, 4, 1, exif_offset)
+    tiff += struct.pack(">I", 0)
+    tiff += struct.pack(">H", 1)
+    tiff += struct.pack(">HHII", 0x829D, 5, 1, data_offset + len(make))
+    tiff += struct.pack(">I", 0)
+    tiff += make + struct.pack(">II", 28, 10)
+    file_path = tmp_path / "big_endian.tif"
+    file_path.write_bytes(tiff)
+
+    picture_info = read_exif_header(file_path)
+    assert picture_info == {"Image Make": "Nikon", "Image Orientation": "Rotated 90 CW", "EXIF FNumber": "14/5"}
+    assert picture_info == read_with_exifread(file_path)
+
+
+def test_header_reader_rejects_non_exif(tmp_path):
+    file_path = tmp_path / "not_image.jpg"
+    file_path.write_bytes(b"not an image")
+    assert read_exif_header(file_path) is None
+
+
+def test_all_tags_are_not_limited_to_report_tags(corpus_files):
+    # tags未指定は全てのImage/EXIFタグを意味するため、高速読込の対象外のタグも取得する
+    picture_info, error = read_exif_file(corpus_files[0])
+    assert error is None
+    assert "Image ExifOffset" in picture_info
+
+
+def test_cache_without_tags_stores_all_tags(tmp_path, corpus_files):
+    file_paths = [path for path in corpus_files if path.suffix == ".jpg"][:20]
+    cache_path = str(tmp_path / "exif_cache.sqlite3")
+    with ExifCache(cache_path) as cache:
+        ExifReader(workers=1, cache=cache).read_files(file_paths)
+
+    # 高速読込の対象外のタグを要求しても、キャッシュ済みエントリから取得できる
+    with ExifCache(cache_path, tags={"Image ExifOffset"}) as cache:
+        assert cache.tags is None
+        picture_infos = ExifReader(workers=1, cache=cache).read_files(file_paths)
+    assert picture_infos == [read_exif_file(file_path)[0] for file_path in file_paths]
+    assert any("Image ExifOffset" in picture_info for picture_info in picture_infos)
+
+
+def test_cache_keys_resolve_symlinks_and_parent_references(tmp_path, corpus_files):
+    file_path = next(path for path in corpus_files if path.suffix == ".jpg")
+    link_dir = tmp_path / "link"
+    link_dir.symlink_to(file_path.parent, target_is_directory=True)
+    aliases = [file_path, link_dir / file_path.name, file_path.parent / ".." / file_path.parent.name / file_path.name]
+    with ExifCache(str(tmp_path / "exif_cache.sqlite3")) as cache:
+        for alias in aliases:
+            ExifReader(workers=1, cache=cache).read_files([alias])
+        # 同じファイルを別のパスで指定しても、実体のパスの1件のみ登録される
+        assert list(cache.load_entries()) == [str(file_path.resolve())]
+
+
+def test_header_reader_parses_jpeg_and_tiff(corpus_files):
+    # JPEG（APP1内のTIFF構造）とTIFF（ファイル先頭のTIFF構造）の両方を高速読込で扱う
+    parsed_suffixes = {file_path.suffix for file_path in corpus_files if read_exif_header(file_path)}
+    assert {".jpg", ".tiff"} <= parsed_suffixes
+
+
+def test_truncated_or_corrupted_heads_do_not_raise(corpus_files):
+    # 途中で切れた・壊れたヘッダーはNone（exifreadへのフォールバック）か取得できたタグを返し、例外は送出しない
+    rng = random.Random(0)
+    for file_path in corpus_files[::10]:
+        head = file_path.read_bytes()[:4096]
+        for length in range(0, len(head), 13):
+            assert isinstance(parse_exif_head(head[:length]), (dict, type(None)))
+        for _ in range(50):
+            corrupted = bytearray(head)
+            for _ in range(rng.randrange(1, 6)):
+                corrupted[rng.randrange(len(corrupted))] = rng.randrange(256)
+            assert isinstance(parse_exif_head(bytes(corrupted)), (dict, type(None)))
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+
+from photo.exif_reader import ExifReader
+from photo.exif_table import (
+    COLUMN_FOCAL_LENGTH, COLUMN_LENS, COLUMN_MAKE, CORE_COLUMNS, FOCAL_LENGTH_MISSING, ExifTableBuilder,
+    concat_exif_tables,
+)
+
+
+def test_focal_length_out_of_range_is_missing():
+    picture_infos = [
+        {"Image Make": "Canon", "EXIF FocalLengthIn35mmFilm": "50"},
+        # EXIFのSHORT型の範囲内だが、int16の列に収まらない値
+        {"Image Make": "Canon", "EXIF FocalLengthIn35mmFilm": "40000"},
+        {"Image Make": "Canon", "EXIF FocalLengthIn35mmFilm": "-3"},
+        {"Image Make": "Canon", "EXIF FocalLengthIn35mmFilm": "abc"},
+        {"Image Make": "Canon"},
+    ]
+    table = next(ExifTableBuilder().iter_chunks(picture_infos))
+    assert table[COLUMN_FOCAL_LENGTH].tolist() == [50] + [FOCAL_LENGTH_MISSING] * 4
+    assert table[COLUMN_FOCAL_LENGTH].dtype == np.int16
+
+
+def test_chunks_equal_single_table(corpus_files):
+    picture_infos = ExifReader(workers=1).read_files(corpus_files)
+    whole = next(ExifTableBuilder().iter_chunks(picture_infos))
+    chunks = list(ExifTableBuilder(flush_size=37).iter_chunks(picture_infos))
+    assert len(chunks) > 1
+    table = concat_exif_tables(chunks)
+    assert list(table.columns) == list(CORE_COLUMNS)
+    for column in (COLUMN_MAKE, COLUMN_LENS):
+        # カテゴリはチャンク間で統合され、出現順を維持する
+        assert list(table[column].cat.categories) == list(whole[column].cat.categories)
+    pd.testing.assert_frame_equal(table, whole)
+
+
+def test_empty_input_yields_no_chunks():
+    assert list(ExifTableBuilder().iter_chunks([])) == []
+    assert concat_exif_tables([]).empty
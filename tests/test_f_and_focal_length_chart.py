@@ -0,0 +1,21 @@
+import numpy as np
+
+from chart.f_and_focal_length_scatter_chart import GenerateFAndFocalLengthScatterChart
+
+
+def test_heatmap_keeps_f_numbers_outside_tick_range():
+    f_numbers = np.array([0.95, 1.8, 8.0, 32.0, 45.0, 64.0])
+    focal_lengths = np.array([50, 35, 24, 100, 200, 400])
+    counts = np.array([3, 10, 7, 2, 4, 1])
+    chart = GenerateFAndFocalLengthScatterChart()
+    f_edges, focal_length_edges, histogram = chart.bin_f_and_focal_length(f_numbers, focal_lengths, counts)
+    # heatmapの件数はscatter・bubbleと同じく全画像を含む
+    assert histogram.sum() == counts.sum()
+    assert f_edges[0] <= 0.95 and f_edges[-1] >= 64.0
+    assert focal_length_edges[-1] >= 400
+
+
+def test_f_number_range_defaults_to_tick_range():
+    chart = GenerateFAndFocalLengthScatterChart()
+    assert chart.f_number_range(np.array([])) == (min(chart.x_labels), max(chart.x_labels))
+    assert chart.f_number_range(np.array([2.8, 5.6])) == (min(chart.x_labels), max(chart.x_labels))
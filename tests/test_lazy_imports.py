@@ -0,0 +1,55 @@
+import pathlib
+import subprocess
+import sys
+
+import pytest
+
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[1]
+
+# 引数エラーで終了する場合にpandas・numpyを読み込んでいないことを確認するスクリプト
+CHECK_SCRIPT = """
+import sys
+import generate_pdf
+generate_pdf.setup_logging = lambda: None
+generate_pdf.GeneratePdf().main(["generate_pdf.py"] + sys.argv[1:])
+print(sorted(name for name in ("numpy", "pandas", "matplotlib", "reportlab") if name in sys.modules))
+"""
+
+
+def run_check(*arguments):
+    result = subprocess.run(
+        [sys.executable, "-c", CHECK_SCRIPT, *arguments],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+    return result.stdout.strip().splitlines()
+
+
+@pytest.mark.parametrize("arguments", [
+    ["/nonexistent/photos"],
+    ["/nonexistent/photos", "--analyses", "unknown"],
+    [],
+])
+def test_invalid_path_does_not_load_heavy_libraries(arguments):
+    output = run_check(*arguments)
+    assert output[0].startswith("エラー：")
+    assert output[-1] == "[]"
+
+
+@pytest.mark.parametrize("arguments", [
+    ["--sample", "10", "--watch"],
+    ["--watch", "--snapshot", "snapshot.json"],
+    ["--watch", "--stats-only"],
+    ["--watch", "--shard-output", "shard.json"],
+])
+def test_conflicting_arguments_do_not_load_heavy_libraries(tmp_path, arguments):
+    output = run_check(str(tmp_path), *arguments)
+    assert output[0].startswith("エラー：")
+    assert output[-1] == "[]"
+
+
+def test_analysis_registry_imports_without_report_aggregator():
+    # 分析項目の定義はレポート集計クラスに依存しない
+    script = "import sys, analysis.analysis_registry; print('analysis.report_aggregator' in sys.modules)"
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "False"
@@ -0,0 +1,31 @@
+import pathlib
+import subprocess
+import sys
+
+from instrumentation.log_setup import APP_LOGGER_NAMES
+
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[1]
+
+
+def test_every_package_has_an_app_logger():
+    packages = {
+        path.parent.name for path in REPO_ROOT.glob("*/*.py") if path.parent.name != "tests"}
+    assert packages <= set(APP_LOGGER_NAMES)
+
+
+def test_watch_info_logs_are_written(tmp_path):
+    # rootロガーは警告以上のため、アプリケーションのロガーのレベルが設定されていることを確認する
+    log_path = tmp_path / "logging.log"
+    script = (
+        "import sys, logging\n"
+        "from instrumentation.log_setup import setup_logging\n"
+        "setup_logging(sys.argv[1])\n"
+        "logging.getLogger('watch.report_watcher').info('regenerated')\n"
+        "logging.getLogger('benchmarks.run_benchmarks').info('benchmarked')\n"
+        "logging.getLogger('exifread').info('library')\n")
+    subprocess.run([sys.executable, "-c", script, str(log_path)], cwd=REPO_ROOT, check=True)
+    log = log_path.read_text(encoding="utf-8")
+    assert "regenerated" in log
+    assert "benchmarked" in log
+    assert "library" not in log
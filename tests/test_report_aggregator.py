@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+from analysis.analysis_registry import get_analyses
+from analysis.report_aggregator import ReportAggregator
+from conftest import aggregate_files, assert_same_aggregate
+
+
+def representative_files(report_aggregator):
+    return report_aggregator.contact_sheet.representative_files(top_count=100)
+
+
+@pytest.mark.parametrize("part_count", [2, 3, 7])
+def test_merged_parts_equal_single_pass(corpus_files, part_count):
+    analyses = get_analyses()
+    expected = aggregate_files(corpus_files, analyses=analyses, contact_sheet_group="camera")
+
+    # 走査順が交互になるように分割し、各部分の期間・値の初出順が異なるようにする
+    merged = ReportAggregator()
+    for index in range(part_count):
+        merged.merge(aggregate_files(corpus_files[index::part_count], analyses=analyses, contact_sheet_group="camera"))
+
+    assert_same_aggregate(merged, expected)
+    assert representative_files(merged) == representative_files(expected)
+
+
+def test_merge_drops_analyses_missing_from_one_part(corpus_files):
+    half = len(corpus_files) // 2
+    merged = aggregate_files(corpus_files[:half], analyses=get_analyses(["season", "hour"]))
+    merged.merge(aggregate_files(corpus_files[half:], analyses=get_analyses(["season"]), contact_sheet_group="lens"))
+
+    # 一部の画像しか集計していない項目・代表写真は残さない
+    assert list(merged.analysis_counts) == ["season"]
+    assert merged.contact_sheet is None
+
+
+def test_dict_round_trip(corpus_files):
+    report_aggregator = aggregate_files(corpus_files, analyses=get_analyses(), contact_sheet_group="focal_range")
+    restored = ReportAggregator.from_dict(json.loads(json.dumps(report_aggregator.to_dict())))
+
+    assert_same_aggregate(restored, report_aggregator)
+    assert representative_files(restored) == representative_files(report_aggregator)
+    assert restored.to_stats() == report_aggregator.to_stats()
@@ -0,0 +1,42 @@
+import os
+
+import pytest
+
+import generate_pdf
+from conftest import aggregate_files
+
+
+@pytest.fixture
+def pdf_generator(monkeypatch):
+    # テストではログファイルを作成しない
+    monkeypatch.setattr(generate_pdf, "setup_logging", lambda: None)
+    return generate_pdf.GeneratePdf()
+
+
+def test_size_budget_steps_shrink_the_pdf(tmp_path, corpus_dir, corpus_files, pdf_generator):
+    args = pdf_generator.parse_arguments(
+        ["generate_pdf.py", str(corpus_dir), "--no-chart-cache", "--chart-workers", "1", "--max-pdf-size", "1"])
+    report_aggregator = aggregate_files(corpus_files)
+
+    file_sizes = []
+    for quality in pdf_generator.get_quality_steps(args):
+        doc, contents = pdf_generator.create_report_contents(report_aggregator, args, quality=quality)
+        doc.build(contents)
+        file_sizes.append(os.path.getsize(doc.filename))
+        os.remove(doc.filename)
+
+    # 後の段階ほどPDFが小さくなる
+    assert len(file_sizes) == len(generate_pdf.GeneratePdf.SIZE_BUDGET_STEPS) + 1
+    assert file_sizes == sorted(file_sizes, reverse=True)
+    assert len(set(file_sizes)) == len(file_sizes)
+
+
+@pytest.mark.parametrize("quality, chart_format, expected", [
+    ("final", "raster", "350dpi_png"),
+    ("draft", "raster", "110dpi_jpeg75"),
+    ("final", "vector", "vector"),
+    ("draft", "vector", "vector_uncompressed"),
+])
+def test_describe_quality(quality, chart_format, expected):
+    quality = generate_pdf.GeneratePdf.QUALITY_PROFILES[quality]
+    assert generate_pdf.describe_quality(quality, chart_format) == expected
@@ -0,0 +1,112 @@
+import pytest
+
+import generate_pdf
+from analysis.report_snapshot import (
+    SnapshotError, create_source, find_overlapping_source, load_snapshot, merge_snapshots, save_snapshot)
+from conftest import aggregate_files, assert_same_aggregate
+
+
+def source(host, path):
+    return {"host": host, "path": path, "ingested_at": "2025-01-01T00:00:00"}
+
+
+@pytest.mark.parametrize("path, overlapping", [
+    ("/photos", True),
+    ("/photos/2024", True),
+    ("/", True),
+    ("/photos2", False),
+    ("/archive", False),
+])
+def test_find_overlapping_source(path, overlapping):
+    sources = [source("nas1", "/photos")]
+    found = find_overlapping_source(sources, source("nas1", path))
+    assert (found is not None) == overlapping
+
+
+def test_same_path_on_another_host_does_not_overlap():
+    assert find_overlapping_source([source("nas1", "/photos")], source("nas2", "/photos")) is None
+
+
+@pytest.fixture
+def pdf_generator(monkeypatch):
+    # テストではログファイルを作成しない
+    monkeypatch.setattr(generate_pdf, "setup_logging", lambda: None)
+    return generate_pdf.GeneratePdf()
+
+
+def test_fold_into_snapshot_equals_single_pass(tmp_path, corpus_dir, pdf_generator):
+    snapshot_path = str(tmp_path / "snapshot.json")
+    folders = sorted(path for path in corpus_dir.iterdir() if path.is_dir())
+    for folder in folders:
+        files = sorted(path for path in folder.rglob("*") if path.is_file())
+        assert pdf_generator.fold_into_snapshot(snapshot_path, str(folder), aggregate_files(files)) is not None
+
+    report_aggregator, sources = load_snapshot(snapshot_path)
+    all_files = sorted(path for path in corpus_dir.rglob("*") if path.is_file())
+    assert_same_aggregate(report_aggregator, aggregate_files(all_files))
+    assert [item["path"] for item in sources] == [create_source(str(folder))["path"] for folder in folders]
+
+
+@pytest.mark.parametrize("overlap", ["same", "nested", "parent"])
+def test_fold_into_snapshot_rejects_overlapping_folder(tmp_path, corpus_dir, pdf_generator, overlap):
+    snapshot_path = str(tmp_path / "snapshot.json")
+    year_dir = sorted(path for path in corpus_dir.iterdir() if path.is_dir())[0]
+    day_dir = sorted(path for path in year_dir.iterdir() if path.is_dir())[0]
+    first, second = {
+        "same": (year_dir, year_dir), "nested": (year_dir, day_dir), "parent": (day_dir, year_dir),
+    }[overlap]
+
+    first_files = sorted(path for path in first.rglob("*") if path.is_file())
+    pdf_generator.fold_into_snapshot(snapshot_path, str(first), aggregate_files(first_files))
+    second_files = sorted(path for path in second.rglob("*") if path.is_file())
+    assert pdf_generator.fold_into_snapshot(snapshot_path, str(second), aggregate_files(second_files)) is None
+
+    # 重複する取り込みは保存しない
+    report_aggregator, sources = load_snapshot(snapshot_path)
+    assert report_aggregator.photo_count == len(first_files)
+    assert len(sources) == 1
+
+
+def save_shard(shard_path, folder, host=None):
+    files = sorted(path for path in folder.rglob("*") if path.is_file())
+    shard_source = create_source(str(folder))
+    if host is not None:
+        shard_source["host"] = host
+    save_snapshot(str(shard_path), aggregate_files(files), [shard_source])
+    return str(shard_path)
+
+
+def test_merge_snapshots_equals_single_pass(tmp_path, corpus_dir):
+    folders = sorted(path for path in corpus_dir.iterdir() if path.is_dir())
+    shard_paths = [save_shard(tmp_path / f"shard{index}.json", folder) for index, folder in enumerate(folders)]
+
+    report_aggregator, sources = merge_snapshots(shard_paths)
+    all_files = sorted(path for path in corpus_dir.rglob("*") if path.is_file())
+    assert_same_aggregate(report_aggregator, aggregate_files(all_files))
+    assert len(sources) == len(folders)
+
+
+@pytest.mark.parametrize("overlap", ["same", "nested", "parent"])
+def test_merge_snapshots_rejects_overlapping_shards(tmp_path, corpus_dir, overlap):
+    year_dir = sorted(path for path in corpus_dir.iterdir() if path.is_dir())[0]
+    day_dir = sorted(path for path in year_dir.iterdir() if path.is_dir())[0]
+    first, second = {
+        "same": (year_dir, year_dir), "nested": (year_dir, day_dir), "parent": (day_dir, year_dir),
+    }[overlap]
+    shard_paths = [save_shard(tmp_path / "first.json", first), save_shard(tmp_path / "second.json", second)]
+
+    with pytest.raises(SnapshotError):
+        merge_snapshots(shard_paths)
+
+
+def test_merge_snapshots_accepts_same_path_on_other_hosts(tmp_path, corpus_dir):
+    year_dir = sorted(path for path in corpus_dir.iterdir() if path.is_dir())[0]
+    shard_paths = [
+        save_shard(tmp_path / "nas1.json", year_dir, host="nas1"),
+        save_shard(tmp_path / "nas2.json", year_dir, host="nas2"),
+    ]
+
+    report_aggregator, sources = merge_snapshots(shard_paths)
+    year_files = sorted(path for path in year_dir.rglob("*") if path.is_file())
+    assert report_aggregator.photo_count == 2 * len(year_files)
+    assert [item["host"] for item in sources] == ["nas1", "nas2"]
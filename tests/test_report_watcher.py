@@ -0,0 +1,70 @@
+import argparse
+import pathlib
+import shutil
+
+from analysis.analysis_registry import get_analyses
+from analysis.report_aggregator import ReportAggregator
+from conftest import aggregate_files, assert_same_aggregate
+from photo.exif_reader import ExifReader
+from watch.report_watcher import ReportWatcher
+
+
+def create_watcher(photo_dir) -> ReportWatcher:
+    args = argparse.Namespace(photo_dir=str(photo_dir), analyses=None, contact_sheet="camera")
+    return ReportWatcher(None, args)
+
+
+def poll(watcher: ReportWatcher):
+    changed_paths, removed_paths = watcher.folder_watcher.poll()
+    watcher.apply_changes(
+        ExifReader(workers=1, tags=None, include_paths=True), changed_paths, removed_paths)
+
+
+def assert_matches_full_scan(watcher: ReportWatcher, photo_dir):
+    file_paths = sorted(path for path in photo_dir.rglob("*") if path.is_file())
+    expected = aggregate_files(file_paths, analyses=get_analyses(), contact_sheet_group="camera")
+    actual = watcher.report_aggregator
+    assert_same_aggregate(actual, expected)
+    assert dict(actual.contact_sheet.bucket_counts) == dict(expected.contact_sheet.bucket_counts)
+    assert actual.contact_sheet.representative_files(10) == expected.contact_sheet.representative_files(10)
+
+
+def test_incremental_changes_equal_full_scan(tmp_path, corpus_dir):
+    photo_dir = tmp_path / "photos"
+    shutil.copytree(corpus_dir, photo_dir)
+    watcher = create_watcher(photo_dir)
+    poll(watcher)
+    assert_matches_full_scan(watcher, photo_dir)
+
+    # 最も古い年のフォルダを削除し（撮影期間の開始が変わる）、代表写真のファイルを別の写真で置き換える
+    year_dirs = sorted(path for path in photo_dir.iterdir() if path.is_dir())
+    shutil.rmtree(year_dirs[0])
+    replacement = sorted(path for path in year_dirs[-1].rglob("*.jpg"))[-1]
+    # 代表写真はパスのハッシュで決まるため、削除したフォルダ外の代表写真から選ぶ
+    representative = next(
+        pathlib.Path(file_path)
+        for _, _, file_paths in watcher.report_aggregator.contact_sheet.representative_files()
+        for file_path in file_paths
+        if not pathlib.Path(file_path).is_relative_to(year_dirs[0]) and pathlib.Path(file_path) != replacement)
+    shutil.copyfile(replacement, representative)
+    poll(watcher)
+    assert_matches_full_scan(watcher, photo_dir)
+
+    # 追加したファイルも反映される
+    shutil.copytree(corpus_dir / year_dirs[0].name, year_dirs[0])
+    poll(watcher)
+    assert_matches_full_scan(watcher, photo_dir)
+
+
+def test_removing_everything_resets_aggregate(tmp_path, corpus_dir):
+    photo_dir = tmp_path / "photos"
+    shutil.copytree(corpus_dir, photo_dir)
+    watcher = create_watcher(photo_dir)
+    poll(watcher)
+    for path in photo_dir.iterdir():
+        shutil.rmtree(path)
+    poll(watcher)
+    report_aggregator = watcher.report_aggregator
+    assert report_aggregator.photo_count == 0
+    assert report_aggregator.period_start is None and report_aggregator.period_end is None
+    assert_same_aggregate(report_aggregator, ReportAggregator(analyses=get_analyses()))
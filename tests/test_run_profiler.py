@@ -0,0 +1,61 @@
+import struct
+
+import pytest
+
+from instrumentation.run_profiler import STAGE_PARSE, RunProfiler
+from photo.exif_header_reader import JPEG_HEAD_SIZE, REPORT_TAG_NAMES, read_exif_header_counted
+from photo.exif_reader import ExifReader, read_exif_file_counted, read_file_head, read_prefetched_exif
+
+
+# 画像データを模した埋め草のバイト数（ヘッダーの読込量よりも十分大きくする）
+PADDING_SIZE = 4 * 1024 * 1024
+
+
+@pytest.mark.parametrize("io_threads", [None, 4])
+def test_parse_stage_reports_bytes_read(corpus_files, io_threads):
+    profiler = RunProfiler(record_files=True)
+    profiler.add(STAGE_PARSE, 1.0, items=len(corpus_files))
+    ExifReader(workers=1, profiler=profiler, io_threads=io_threads, tags=REPORT_TAG_NAMES).read_files(corpus_files)
+
+    stage = profiler.to_dict()["stages"][STAGE_PARSE]
+    if io_threads is None:
+        expected = sum(read_exif_file_counted(path, REPORT_TAG_NAMES)[2] for path in corpus_files)
+    else:
+        # 先読みした先頭で扱えないファイルは開き直して読むため、その分も数える
+        heads = [read_file_head(path)[0] for path in corpus_files]
+        expected = sum(len(head) + read_prefetched_exif(path, head, REPORT_TAG_NAMES)[2]
+                       for path, head in zip(corpus_files, heads))
+    assert stage["bytes_read"] == expected
+    assert 0 < stage["bytes_read"]
+    assert "file_bytes" not in stage
+    assert profiler.to_dict()["parse_latency_seconds"]["count"] == len(corpus_files)
+
+
+def test_header_reader_counts_only_the_head(tmp_path, corpus_files):
+    jpeg_path = next(path for path in corpus_files if path.suffix == ".jpg" and read_exif_header_counted(path)[0])
+    large_path = tmp_path / "large.jpg"
+    large_path.write_bytes(jpeg_path.read_bytes() + b"\0" * PADDING_SIZE)
+
+    picture_info, bytes_read = read_exif_header_counted(large_path)
+    assert picture_info is not None
+    assert bytes_read == JPEG_HEAD_SIZE
+    # exifreadでの解析もファイル全体は読まない
+    _, error, fallback_bytes_read = read_exif_file_counted(large_path)
+    assert error is None
+    assert 0 < fallback_bytes_read < PADDING_SIZE
+
+
+def test_tiff_with_trailing_ifd_counts_mapped_pages(tmp_path):
+    # 画像データの後ろにIFD0を置いたリトルエンディアンのTIFF（Make(ASCII)のみ）
+    make = b"Canon\x00"
+    ifd0_offset = 8 + PADDING_SIZE
+    tiff = b"II*\x00" + struct.pack("<I", ifd0_offset) + b"\0" * PADDING_SIZE
+    tiff += struct.pack("<H", 1) + struct.pack("<HHII", 0x010F, 2, len(make), ifd0_offset + 2 + 12 + 4)
+    tiff += struct.pack("<I", 0) + make
+    file_path = tmp_path / "trailing_ifd.tif"
+    file_path.write_bytes(tiff)
+
+    picture_info, bytes_read = read_exif_header_counted(file_path)
+    assert picture_info == {"Image Make": "Canon"}
+    # 先頭の読込と、IFDを含むページのみ数える
+    assert JPEG_HEAD_SIZE < bytes_read <= JPEG_HEAD_SIZE + 2 * 64 * 1024
@@ -0,0 +1,102 @@
+from collections import Counter
+import random
+
+import pytest
+
+from analysis.sketches import BottomKSample, SpaceSavingSketch, reservoir_sample, sampling_margin
+
+
+def zipf_values(count: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    return [f"value{int(rng.paretovariate(1.2))}" for _ in range(count)]
+
+
+def test_space_saving_bounds_exact_counts():
+    values = zipf_values(5000)
+    exact = Counter(values)
+    sketch = SpaceSavingSketch(20)
+    sketch.update(Counter(values))
+    assert sketch.total() == len(values)
+    assert len(sketch) <= 20
+    for key, count in sketch.items():
+        # 少なく数えることはなく、多く数えた件数は誤差の上限以内
+        assert exact[key] <= count <= exact[key] + sketch.error(key)
+        assert sketch.error(key) <= len(values) / 20
+
+
+def test_space_saving_merge_keeps_bounds():
+    values = zipf_values(6000, seed=1)
+    exact = Counter(values)
+    merged = SpaceSavingSketch(20)
+    for start in range(0, len(values), 1000):
+        shard = SpaceSavingSketch(20)
+        shard.update(Counter(values[start:start + 1000]))
+        merged.update(shard)
+    assert merged.total() == len(values)
+    for key, count in merged.items():
+        assert exact[key] <= count <= exact[key] + merged.error(key)
+    # 上位の値は近似集計でも残る
+    assert exact.most_common(1)[0][0] in merged
+
+
+def test_bottom_k_merge_equals_single_pass():
+    values = [f"IMG_{index:05d}.jpg" for index in range(2000)]
+    single = BottomKSample(6)
+    for value in values:
+        single.add(hash(value), value)
+
+    shards = [BottomKSample(6) for _ in range(4)]
+    shuffled = values[:]
+    random.Random(0).shuffle(shuffled)
+    for index, value in enumerate(shuffled):
+        shards[index % 4].add(hash(value), value)
+    merged = BottomKSample(6)
+    for shard in shards:
+        merged.update(shard)
+    assert merged.items() == single.items()
+    assert merged.items() == sorted((hash(value), value) for value in values)[:6]
+
+
+def test_bottom_k_ignores_duplicates_and_tracks_evictions():
+    sample = BottomKSample(2)
+    sample.add(5, "a")
+    sample.add(5, "a")
+    sample.add(3, "b")
+    assert sample.items() == [(3, "b"), (5, "a")]
+    sample.add(1, "c")
+    assert sample.items() == [(1, "c"), (3, "b")]
+    # 置き換えられた値は再度追加できる
+    assert "a" not in sample
+    sample.add(0, "a")
+    assert sample.items() == [(0, "a"), (1, "c")]
+
+
+@pytest.mark.parametrize("population_count", [0, 3, 10, 11, 1000])
+def test_reservoir_sample_counts_population(population_count):
+    count, sample = reservoir_sample(iter(range(population_count)), 10, random.Random(0))
+    assert count == population_count
+    assert len(sample) == min(10, population_count)
+    assert len(set(sample)) == len(sample)
+
+
+def test_reservoir_sample_keeps_none_values():
+    values = [None] * 500 + list(range(500))
+    count, sample = reservoir_sample(iter(values), 10, random.Random(1))
+    assert count == len(values)
+    assert len(sample) == 10
+
+
+def test_reservoir_sample_is_uniform():
+    hits = Counter()
+    for seed in range(2000):
+        _, sample = reservoir_sample(iter(range(20)), 5, random.Random(seed))
+        hits.update(sample)
+    # 各値の抽出確率は5/20
+    for value in range(20):
+        assert abs(hits[value] / 2000 - 0.25) < 0.05
+
+
+def test_sampling_margin():
+    assert sampling_margin(0, 100) == 1.0
+    assert sampling_margin(100, 100) == 0.0
+    assert sampling_margin(1000, 10 ** 7) == pytest.approx(1.96 * 0.5 / 1000 ** 0.5, rel=1e-3)
@@ -0,0 +1,77 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+from logging import getLogger
+import threading
+
+
+logger = getLogger(__name__)
+
+
+class ReportRequestHandler(BaseHTTPRequestHandler):
+    """
+    最新のレポートと統計情報を返すHTTPリクエストハンドラー
+    GET /           : 最新レポートの状態（生成日時・PDFファイルパス・統計情報）
+    GET /stats      : 最新レポートの統計情報（JSON）
+    GET /report.pdf : 最新レポートのPDF
+    """
+
+    def do_GET(self):
+        latest = self.server.report_watcher.get_latest()
+        path = self.path.split("?", 1)[0]
+        if path == "/":
+            self.send_json(latest or {"status": "pending"})
+        elif path == "/stats":
+            if latest is None:
+                self.send_error(503, "report is not generated yet")
+                return
+            self.send_json(latest["stats"])
+        elif path == "/report.pdf":
+            if latest is None:
+                self.send_error(503, "report is not generated yet")
+                return
+            try:
+                with open(latest["pdf_path"], "rb") as file:
+                    body = file.read()
+            except OSError:
+                self.send_error(404, "report file not found")
+                return
+            self.send_body(body, "application/pdf")
+        else:
+            self.send_error(404)
+
+    def send_json(self, value: dict):
+        """
+        JSONを返すメソッド
+        """
+        self.send_body(json.dumps(value, ensure_ascii=False).encode("utf-8"), "application/json; charset=utf-8")
+
+    def send_body(self, body: bytes, content_type: str):
+        """
+        レスポンス本文を返すメソッド
+        """
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # 標準エラー出力ではなくログファイルへ出力する
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def start_report_server(report_watcher, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """
+    レポート配信用のHTTPサーバーを別スレッドで起動する関数
+    Args:
+        report_watcher: 最新レポートを保持するReportWatcher
+        port: 待ち受けポート番号
+        host: 待ち受けアドレス（既定値はローカルのみ）
+    Returns:
+        ThreadingHTTPServer: 起動したサーバー（終了時はshutdownを呼び出す）
+    """
+    server = ThreadingHTTPServer((host, port), ReportRequestHandler)
+    server.report_watcher = report_watcher
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
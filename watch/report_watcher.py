@@ -0,0 +1,242 @@
+import argparse
+from collections import Counter
+import contextlib
+import datetime
+from logging import getLogger
+import os
+import pathlib
+import threading
+import time
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from analysis.analysis_registry import get_analyses, required_columns
+from analysis.report_aggregator import ReportAggregator
+from photo.exif_cache import ExifCache
+from photo.exif_reader import ExifReader
+from photo.exif_table import COLUMN_CAPTURED_AT, COLUMN_FILE_PATH, CORE_COLUMNS, ExifTableBuilder, required_tags
+from photo.folder_watcher import FolderWatcher
+from watch.report_server import start_report_server
+
+
+logger = getLogger(__name__)
+
+
+class ReportWatcher:
+    """
+    常駐モードのレポート自動更新クラス
+    解析済みのEXIF情報・集計値・フォント・描画プロセスを保持したままフォルダを監視し、
+    追加・更新されたファイルのみ再解析してレポートを作り直す
+    集計値は変更されたファイルの分だけ減算・加算して更新するため、変更1回あたりの処理量はフォルダ全体の画像数によらない
+    （取り除いた画像が代表写真に含まれる場合のみ、代表写真の抽出を全画像でやり直す）
+    変更が続いている間は作り直さず、一定時間変更がなくなってから作り直す（デバウンス）
+    """
+    # 常駐モードのPDFファイル名（更新のたびに置き換える）
+    LATEST_FILE_NAME = "photograph_analysis_report_latest.pdf"
+
+    def __init__(self, generate_pdf, args: argparse.Namespace):
+        """
+        コンストラクタ
+        Args:
+            generate_pdf: PDF生成クラス（GeneratePdf）
+            args: コマンドライン引数の解析結果
+        """
+        self.generate_pdf = generate_pdf
+        self.args = args
+        self.folder_watcher = FolderWatcher(args.photo_dir)
+        # 分析項目と、分析項目で使用する列を含むテーブルの列
+        self.analyses = get_analyses(args.analyses)
+        self.columns = (*CORE_COLUMNS, *required_columns(self.analyses))
+        # 代表写真を抽出する場合はファイルパスの列も作成する
+        if args.contact_sheet is not None:
+            self.columns = (*self.columns, COLUMN_FILE_PATH)
+        # ファイルパスとEXIF情報dict（解析済みのメタデータ）
+        self.picture_infos: dict[str, dict] = {}
+        # 保持しているEXIF情報の集計値（変更のたびに差分を反映する）
+        self.report_aggregator = ReportAggregator(
+            analyses=self.analyses, contact_sheet_group=args.contact_sheet)
+        # 撮影日時（ナノ秒）ごとの画像数（画像を取り除いた後の撮影期間の計算に使用）
+        self.captured_at_counts: Counter = Counter()
+        # 最新レポートの情報（HTTPサーバーのスレッドからも参照する）
+        self.latest: Optional[dict] = None
+        self.lock = threading.Lock()
+
+    def get_latest(self) -> Optional[dict]:
+        """
+        最新レポートの情報を取得するメソッド
+        Returns:
+            dict: 生成日時・PDFファイルパス・統計情報（未生成の場合はNone）
+        """
+        with self.lock:
+            return self.latest
+
+    def run(self):
+        """
+        フォルダの監視を開始するメソッド（Ctrl+Cで終了）
+        """
+        args = self.args
+        with contextlib.ExitStack() as stack:
+            # 描画プロセスは常駐させ、matplotlibを読込済みの状態で使い回す
+            chart_renderer = stack.enter_context(
+                self.generate_pdf.create_chart_renderer(args, chart_workers=args.chart_workers))
+            self.generate_pdf.initialize_report_styles()
+            if args.http_port is not None:
+                try:
+                    server = start_report_server(self, args.http_port)
+                except OSError as e:
+                    print(f"エラー：HTTPポート {args.http_port} で待ち受けできません。{e}")
+                    return
+                stack.callback(server.shutdown)
+                print(f"レポートを配信しています：http://127.0.0.1:{args.http_port}/report.pdf")
+
+            # 初回はEXIF情報キャッシュを使って全ファイルを読み込む
+            tags = required_tags(self.columns)
+            cache = None if args.no_cache else stack.enter_context(ExifCache(args.cache, tags=tags))
+            initial_reader = ExifReader(
+                workers=args.workers, chunk_size=args.chunk_size, cache=cache,
+                io_threads=args.io_threads, io_in_flight=args.io_in_flight, tags=tags,
+                include_paths=args.contact_sheet is not None)
+            # 2回目以降は変更ファイルのみのため、保持しているEXIF情報をキャッシュ代わりにする
+            # （保持しているEXIF情報と同じタグで読み込む）
+            exif_reader = ExifReader(
+                workers=args.workers, chunk_size=args.chunk_size,
+                io_threads=args.io_threads, io_in_flight=args.io_in_flight, tags=initial_reader.tags,
+                include_paths=args.contact_sheet is not None)
+
+            print(f"フォルダを監視しています：{args.photo_dir}（Ctrl+Cで終了）")
+            reader = initial_reader
+            pending_since = None
+            try:
+                while True:
+                    changed_paths, removed_paths = self.folder_watcher.poll()
+                    if changed_paths or removed_paths:
+                        self.apply_changes(reader, changed_paths, removed_paths)
+                        reader = exif_reader
+                        pending_since = time.monotonic()
+                    if pending_since is not None and time.monotonic() - pending_since >= args.watch_debounce:
+                        pending_since = None
+                        self.regenerate(chart_renderer)
+                    time.sleep(args.watch_interval)
+            except KeyboardInterrupt:
+                print("監視を終了します。")
+
+    def apply_changes(self, exif_reader: ExifReader, changed_paths: list[str], removed_paths: list[str]):
+        """
+        フォルダの変更を解析済みのEXIF情報と集計値へ反映するメソッド
+        更新・削除されたファイルは保持しているEXIF情報で集計値から減算し、追加・更新されたファイルは読み込んで加算する
+        Args:
+            exif_reader: EXIF情報読込クラス
+            changed_paths: 追加・更新されたファイルパスリスト
+            removed_paths: 削除されたファイルパスリスト
+        """
+        old_infos = [
+            picture_info for picture_info in (
+                self.picture_infos.pop(file_path, None) for file_path in (*removed_paths, *changed_paths))
+            if picture_info is not None]
+        new_infos = exif_reader.read_files_by_path([pathlib.Path(file_path) for file_path in changed_paths])
+        self.picture_infos.update(new_infos)
+
+        resample = False
+        period_changed = False
+        for photo_exifs in self.iter_chunks(old_infos):
+            resample |= self.report_aggregator.remove(photo_exifs)
+            period_changed |= self.update_captured_at_counts(photo_exifs, removed=True)
+        for photo_exifs in self.iter_chunks(new_infos.values()):
+            self.report_aggregator.update(photo_exifs)
+            self.update_captured_at_counts(photo_exifs)
+        # 撮影期間の端の画像を取り除いた場合は、残りの撮影日時から求め直す
+        if period_changed:
+            self.report_aggregator.set_period(*self.period_from_counts())
+        if resample:
+            self.resample_contact_sheet()
+        for file_path, error in exif_reader.errors:
+            logger.warning("EXIF read error: %s %s", file_path, error)
+        logger.info("changed=%d removed=%d errors=%d total=%d",
+                    len(changed_paths), len(removed_paths), len(exif_reader.errors), len(self.picture_infos))
+
+    def iter_chunks(self, picture_infos: Iterable[dict]):
+        """
+        EXIF情報dictをテーブルのチャンクへ変換するジェネレータ
+        """
+        return ExifTableBuilder(columns=self.columns).iter_chunks(picture_infos)
+
+    def update_captured_at_counts(self, photo_exifs: pd.DataFrame, removed: bool = False) -> bool:
+        """
+        撮影日時ごとの画像数を更新するメソッド
+        Args:
+            photo_exifs: 追加または取り除いた画像のEXIF情報テーブル
+            removed: 取り除いた画像か
+        Returns:
+            bool: 取り除いた画像に撮影期間の端の撮影日時が含まれていたか
+        """
+        captured_ats = photo_exifs[COLUMN_CAPTURED_AT].to_numpy()
+        values, counts = np.unique(
+            captured_ats[~np.isnat(captured_ats)].astype("datetime64[ns]").astype(np.int64), return_counts=True)
+        changes = Counter(dict(zip(values.tolist(), counts.tolist())))
+        if not removed:
+            self.captured_at_counts.update(changes)
+            return False
+        self.captured_at_counts.subtract(changes)
+        for value in changes:
+            if self.captured_at_counts[value] <= 0:
+                del self.captured_at_counts[value]
+        period_start = self.report_aggregator.period_start
+        period_end = self.report_aggregator.period_end
+        return len(values) > 0 and period_start is not None and (
+            values[0] <= period_start.value or values[-1] >= period_end.value)
+
+    def period_from_counts(self) -> tuple[Optional[pd.Timestamp], Optional[pd.Timestamp]]:
+        """
+        保持している撮影日時から撮影期間を求めるメソッド
+        Returns:
+            tuple: (撮影期間の開始, 撮影期間の終了)（撮影日時が記録された画像がない場合は(None, None)）
+        """
+        if not self.captured_at_counts:
+            return None, None
+        return pd.Timestamp(min(self.captured_at_counts)), pd.Timestamp(max(self.captured_at_counts))
+
+    def resample_contact_sheet(self):
+        """
+        代表写真の抽出を保持している全画像でやり直すメソッド（代表写真のファイルが更新・削除された場合のみ）
+        """
+        contact_sheet = self.report_aggregator.contact_sheet.create_empty()
+        for photo_exifs in self.iter_chunks(self.picture_infos.values()):
+            contact_sheet.update(photo_exifs)
+        self.report_aggregator.contact_sheet = contact_sheet
+        logger.info("contact sheet resampled")
+
+    def regenerate(self, chart_renderer):
+        """
+        保持している集計値からレポートを作り直すメソッド
+        Args:
+            chart_renderer: 常駐させているグラフ描画クラス
+        """
+        start = time.perf_counter()
+        report_aggregator = self.report_aggregator
+        stats = report_aggregator.to_stats()
+        if report_aggregator.photo_count == 0:
+            print("EXIF情報が取得できませんでした。ファイルの追加を待機します。")
+            return
+
+        try:
+            file_path = self.generate_pdf.build_report_file(
+                report_aggregator, self.args, chart_renderer=chart_renderer)
+        except Exception as e:
+            logger.exception("report generation failed")
+            print(f"エラー：レポートの作成中にエラーが発生しました。{e}")
+            return
+        # 配信中のファイルを書込途中の状態にしないよう、作成後に置き換える
+        latest_path = pathlib.Path(file_path).with_name(self.LATEST_FILE_NAME)
+        os.replace(file_path, latest_path)
+
+        with self.lock:
+            self.latest = {
+                "generated_at": datetime.datetime.now().isoformat(timespec="seconds"),
+                "pdf_path": str(latest_path),
+                "stats": stats,
+            }
+        seconds = time.perf_counter() - start
+        logger.info("report regenerated in %.3fs: %s", seconds, latest_path)
+        print(f"レポートを更新しました（{seconds:.1f}秒）：{latest_path}")